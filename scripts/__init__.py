@@ -1,13 +1,16 @@
 from .pokemon_crawler import crawler
-from .rename_images import rename_images
+from .rename_images import rename_images, rename_folders
 from .generate_card_json import generate_json
 from .generate_special_card_json import generate_special_card_data
+from .generate_all_json import generate_all_json
 from .gen_card_name_list import gen_card_name_list
 
 __all__ = [
     "crawler",
     "rename_images",
+    "rename_folders",
     "generate_json",
     "generate_special_card_data",
+    "generate_all_json",
     "gen_card_name_list",
 ]
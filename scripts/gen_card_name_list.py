@@ -1,30 +1,115 @@
 import os
-import sys
+import asyncio
 import argparse
 from dotenv import load_dotenv
-import json
-from multiprocessing import Pool
 from google import genai
-from src.services import analyze_card_name
-from src.utils import log, update_pbar, safe_load_json, safe_dump_json
-
-
-# Worker global variable
-worker_client = None
-
-
-def init_worker(api_key):
-    global worker_client
-    worker_client = genai.Client(api_key=api_key)
-
-
-def process_image(args):
-    image_path, lang = args
-    # Use the global worker_client
-    return analyze_card_name(image_path, lang, worker_client)
-
+from src.services import (
+    read_card_names,
+    build_template_name_reader,
+    NameHashIndex,
+    NameJournal,
+    get_journal_path,
+    replay_journal,
+    compact_journal,
+)
+from src.services.local_name_reader import TEMPLATE_FILE_NAME
+from src.utils import log, update_pbar, safe_load_json
+from src.utils import get_application_path, get_cache_path
+
+
+def get_card_key(image_path):
+    """
+    Get the card key of an image, the card name part of its file name.
+    Args:
+        image_path (str): e.g. cPK_10_000360_00_LIZARDONex_RR_M_M_ja_JP.png
+    Returns:
+        str: e.g. LIZARDONex, the file name if it has no such part.
+    """
+    filename = os.path.basename(image_path)
+    try:
+        # Get part 5 as key (index 4)
+        return filename.split("_")[4]
+    except IndexError:
+        return filename
+
+
+def plan_name_requests(image_paths, existing_data, lang):
+    """
+    Group the images still missing a name in this language by card key. The
+    images of a group (rarities, gold variants, reprints) share one name, so
+    only one representative per group needs to be read.
+    Args:
+        image_paths (list): Paths to the images.
+        existing_data (dict): The card names, {key: {lang: name}}.
+        lang (str): The language, e.g. ja_JP.
+    Returns:
+        dict: {key: [image_path, ...]}, sorted paths, the first being the
+            representative.
+    """
+    groups = {}
+
+    for img_path in sorted(image_paths):
+        key = get_card_key(img_path)
+
+        # Check if already processed for this language, failed reads are retried
+        if existing_data.get(key, {}).get(lang) is None:
+            groups.setdefault(key, []).append(img_path)
+
+    return groups
+
+
+def get_reference_folders(image_folder):
+    """
+    Get the folders of the other expansions in the same language, e.g.
+    images/A1/ja_JP for images/A2/ja_JP.
+    Args:
+        image_folder (str): The image folder, <root>/<expansion>/<lang>.
+    Returns:
+        list: The sibling folders.
+    """
+    image_folder = os.path.normpath(image_folder)
+    lang_folder = os.path.basename(image_folder)
+    root = os.path.dirname(os.path.dirname(image_folder))
+
+    if not os.path.isdir(root):
+        return []
 
-def gen_card_name_list(image_folder, lang, pbar=None, folders_len=1):
+    folders = []
+    for expansion in sorted(os.listdir(root)):
+        folder = os.path.join(root, expansion, lang_folder)
+        if os.path.isdir(folder) and os.path.normpath(folder) != image_folder:
+            folders.append(folder)
+    return folders
+
+
+def get_named_samples(image_folders, existing_data, lang):
+    """
+    Get the images whose card name is already known in this language.
+    Args:
+        image_folders (list): The folders to look in.
+        existing_data (dict): The card names, {key: {lang: name}}.
+        lang (str): The language, e.g. ja_JP.
+    Returns:
+        list: (image_path, lang, name) of the named images.
+    """
+    samples = []
+    for folder in image_folders:
+        for img in sorted(os.listdir(folder)):
+            name = existing_data.get(get_card_key(img), {}).get(lang)
+            if isinstance(name, str) and name.strip() and name != "unknown":
+                samples.append((os.path.join(folder, img), lang, name))
+    return samples
+
+
+def gen_card_name_list(
+    image_folder,
+    lang,
+    pbar=None,
+    folders_len=1,
+    limits=None,
+    local=True,
+    reference_folders=None,
+):
     # Initialize Reader
     log("Initializing genai...", pbar)
     load_dotenv()
@@ -37,43 +122,41 @@ def gen_card_name_list(image_folder, lang, pbar=None, folders_len=1):
         return []
 
     # Load existing data first to filter processed images
-    # Handle PyInstaller bundle path
-    if getattr(sys, "frozen", False):
-        application_path = os.path.dirname(sys.executable)
-    else:
-        application_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-    json_output_dir = os.path.join(application_path, "json")
+    # Next to the executable in the PyInstaller bundle
+    json_output_dir = os.path.join(get_application_path(), "json")
     os.makedirs(json_output_dir, exist_ok=True)
     output_file = os.path.join(json_output_dir, "card_names.json")
 
     existing_data = {}
     if os.path.exists(output_file):
-        existing_data = safe_load_json(output_file)
+        existing_data = safe_load_json(output_file) or {}
+
+    # Resume from the names journaled by a run that did not finish
+    journal_file = get_journal_path(output_file)
+    resumed = replay_journal(journal_file, existing_data)
+    if resumed:
+        log(f"Resumed {resumed} names from the journal.", pbar)
 
     # Get all image paths
     all_image_paths = [
         os.path.join(image_folder, img) for img in os.listdir(image_folder)
     ]
 
-    images_to_process = []
-
-    for img_path in all_image_paths:
-        filename = os.path.basename(img_path)
-        try:
-            # Get part 5 as key (index 4)
-            key = filename.split("_")[4]
-        except IndexError:
-            key = filename
-
-        # Check if already processed for this language
-        if key not in existing_data or lang not in existing_data[key]:
-            images_to_process.append(img_path)
+    # Read one representative per card key, its name fans out to the group
+    groups = plan_name_requests(all_image_paths, existing_data, lang)
+    images_to_process = [paths[0] for paths in groups.values()]
+    new_images = sum(len(paths) for paths in groups.values())
 
     log(
-        f"Found {len(images_to_process)} new images to process out of {len(all_image_paths)} total.",
+        f"Found {new_images} new images to process out of {len(all_image_paths)} total.",
         pbar,
     )
+    if new_images > len(images_to_process):
+        log(
+            f"Sending {len(images_to_process)} requests for {new_images} images, "
+            f"{new_images - len(images_to_process)} share a card name.",
+            pbar,
+        )
     update_pbar(10 // folders_len, pbar)
 
     folder_name = (
@@ -81,47 +164,81 @@ def gen_card_name_list(image_folder, lang, pbar=None, folders_len=1):
         + "/"
         + os.path.basename(image_folder)
     )
-    results_list = []
+    # The name read for each image sent, in images_to_process order
+    results_list = [None] * len(images_to_process)
 
     if images_to_process:
-        # Use half of the cpu processes
-        processes_count = os.cpu_count() // 2
-
         log(f"Starting processing {folder_name}...", pbar)
 
-        with Pool(
-            processes=processes_count, initializer=init_worker, initargs=(api_key,)
-        ) as pool:
-            # Create args list for map
-            tasks = [(path, lang) for path in images_to_process]
+        # Requests are network bound, run them concurrently on one event loop
+        # within the API limits (NAME_READER_LIMITS)
+        client = genai.Client(api_key=api_key)
+
+        # Reuse the names of already seen name artwork, then match crops
+        # against already named cards, Gemini only reads the ones left
+        backends = []
+        hash_index = None
+        if local:
+            hash_index = NameHashIndex()
+            if reference_folders is None:
+                reference_folders = get_reference_folders(image_folder)
+            backends = [
+                hash_index,
+                build_template_name_reader(
+                    get_named_samples(
+                        [image_folder] + list(reference_folders), existing_data, lang
+                    ),
+                    pbar,
+                    template_file=get_cache_path(TEMPLATE_FILE_NAME),
+                ),
+            ]
+
+        with NameJournal(journal_file) as journal:
+
+            def on_result(i, text):
+                # Journal each name as it arrives, once for the whole group.
+                # Failed reads are left out so the next run retries them
+                if text is not None:
+                    key = get_card_key(images_to_process[i])
+                    journal.write(key, lang, text)
+                    existing_data.setdefault(key, {})[lang] = text
+                results_list[i] = text
 
-            for result in pool.imap(process_image, tasks):
-                results_list.append(result)
                 # Calculate progress step
                 step = (75) // folders_len / len(images_to_process)
                 update_pbar(step, pbar)
 
-        log(f"Finished processing language {folder_name}", pbar)
+            asyncio.run(
+                read_card_names(
+                    images_to_process,
+                    lang,
+                    client,
+                    limits=limits,
+                    pbar=pbar,
+                    on_result=on_result,
+                    backends=backends,
+                )
+            )
+
+        # Index the new names for the next runs
+        if hash_index is not None:
+            for img_path in images_to_process:
+                name = existing_data.get(get_card_key(img_path), {}).get(lang)
+                hash_index.add_image(img_path, lang, name)
+            hash_index.save()
 
-        # Update data
-        for img_path, text in zip(images_to_process, results_list):
-            filename = os.path.basename(img_path)
-            try:
-                key = filename.split("_")[4]
-            except IndexError:
-                key = filename
-
-            if key not in existing_data:
-                existing_data[key] = {}
-
-            existing_data[key][lang] = text
+        log(f"Finished processing language {folder_name}", pbar)
 
     else:
         log("No new images to process.", pbar)
         update_pbar(75 // folders_len, pbar)
 
     log("Saving data to json/card_names.json", pbar)
-    safe_dump_json(existing_data, output_file)
+    try:
+        compact_journal(existing_data, output_file, journal_file)
+    except OSError as e:
+        # The names are still in the journal, replayed by the next run
+        log(f"Error saving {output_file}: {e}", pbar)
 
     update_pbar(15 // folders_len, pbar)
 
@@ -134,14 +251,45 @@ def main():
         "--image-folder", type=str, required=True, help="Image folder path"
     )
     parser.add_argument("--lang", type=str, required=True, help="Language")
+    parser.add_argument(
+        "--concurrency", type=int, help="Maximum requests in flight at once"
+    )
+    parser.add_argument("--rate", type=float, help="Maximum requests per second")
+    parser.add_argument(
+        "--batch-size", type=int, help="Name crops tiled into one request"
+    )
+
+    parser.add_argument(
+        "--no-local",
+        action="store_true",
+        help="Send every card to Gemini, skip the offline name reader",
+    )
+    parser.add_argument(
+        "--reference-folders",
+        nargs="*",
+        help="Folders of named cards for the offline name reader "
+        "(default: the other expansions in the same language)",
+    )
 
     args = parser.parse_args()
 
-    results_list = gen_card_name_list(args.image_folder, args.lang, folders_len=1)
+    limits = {}
+    if args.concurrency:
+        limits["concurrency"] = args.concurrency
+    if args.rate:
+        limits["rate"] = args.rate
+    if args.batch_size:
+        limits["batch_size"] = args.batch_size
+
+    results_list = gen_card_name_list(
+        args.image_folder,
+        args.lang,
+        folders_len=1,
+        limits=limits,
+        local=not args.no_local,
+        reference_folders=args.reference_folders,
+    )
 
 
 if __name__ == "__main__":
-    from multiprocessing import freeze_support
-
-    freeze_support()
     main()
@@ -0,0 +1,200 @@
+import os
+import argparse
+from src.services import build_icon_bank, analyze_cards, find_duplicate_cards
+from src.utils import log, update_pbar, safe_dump_json
+from scripts.generate_card_json import (
+    get_card_type,
+    get_excel_files,
+    load_pack_data,
+    prepare_tasks,
+    aggregate_card_types,
+)
+from scripts.generate_special_card_json import (
+    build_special_card,
+    aggregate_special_results,
+)
+
+
+def merge_non_pokemon_booster_pack(special_results, non_pokemon_booster_pack):
+    """
+    Combine the booster packs of the non-Pokemon cards into the special data.
+    Args:
+        special_results (dict): The special card data, updated in place.
+        non_pokemon_booster_pack (dict): Card name to its booster packs.
+    """
+    for key, value in non_pokemon_booster_pack.items():
+        if (
+            key in special_results
+            and isinstance(special_results[key], dict)
+            and isinstance(value, dict)
+        ):
+            special_results[key].update(value)
+        else:
+            special_results[key] = value
+
+
+def generate_all_json(
+    folder_path,
+    excel_paths,
+    pbar=None,
+    use_cache=True,
+    scale_search=False,
+    color_histogram=False,
+    early_exit=False,
+):
+    """
+    Generate the card JSON, the duplicate list and the special card data
+    with one pass over the images and one worker pool.
+    Args:
+        folder_path (str): Path to folder.
+        excel_paths (list): List of Excel file paths.
+        pbar (QProgressBar): Progress bar.
+        use_cache (bool): Reuse the cached results of unchanged images.
+        scale_search (bool): Use the faster coarse-to-fine icon scale search.
+        color_histogram (bool): Classify card types by color histogram first.
+        early_exit (bool): Classify card types with the early exit search.
+    Returns:
+        tuple: (result, duplicate_list, special_results), None if the
+            Excel files or the folder could not be read.
+    """
+    # Load Excel files, and use files name as pack name
+    excel_files = get_excel_files(excel_paths)
+
+    log("Loading icons...", pbar)
+    icon_bank = build_icon_bank()
+    log(f"Loaded {len(icon_bank)} icons.", pbar)
+
+    pack_index = load_pack_data(excel_files, pbar)
+    if pack_index is None:
+        return
+
+    # Check if path exists
+    if not os.path.exists(folder_path):
+        log(f"Error: Folder {folder_path} does not exist.", pbar)
+        return
+
+    log("Scanning images...", pbar)
+    update_pbar(5, pbar)
+
+    image_paths = []
+    for filename in os.listdir(folder_path):
+        if filename.lower().endswith((".png", ".jpg", ".jpeg")):
+            image_paths.append(os.path.join(folder_path, filename))
+
+    # Only png images are used for the card types
+    type_paths = [path for path in image_paths if path.lower().endswith(".png")]
+    task_paths, task_metadata = prepare_tasks(type_paths, pack_index)
+
+    total_images = len(image_paths)
+    log(f"Found {total_images} valid cards to process.", pbar)
+
+    log("Start processing cards...", pbar)
+    # Analyze every image once, unchanged images come from the cache
+    analyses = dict(
+        zip(
+            image_paths,
+            analyze_cards(
+                image_paths,
+                icon_bank,
+                use_cache=use_cache,
+                pbar=pbar,
+                progress=55,
+                scale_search=scale_search,
+                color_histogram=color_histogram,
+                early_exit=early_exit,
+            ),
+        )
+    )
+    log("Processing cards completed.", pbar)
+
+    # 1. Card types
+    results_list = [get_card_type(analyses[image_path]) for image_path in task_paths]
+
+    result, non_pokemon_booster_pack = aggregate_card_types(
+        excel_files, task_paths, task_metadata, results_list, pbar, pack_index
+    )
+
+    # 2. Duplicate cards
+    log("Generating duplicate list...", pbar)
+    duplicate_list = find_duplicate_cards(result, pbar)
+
+    # 3. Special cards
+    log("Aggregating special card data...", pbar)
+    special_results = aggregate_special_results(
+        [
+            build_special_card(image_path, analyses[image_path], duplicate_list)
+            for image_path in image_paths
+        ]
+    )
+
+    # Combine the non pokemon booster pack
+    merge_non_pokemon_booster_pack(special_results, non_pokemon_booster_pack)
+
+    return result, duplicate_list, special_results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate card, duplicate and special card JSON in one pass."
+    )
+    parser.add_argument("--image-folder", help="Path to image folder", required=True)
+    parser.add_argument(
+        "--excel-files", nargs="+", help="Path to Excel files", required=True
+    )
+    parser.add_argument("--output-name", help="Output JSON file", required=True)
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Analyze every image again instead of using the cache",
+    )
+    parser.add_argument(
+        "--scale-search",
+        action="store_true",
+        help="Faster coarse-to-fine icon scale search instead of trying every scale",
+    )
+    parser.add_argument(
+        "--color-histogram",
+        action="store_true",
+        help="Classify card types by color first, matching only unclear ones",
+    )
+    parser.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="Classify card types one by one, stopping at the first sure icon",
+    )
+
+    args = parser.parse_args()
+
+    outputs = generate_all_json(
+        args.image_folder,
+        args.excel_files,
+        use_cache=args.use_cache,
+        scale_search=args.scale_search,
+        color_histogram=args.color_histogram,
+        early_exit=args.early_exit,
+    )
+    if outputs is None:
+        return
+
+    result, duplicate_list, special_results = outputs
+
+    OUTPUT_FILE = f"json/{args.output_name}.json"
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+
+    print(f"Writing to {OUTPUT_FILE}...")
+    safe_dump_json(result, OUTPUT_FILE)
+
+    if duplicate_list:
+        safe_dump_json(duplicate_list, f"json/{args.output_name}_duplicates.json")
+
+    safe_dump_json(special_results, f"json/{args.output_name}_special.json")
+
+    print("Done.")
+
+
+if __name__ == "__main__":
+    from multiprocessing import freeze_support
+
+    freeze_support()
+    main()
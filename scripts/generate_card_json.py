@@ -1,141 +1,110 @@
-import pandas as pd
 import os
 import glob
 import json
-import cv2
-import numpy as np
 import argparse
 from src.services import (
-    load_icons,
-    match_icon,
+    build_icon_bank,
+    analyze_card,
+    analyze_cards,
     check_duplicate_cards,
     check_duplicate_specific_card,
     load_promo_lists,
+    build_pack_index,
+    load_change_manifests,
+    is_changed_image,
 )
 from src.utils import log, update_pbar
-from multiprocessing import Pool
-from functools import partial
-from src.config import CARD_REGIONS
-from src.utils import safe_dump_json
+from src.utils import safe_load_json, safe_dump_json
+
+# Card types in the order they are written to the JSON
+CARD_TYPES = [
+    "grass",
+    "fire",
+    "water",
+    "lightning",
+    "psychic",
+    "fighting",
+    "darkness",
+    "metal",
+    "colorless",
+    "dragon",
+]
+
+
+def get_card_type(analysis):
+    """
+    Get the card type from the card analysis.
+    Args:
+        analysis (dict): The result of analyze_card, None if unreadable.
+    Returns:
+        str: The card type, "unknown" if not a Pokemon.
+    """
+    if analysis and analysis["type"]:
+        return analysis["type"]
+    return "unknown"
 
 
-def get_image_type(image_path, icons, pbar=None):
+def get_image_type(image_path, icons, pbar=None, histogram=None):
     """
     Get image type from image path.
-    By match the specific position (top right) in the image with the icons.
-    Using cv2.matchTemplate to match the icons.
+    By match the specific position (top right) in the image with the icons,
+    using the card analysis engine.
     Args:
         image_path (str): Path to image.
-        icons (dict): Dictionary of icons.
+        icons (IconBank): Pre-scaled icon bank.
+        histogram (TypeHistogram): Classify by color first, only unclear
+            crops are matched with the icons (optional).
     """
     try:
-        img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-        if img is None:
-            return "unknown"
-
-        height, width = img.shape[:2]
-
-        # Crop top right
-        left = int(width * CARD_REGIONS["type"]["left"])
-        top = int(height * CARD_REGIONS["type"]["top"])
-        right = int(width * CARD_REGIONS["type"]["right"])
-        bottom = int(height * CARD_REGIONS["type"]["bottom"])
-
-        crop = img[top:bottom, left:right]
-
-        best_type = match_icon(crop, icons, threshold=0.5)
-
-        if best_type:
-            return best_type
-        else:
-            return "unknown"
-
+        return get_card_type(
+            analyze_card(image_path, icons, full=False, histogram=histogram)
+        )
     except Exception as e:
         log(f"Error processing {image_path}: {e}", pbar)
         return "unknown"
 
 
-def generate_json(folder_path, excel_paths, pbar=None):
+def get_excel_files(excel_paths):
     """
-    Generate card JSON.
+    Use the Excel files name as pack name.
     Args:
-        folder_path (str): Path to folder.
         excel_paths (list): List of Excel file paths.
-        pbar (QProgressBar): Progress bar.
+    Returns:
+        dict: Pack name to Excel file path.
     """
-
-    # Load Excel files, and use files name as pack name
-    EXCEL_FILES = {}
+    excel_files = {}
     for path in excel_paths:
         filename = os.path.basename(path)
         if "_" in filename:
             pack_name = os.path.splitext(filename.split("_")[1])[0].lower()
         else:
             pack_name = os.path.splitext(filename)[0].lower()
-        EXCEL_FILES[pack_name] = path
+        excel_files[pack_name] = path
+    return excel_files
 
-    log("Loading icons...", pbar)
-    icons = load_icons()
-    log(f"Loaded {len(icons)} icons.", pbar)
 
+def load_pack_data(excel_files, pbar=None):
+    """
+    Build the pack membership index from the Excel files.
+    Args:
+        excel_files (dict): Pack name to Excel file path.
+        pbar (QProgressBar): Progress bar.
+    Returns:
+        PackIndex: The pack membership index, None if a file could not be read.
+    """
     log("Loading Excel files...", pbar)
-    pack_data = {}
-    for pack_name, path in EXCEL_FILES.items():
-        try:
-            df = pd.read_excel(path, usecols=["Image Name"])
-            # Extract IDs from Excel: cPK_10_008570_00 -> 008570
-            ids = set()
-            for name in df["Image Name"].astype(str).str.strip():
-                try:
-                    parts = name.split("_")
-                    if len(parts) > 3:
-                        if parts[3] == "02":
-                            continue
-                        ids.add(parts[2])
-                except Exception:
-                    continue
-            pack_data[pack_name] = ids
-            log(f"Loaded {len(pack_data[pack_name])} items for {pack_name}", pbar)
-        except Exception as e:
-            log(f"Error loading {path}: {e}", pbar)
-            return
-
-    log("Scanning images...", pbar)
-    update_pbar(5, pbar)
-
-    image_files = glob.glob(os.path.join(folder_path, "*.png"))
-
-    # Create result array with pack name as key
-    result = {pack_name: {} for pack_name in EXCEL_FILES.keys()}
+    return build_pack_index(excel_files, pbar)
 
-    # Initialize type lists
-    types = [
-        "grass",
-        "fire",
-        "water",
-        "lightning",
-        "psychic",
-        "fighting",
-        "darkness",
-        "metal",
-        "colorless",
-        "dragon",
-    ]
-    for p in result:
-        for t in types:
-            result[p][t] = set()
-
-    # Create reversed map for faster lookup in O(1)
-    card_to_packs = {}
-    for pack_name, ids in pack_data.items():
-        for card_id in ids:
-            if card_id not in card_to_packs:
-                card_to_packs[card_id] = []
-            card_to_packs[card_id].append(pack_name)
-
-    count = 0
 
-    # Prepare tasks
+def prepare_tasks(image_files, pack_index):
+    """
+    Match every image to the packs that contain its card ID.
+    Args:
+        image_files (list): List of image paths.
+        pack_index (PackIndex): The pack membership index.
+    Returns:
+        tuple: (task_paths, task_metadata), metadata is (matched_packs, card_id).
+    """
     task_paths = []
     task_metadata = []
     for img_path in image_files:
@@ -143,30 +112,37 @@ def generate_json(folder_path, excel_paths, pbar=None):
         try:
             parts = filename.split("_")
             card_id = parts[2]
-            matched_packs = card_to_packs.get(card_id)
-            if matched_packs:
-                task_paths.append(img_path)
-                task_metadata.append((matched_packs, card_id))
-            else:
-                task_paths.append(img_path)
-                task_metadata.append(([], card_id))
+            # Lookup in O(1) from the index
+            task_paths.append(img_path)
+            task_metadata.append((pack_index.get_packs_by_id(card_id), card_id))
         except IndexError:
             continue
 
-    total_images = len(task_paths)
-    log(f"Found {total_images} valid cards to process.", pbar)
-
-    process_func = partial(get_image_type, icons=icons)
+    return task_paths, task_metadata
 
-    # Using half of the cpu processes
-    half_processes = os.cpu_count() // 2
 
-    log("Start processing cards...", pbar)
-    # Process images in parallel
-    with Pool(processes=half_processes) as pool:
-        results_list = list(pool.imap(process_func, task_paths))
+def aggregate_card_types(
+    excel_files, task_paths, task_metadata, results_list, pbar=None, pack_index=None
+):
+    """
+    Aggregate the card types of every image into the packs.
+    Args:
+        excel_files (dict): Pack name to Excel file path.
+        task_paths (list): List of image paths.
+        task_metadata (list): List of (matched_packs, card_id).
+        results_list (list): Card type of every image, "unknown" if not a Pokemon.
+        pbar (QProgressBar): Progress bar.
+        pack_index (PackIndex): The pack membership index of excel_files.
+    Returns:
+        tuple: (final_result, non_pokemon_booster_pack)
+    """
+    # Create result array with pack name as key
+    result = {pack_name: {} for pack_name in excel_files.keys()}
 
-    update_pbar(15, pbar)
+    # Initialize type lists
+    for p in result:
+        for t in CARD_TYPES:
+            result[p][t] = set()
 
     # Aggregate results
     count = 0
@@ -182,7 +158,7 @@ def generate_json(folder_path, excel_paths, pbar=None):
         if card_type == "unknown":
             # Check the booster pack
             card_name, booster_pack = check_duplicate_specific_card(
-                image_path, EXCEL_FILES
+                image_path, excel_files, pack_index=pack_index
             )
             if not booster_pack:
                 if card_name in promo_a_names:
@@ -213,6 +189,131 @@ def generate_json(folder_path, excel_paths, pbar=None):
     return final_result, non_pokemon_booster_pack
 
 
+def merge_changed_cards(previous, result, non_pokemon, changes, pack_index):
+    """
+    Merge the JSON of the changed cards into the JSON of a previous run.
+    Args:
+        previous (tuple): (final_result, non_pokemon_booster_pack) of the
+            previous run.
+        result (dict): final_result of the added cards.
+        non_pokemon (dict): non_pokemon_booster_pack of the added cards.
+        changes (dict): The change manifest, with added and removed names.
+        pack_index (PackIndex): The pack membership index of the current lists.
+    Returns:
+        tuple: (final_result, non_pokemon_booster_pack)
+    """
+    previous_result, previous_non_pokemon = previous
+
+    final_result = {}
+    for p in result:
+        final_result[p] = {}
+        for t in CARD_TYPES:
+            card_ids = set(previous_result.get(p, {}).get(t, []))
+            card_ids.update(result[p].get(t, []))
+            # Drop the removed cards, no longer in the pack
+            card_ids &= pack_index.pack_ids.get(p, set())
+            if card_ids:
+                final_result[p][t] = sorted(card_ids)
+
+    # cPK_10_000110_00_NAZONOKUSA_C -> NAZONOKUSA
+    removed_names = {
+        name.split("_")[4] for name in changes["removed"] if len(name.split("_")) > 4
+    }
+    non_pokemon_booster_pack = {
+        name: value
+        for name, value in previous_non_pokemon.items()
+        if name not in removed_names
+    }
+    non_pokemon_booster_pack.update(non_pokemon)
+
+    return final_result, non_pokemon_booster_pack
+
+
+def generate_json(
+    folder_path,
+    excel_paths,
+    pbar=None,
+    use_cache=True,
+    changes=None,
+    previous=None,
+    scale_search=False,
+    color_histogram=False,
+    early_exit=False,
+):
+    """
+    Generate card JSON.
+    Args:
+        folder_path (str): Path to folder.
+        excel_paths (list): List of Excel file paths.
+        pbar (QProgressBar): Progress bar.
+        use_cache (bool): Reuse the cached results of unchanged images.
+        changes (dict, optional): Change manifest from an incremental crawl.
+        previous (tuple, optional): (final_result, non_pokemon_booster_pack)
+            of a previous run. With changes, only the images of the added
+            cards are processed and merged into it.
+        scale_search (bool): Use the faster coarse-to-fine icon scale search.
+        color_histogram (bool): Classify card types by color histogram first.
+        early_exit (bool): Classify card types with the early exit search.
+    """
+
+    # Load Excel files, and use files name as pack name
+    EXCEL_FILES = get_excel_files(excel_paths)
+
+    log("Loading icons...", pbar)
+    icon_bank = build_icon_bank()
+    log(f"Loaded {len(icon_bank)} icons.", pbar)
+
+    pack_index = load_pack_data(EXCEL_FILES, pbar)
+    if pack_index is None:
+        return
+
+    log("Scanning images...", pbar)
+    update_pbar(5, pbar)
+
+    image_files = glob.glob(os.path.join(folder_path, "*.png"))
+
+    incremental = changes is not None and previous is not None
+    if incremental:
+        added_names = set(changes["added"])
+        image_files = [
+            img_path
+            for img_path in image_files
+            if is_changed_image(img_path, added_names)
+        ]
+        log(f"Only processing the {len(image_files)} changed images.", pbar)
+
+    # Prepare tasks
+    task_paths, task_metadata = prepare_tasks(image_files, pack_index)
+
+    total_images = len(task_paths)
+    log(f"Found {total_images} valid cards to process.", pbar)
+
+    log("Start processing cards...", pbar)
+    # Process images in parallel, unchanged images come from the cache
+    analyses = analyze_cards(
+        task_paths,
+        icon_bank,
+        full=False,
+        use_cache=use_cache,
+        pbar=pbar,
+        progress=15,
+        scale_search=scale_search,
+        color_histogram=color_histogram,
+        early_exit=early_exit,
+    )
+    results_list = [get_card_type(analysis) for analysis in analyses]
+
+    result, non_pokemon_booster_pack = aggregate_card_types(
+        EXCEL_FILES, task_paths, task_metadata, results_list, pbar, pack_index
+    )
+
+    if incremental:
+        return merge_changed_cards(
+            previous, result, non_pokemon_booster_pack, changes, pack_index
+        )
+    return result, non_pokemon_booster_pack
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate card JSON from images.")
     parser.add_argument("--image-folder", help="Path to image folder", required=True)
@@ -220,15 +321,61 @@ def main():
         "--excel-files", nargs="+", help="Path to Excel files", required=True
     )
     parser.add_argument("--output-name", help="Output JSON file", required=True)
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Analyze every image again instead of using the cache",
+    )
+    parser.add_argument(
+        "--changes",
+        nargs="+",
+        help="Change manifest(s) of an incremental crawl, only process changed cards",
+    )
+    parser.add_argument(
+        "--scale-search",
+        action="store_true",
+        help="Faster coarse-to-fine icon scale search instead of trying every scale",
+    )
+    parser.add_argument(
+        "--color-histogram",
+        action="store_true",
+        help="Classify card types by color first, matching only unclear ones",
+    )
+    parser.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="Classify card types one by one, stopping at the first sure icon",
+    )
 
     args = parser.parse_args()
 
+    OUTPUT_FILE = f"json/{args.output_name}.json"
+
+    changes = None
+    previous = None
+    if args.changes:
+        changes = load_change_manifests(args.changes)
+        previous_result = safe_load_json(OUTPUT_FILE)
+        previous_non_pokemon = safe_load_json(
+            f"json/{args.output_name}_non_pokemon.json"
+        )
+        if previous_result is None or previous_non_pokemon is None:
+            print("No previous output to update, processing every card.")
+        else:
+            previous = (previous_result, previous_non_pokemon)
+
     final_result, non_pokemon_booster_pack = generate_json(
-        args.image_folder, args.excel_files
+        args.image_folder,
+        args.excel_files,
+        use_cache=args.use_cache,
+        changes=changes,
+        previous=previous,
+        scale_search=args.scale_search,
+        color_histogram=args.color_histogram,
+        early_exit=args.early_exit,
     )
 
-    OUTPUT_FILE = f"json/{args.output_name}.json"
-
     print(f"Writing to {OUTPUT_FILE}...")
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
     safe_dump_json(final_result, OUTPUT_FILE)
@@ -1,71 +1,47 @@
-import cv2
-import numpy as np
 import os
 import json
 import argparse
-from src.services import load_icons, match_icon, find_all_icons, check_top_left_color
+from src.services import build_icon_bank, analyze_card, analyze_cards
 from src.utils import log, update_pbar
-from src.config import WEAKNESS_MAP, CARD_REGIONS
-from multiprocessing import Pool
-from functools import partial
+from src.config import WEAKNESS_MAP, TRAINER_COLORS
 from src.utils import safe_load_json, safe_dump_json
 
 
 def analyze_image(image_path, icons, duplicate_data, key, gold_card):
-    # Use imdecode and fromfile to handle unicode paths on Windows
-    img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-    if img is None:
+    # Decode the image once and analyze every region from the same array
+    analysis = analyze_card(image_path, icons)
+    if analysis is None:
         return None
 
-    height, width = img.shape[:2]
+    return build_special_result(analysis, duplicate_data, key, gold_card)
+
+
+def build_special_result(analysis, duplicate_data, key, gold_card):
+    """
+    Turn the card analysis into the special card fields.
+    Args:
+        analysis (dict): The result of analyze_card.
+        duplicate_data (dict): The duplicate cards, card ID to booster packs.
+        key (str): The card ID.
+        gold_card (bool): Whether the card is a gold card.
+    Returns:
+        dict: The special card fields.
+    """
     results = {}
 
     # 1. Card Type (Top Right)
-    # Top 3-9%, Left 88-95%
-    top_type = int(height * CARD_REGIONS["type"]["top"])
-    bottom_type = int(height * CARD_REGIONS["type"]["bottom"])
-    left_type = int(width * CARD_REGIONS["type"]["left"])
-    right_type = int(width * CARD_REGIONS["type"]["right"])
-    crop_type = img[top_type:bottom_type, left_type:right_type]
-
-    card_type = match_icon(crop_type, icons)
+    card_type = analysis["type"]
 
     # Check if card_type is None, either tool or trainer
-    if card_type is None and check_top_left_color(image_path) == "orange":
-        results["trainer"] = "trainer"
-        return results
-    elif card_type is None and check_top_left_color(image_path) == "purple":
-        results["trainer"] = "pokemon tool"
-        return results
-    elif card_type is None and check_top_left_color(image_path) == "blue":
-        results["trainer"] = "tool"
+    if card_type is None:
+        if analysis["trainer"] in TRAINER_COLORS:
+            results["trainer"] = TRAINER_COLORS[analysis["trainer"]]
         return results
 
     results["type"] = card_type
 
     # 2. Weakness (Bottom Left)
-    # Bottom 86-89%, Left 28-33%
-    top_weak = int(height * CARD_REGIONS["weakness"]["top"])
-    bottom_weak = int(height * CARD_REGIONS["weakness"]["bottom"])
-    left_weak = int(width * CARD_REGIONS["weakness"]["left"])
-    right_weak = int(width * CARD_REGIONS["weakness"]["right"])
-    crop_weak = img[top_weak:bottom_weak, left_weak:right_weak].copy()
-
-    # Remove white background
-    lower_white = np.array([200, 200, 200], dtype=np.uint8)
-    upper_white = np.array([255, 255, 255], dtype=np.uint8)
-    mask = cv2.inRange(crop_weak, lower_white, upper_white)
-    crop_weak[mask > 0] = [0, 0, 0]
-
-    # Weakness icon is smaller, around 0.15 scale
-    weakness_scales = np.linspace(0.12, 0.18, 5)
-    weakness_type = match_icon(
-        crop_weak,
-        icons,
-        threshold=0.3,
-        scales=weakness_scales,
-        method=cv2.TM_CCOEFF_NORMED,
-    )
+    weakness_type = analysis["weakness"]
 
     if card_type == "dragon":
         results["weakness"] = "none"
@@ -73,16 +49,8 @@ def analyze_image(image_path, icons, duplicate_data, key, gold_card):
         results["weakness"] = weakness_type
 
     # 3. Fight Energy / Attack Cost (Middle Left)
-    # Bottom 55-80%, Left 5-30%
-    top_atk = int(height * CARD_REGIONS["attack"]["top"])
-    bottom_atk = int(height * CARD_REGIONS["attack"]["bottom"])
-    left_atk = int(width * CARD_REGIONS["attack"]["left"])
-    right_atk = int(width * CARD_REGIONS["attack"]["right"])
-    crop_atk = img[top_atk:bottom_atk, left_atk:right_atk]
-
-    # Find ALL icons (e.g. fighting, colorless)
     # But only return if Fight Energy doesn't match card type
-    fight_energy = find_all_icons(crop_atk, icons)
+    fight_energy = analysis["attackCost"]
     if results["type"] in fight_energy:
         results["fightEnergy"] = []
     elif "all" in fight_energy:
@@ -104,6 +72,22 @@ def analyze_image(image_path, icons, duplicate_data, key, gold_card):
 
 
 def process_single_card(image_path, duplicate_data, icons, pbar=None):
+    # Analyze image
+    return build_special_card(
+        image_path, analyze_card(image_path, icons), duplicate_data
+    )
+
+
+def build_special_card(image_path, card_analysis, duplicate_data):
+    """
+    Build the special card entry of an image from its card analysis.
+    Args:
+        image_path (str): Path to the image file.
+        card_analysis (dict): The result of analyze_card, None if unreadable.
+        duplicate_data (dict): The duplicate cards, card ID to booster packs.
+    Returns:
+        tuple: (key, final_result), key is the card name for non-Pokemon cards.
+    """
     # Extract ID from filename
     filename = os.path.basename(image_path)
     key = None
@@ -119,8 +103,11 @@ def process_single_card(image_path, duplicate_data, icons, pbar=None):
     except:
         pass
 
-    # Analyze image
-    analysis = analyze_image(image_path, icons, duplicate_data, key, gold_card)
+    # Unreadable images give an empty entry, which is skipped on aggregation
+    if card_analysis is None:
+        analysis = {}
+    else:
+        analysis = build_special_result(card_analysis, duplicate_data, key, gold_card)
 
     if analysis and (
         analysis.get("trainer") == "trainer"
@@ -165,14 +152,19 @@ def process_single_card(image_path, duplicate_data, icons, pbar=None):
     return key, final_result
 
 
-def generate_special_card_data(image_folder, duplicate_list="", pbar=None):
-    results = {}
-    non_pokemon = {}
-
+def generate_special_card_data(
+    image_folder,
+    duplicate_list="",
+    pbar=None,
+    use_cache=True,
+    scale_search=False,
+    color_histogram=False,
+    early_exit=False,
+):
     # Check if path exists
     if not os.path.exists(image_folder):
         log(f"Error: Folder {image_folder} does not exist.", pbar)
-        return results
+        return {}
 
     if duplicate_list:
         duplicate_data = safe_load_json(duplicate_list)
@@ -181,7 +173,7 @@ def generate_special_card_data(image_folder, duplicate_list="", pbar=None):
 
     # Load icons
     log("Loading icons...", pbar)
-    icons = load_icons()
+    icon_bank = build_icon_bank()
 
     update_pbar(5, pbar)
 
@@ -195,25 +187,40 @@ def generate_special_card_data(image_folder, duplicate_list="", pbar=None):
             image_path = os.path.join(image_folder, filename)
             task_paths.append(image_path)
 
-    # Using half of the cpu processes
-    half_processes = os.cpu_count() // 2
-
     log("Start special processing cards...", pbar)
-    process_fun = partial(
-        process_single_card,
-        duplicate_data=duplicate_data,
-        icons=icons,
+    # Process images in parallel, unchanged images come from the cache
+    analyses = analyze_cards(
+        task_paths,
+        icon_bank,
+        full=True,
+        use_cache=use_cache,
+        pbar=pbar,
+        progress=30,
+        scale_search=scale_search,
+        color_histogram=color_histogram,
+        early_exit=early_exit,
     )
-
-    with Pool(processes=half_processes) as pool:
-        results_list = []
-        for result in pool.imap(process_fun, task_paths):
-            results_list.append(result)
-            update_pbar(30 / total_images, pbar)
+    results_list = [
+        build_special_card(image_path, analysis, duplicate_data)
+        for image_path, analysis in zip(task_paths, analyses)
+    ]
     log("Processing cards completed.", pbar)
 
     log("Aggregating results...", pbar)
-    # Aggregate results
+    return aggregate_special_results(results_list)
+
+
+def aggregate_special_results(results_list):
+    """
+    Aggregate the special card entries, non-Pokemon cards first.
+    Args:
+        results_list (list): List of (key, data) from build_special_card.
+    Returns:
+        dict: The special card data.
+    """
+    results = {}
+    non_pokemon = {}
+
     for key, data in results_list:
         if key and data:
             if (
@@ -240,10 +247,38 @@ def main():
     )
     parser.add_argument("--duplicate-list", help="Path to duplicate list json file:")
     parser.add_argument("--output", required=True, help="Output JSON file")
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Analyze every image again instead of using the cache",
+    )
+    parser.add_argument(
+        "--scale-search",
+        action="store_true",
+        help="Faster coarse-to-fine icon scale search instead of trying every scale",
+    )
+    parser.add_argument(
+        "--color-histogram",
+        action="store_true",
+        help="Classify card types by color first, matching only unclear ones",
+    )
+    parser.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="Classify card types one by one, stopping at the first sure icon",
+    )
 
     args = parser.parse_args()
 
-    final_results = generate_special_card_data(args.image_folder, args.duplicate_list)
+    final_results = generate_special_card_data(
+        args.image_folder,
+        args.duplicate_list,
+        use_cache=args.use_cache,
+        scale_search=args.scale_search,
+        color_histogram=args.color_histogram,
+        early_exit=args.early_exit,
+    )
 
     if final_results:
         OUTPUT_FILE = f"json/{args.output}.json"
@@ -1,155 +1,778 @@
 import asyncio
+import time
+import httpx
 from playwright.async_api import async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import pandas as pd
 import os
 import argparse
+from urllib.parse import urlparse
 from src.utils import log, update_pbar
+from src.services import (
+    save_image_names,
+    read_image_names,
+    diff_image_names,
+    save_change_manifest,
+)
+from src.config import PACK_KEYS, MATCH_EXP_AND_PACK, CRAWLER_CONCURRENCY
+
+CARD_CELL_SELECTOR = "div.card-grid__cell"
+# Maximum wait for the first cards after navigating, in milliseconds
+FIRST_CARD_TIMEOUT = 15000
+# Wait for new cards after a scroll, doubled while nothing loads, in milliseconds
+SCROLL_TIMEOUTS = (1000, 8000)
+# Maximum scrolls that load new cards, the waits while nothing loads not counted
+MAX_SCROLLS = 50
+# Requests aborted in lightweight mode, only the src attributes are needed
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+FIRST_PARTY_HOST = "pokemon-zone.com"
+# JSON endpoint feeding the card grid, e.g.
+# https://www.pokemon-zone.com/api/cards/?{query}&page={page}
+# {query} is expansions={set} or pack_keys={pack_key}. None uses the browser only
+CARD_API_URL = None
+MAX_API_PAGES = 100
+API_TIMEOUT = 15
+
+
+def get_crawl_url(exorp, set, pack_key=None):
+    """
+    Get the Pokemon-Zone URL of an expansion or a pack key.
+    Args:
+        exorp (str): Expansion (e) or pack key (p).
+        set (str): Set code to crawl (A1, A2, etc.).
+        pack_key (str): Pack key to crawl (AN001_0020_00_000, etc.).
+    Returns:
+        str: The URL.
+    """
+    if exorp == "e":
+        return f"https://www.pokemon-zone.com/cards/?expansions={set}"
+    elif exorp == "p":
+        return f"https://www.pokemon-zone.com/cards/?pack_keys={pack_key}"
 
 
-async def crawler(exorp, set, pack_key=None, pack_name=None, pbar=None):
+def get_output_file(exorp, set, pack_name=None):
     """
-    Crawl Pokemon cards names from Pokemon-Zone.
+    Get the Excel file name of an expansion or a pack key.
     Args:
         exorp (str): Expansion (e) or pack key (p).
         set (str): Set code to crawl (A1, A2, etc.).
-        pack_key (str): Pack key to crawl (AN001_0020_00_000, etc.).
         pack_name (str): Pack name to crawl (Charizard, etc.).
-        pbar (tqdm, optional): Progress bar object.
+    Returns:
+        str: The file name, e.g. A1.xlsx or A1_Charizard.xlsx.
     """
+    if exorp == "e":
+        return f"{set}.xlsx"
+    elif exorp == "p":
+        return f"{set}_{pack_name}.xlsx"
+    return ""
 
-    async with async_playwright() as p:
-        log("Launching browser...", pbar)
-        update_pbar(5, pbar)
-        browser = await p.chromium.launch(
-            channel="msedge",
-            headless=True,
-            # Disable automation detection
-            args=["--disable-blink-features=AutomationControlled"],
-        )
 
-        # Add user agent and viewport
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-        )
+def get_set_targets(set, expansion=True, packs=True):
+    """
+    Get the crawl targets of a set, the expansion and every pack key of it.
+    Args:
+        set (str): Set code to crawl (A1, A2, etc.).
+        expansion (bool): Include the expansion itself.
+        packs (bool): Include the pack keys in MATCH_EXP_AND_PACK.
+    Returns:
+        list: Targets as dicts with exorp, set, pack_key and pack_name.
+    """
+    targets = []
+    if expansion:
+        targets.append({"exorp": "e", "set": set})
+
+    if packs:
+        pack_keys = MATCH_EXP_AND_PACK.get(set, [])
+        if isinstance(pack_keys, str):
+            pack_keys = [pack_keys]
+
+        pack_names = {item["code"]: item["name"] for item in PACK_KEYS}
+        for pack_key in pack_keys:
+            targets.append(
+                {
+                    "exorp": "p",
+                    "set": set,
+                    "pack_key": pack_key,
+                    "pack_name": pack_names.get(pack_key, pack_key),
+                }
+            )
+
+    return targets
 
+
+def get_api_url(api_url, target, page):
+    """
+    Get the card data endpoint URL of a target.
+    Args:
+        api_url (str): Endpoint template with {query} and {page}.
+        target (dict): exorp, set, and pack_key for pack keys.
+        page (int): The page number, from 1.
+    Returns:
+        str: The URL.
+    """
+    if target["exorp"] == "e":
+        query = f"expansions={target['set']}"
+    else:
+        query = f"pack_keys={target['pack_key']}"
+    return api_url.format(query=query, page=page)
+
+
+def collect_card_sources(data):
+    """
+    Collect the card image URLs anywhere in a JSON response.
+    Args:
+        data (dict | list): The decoded JSON.
+    Returns:
+        list: The card image URLs, in document order.
+    """
+    sources = []
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, str) and "/CardPreviews/" in item:
+            sources.append(item)
+    return sources
+
+
+async def fetch_api_cards(client, api_url, target, pbar=None, prefix=""):
+    """
+    Page through the card data endpoint of a target.
+    Args:
+        client (httpx.AsyncClient): The HTTP client.
+        api_url (str): Endpoint template with {query} and {page}.
+        target (dict): exorp, set, and pack_key for pack keys.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+    Returns:
+        pd.DataFrame: The cards, see parse_card_sources.
+    Raises:
+        httpx.HTTPError: If a request fails.
+        ValueError: If the cards run past MAX_API_PAGES pages.
+    """
+    sources = []
+    seen = set()
+    for page in range(1, MAX_API_PAGES + 1):
+        response = await client.get(get_api_url(api_url, target, page))
+
+        # Paginators often answer 404 past the last page
+        if response.status_code == 404 and page > 1:
+            break
+        response.raise_for_status()
+
+        # Stop at the first page without new cards
+        new_sources = [
+            src for src in collect_card_sources(response.json()) if src not in seen
+        ]
+        if not new_sources:
+            break
+
+        seen.update(new_sources)
+        sources.extend(new_sources)
+    else:
+        # A cut short list would drop cards, let the browser crawl it instead
+        raise ValueError(f"More than {MAX_API_PAGES} pages of cards.")
+
+    cards = [{"src": src, "alt": None, "text": ""} for src in sources]
+    return parse_card_sources(cards, pbar, prefix)
+
+
+async def launch_browser(p, pbar=None):
+    """
+    Launch the headless browser used for crawling.
+    Args:
+        p (Playwright): The Playwright instance.
+        pbar (tqdm, optional): Progress bar object.
+    Returns:
+        Browser: The browser.
+    """
+    log("Launching browser...", pbar)
+    return await p.chromium.launch(
+        channel="msedge",
+        headless=True,
         # Disable automation detection
-        await context.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+        args=["--disable-blink-features=AutomationControlled"],
+    )
+
+
+def is_blocked_request(request, trim_scripts=False):
+    """
+    Check if a request is skipped in lightweight mode.
+    Args:
+        request (Request): The request.
+        trim_scripts (bool): Also skip the scripts of other hosts.
+    Returns:
+        bool: True if the request should be aborted.
+    """
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+
+    if trim_scripts and request.resource_type == "script":
+        host = urlparse(request.url).hostname or ""
+        return not (host == FIRST_PARTY_HOST or host.endswith(f".{FIRST_PARTY_HOST}"))
+
+    return False
+
+
+async def block_resources(context, trim_scripts=False):
+    """
+    Abort image, font and media downloads of every page in the context.
+    Args:
+        context (BrowserContext): The browser context.
+        trim_scripts (bool): Also abort the scripts of other hosts.
+    """
+
+    async def handle(route):
+        if is_blocked_request(route.request, trim_scripts):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+
+
+async def new_crawl_page(browser, lightweight=False, trim_scripts=False):
+    """
+    Open a page in its own browser context.
+    Args:
+        browser (Browser): The browser.
+        lightweight (bool): Abort image, font and media downloads.
+        trim_scripts (bool): In lightweight mode, also abort third-party scripts.
+    Returns:
+        tuple: (context, page)
+    """
+    # Add user agent and viewport
+    context = await browser.new_context(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        viewport={"width": 1920, "height": 1080},
+    )
+
+    # Disable automation detection
+    await context.add_init_script(
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    )
+
+    if lightweight:
+        await block_resources(context, trim_scripts)
+
+    page = await context.new_page()
+    return context, page
+
+
+async def wait_for_more_cards(page, count, timeout):
+    """
+    Wait until the grid has more than `count` cards.
+    Args:
+        page (Page): The page.
+        count (int): The current card count.
+        timeout (float): Maximum wait in milliseconds.
+    Returns:
+        bool: True if more cards were loaded in time.
+    """
+    try:
+        await page.wait_for_function(
+            f"n => document.querySelectorAll('{CARD_CELL_SELECTOR}').length > n",
+            arg=count,
+            timeout=timeout,
         )
-        page = await context.new_page()
+        return True
+    except PlaywrightTimeoutError:
+        return False
 
-        # Check if we are crawling an expansion or a pack
-        if exorp == "e":
-            url = f"https://www.pokemon-zone.com/cards/?expansions={set}"
-        elif exorp == "p":
-            url = f"https://www.pokemon-zone.com/cards/?pack_keys={pack_key}"
 
-        log(f"Navigating to {url}...", pbar)
-        update_pbar(5, pbar)
-        await page.goto(url, wait_until="domcontentloaded")
+def is_card_data_response(response):
+    """
+    Check if a response may bring more cards, a first-party JSON response to
+    an XHR or fetch like the card data endpoint watch_card_endpoints finds.
+    Args:
+        response (Response): The response.
+    Returns:
+        bool: True if the response may feed the card grid.
+    """
+    if response.request.resource_type not in ("xhr", "fetch"):
+        return False
 
-        log("Waiting for page to load...", pbar)
-        update_pbar(5, pbar)
-        await page.wait_for_timeout(5000)
+    if "json" not in response.headers.get("content-type", ""):
+        return False
 
-        # Check if we have any cards initially
-        count = await page.locator("div.card-grid__cell").count()
-        log(f"Initial card count: {count}", pbar)
+    host = urlparse(response.url).hostname or ""
+    return host == FIRST_PARTY_HOST or host.endswith(f".{FIRST_PARTY_HOST}")
 
-        if count == 0:
-            log(
-                "No cards found initially.",
-                pbar,
-            )
 
-        # Handle infinite scroll
-        last_height = await page.evaluate("document.body.scrollHeight")
-        scroll_attempts = 0
-        max_scroll_attempts = 50
-
-        # Scroll until we reach the bottom
-        while scroll_attempts < max_scroll_attempts:
-            msg = f"Scrolling... (Attempt {scroll_attempts + 1})"
-            log(msg, pbar)
-
-            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(3000)  # Wait for load
-
-            new_height = await page.evaluate("document.body.scrollHeight")
-            if new_height == last_height:
-                log("No height change, waiting longer...", pbar)
-                await page.wait_for_timeout(5000)
-                new_height = await page.evaluate("document.body.scrollHeight")
-                if new_height == last_height:
-                    log("Reached bottom of page.", pbar)
+async def wait_for_data_response(page, timeout):
+    """
+    Wait for the next card data response of the page, other traffic such as
+    analytics is ignored.
+    Args:
+        page (Page): The page.
+        timeout (float): Maximum wait in milliseconds.
+    Returns:
+        bool: True if a response arrived in time.
+    """
+    try:
+        await page.wait_for_response(is_card_data_response, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def scroll_card_grid(page, pbar=None, prefix=""):
+    """
+    Scroll the card grid until every card is loaded. Instead of fixed sleeps,
+    wait for new grid cells with a timeout that backs off while nothing
+    loads, and stop once the card count stops growing.
+    Args:
+        page (Page): The page.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+    Returns:
+        dict: Number of scrolls, time spent and time the fixed sleeps took.
+    """
+    start_time = time.perf_counter()
+
+    log(f"{prefix}Waiting for page to load...", pbar)
+    try:
+        await page.wait_for_selector(CARD_CELL_SELECTOR, timeout=FIRST_CARD_TIMEOUT)
+    except PlaywrightTimeoutError:
+        pass
+
+    # Check if we have any cards initially
+    count = await page.locator(CARD_CELL_SELECTOR).count()
+    log(f"{prefix}Initial card count: {count}", pbar)
+
+    if count == 0:
+        log(f"{prefix}No cards found initially.", pbar)
+
+    # Handle infinite scroll
+    scroll_attempts = 0
+    growing_scrolls = 0
+    timeout = SCROLL_TIMEOUTS[0]
+
+    # Scroll until the card count stops growing, the backoff ends the waits
+    # while nothing loads so only the scrolls loading cards count
+    while growing_scrolls < MAX_SCROLLS:
+        msg = f"{prefix}Scrolling... (Attempt {scroll_attempts + 1})"
+        log(msg, pbar)
+
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        scroll_attempts += 1
+
+        if await wait_for_more_cards(page, count, timeout):
+            # Cards are loading, keep the short timeout
+            timeout = SCROLL_TIMEOUTS[0]
+        else:
+            # A data request still in flight may bring more cards, wait for
+            # its response and the cells it adds before deciding
+            if await wait_for_data_response(page, timeout):
+                await wait_for_more_cards(page, count, timeout)
+
+            new_count = await page.locator(CARD_CELL_SELECTOR).count()
+            if new_count == count:
+                if timeout >= SCROLL_TIMEOUTS[-1]:
+                    log(f"{prefix}Reached bottom of page.", pbar)
                     break
+                log(f"{prefix}No new cards, waiting longer...", pbar)
+                timeout = min(timeout * 2, SCROLL_TIMEOUTS[-1])
+                continue
+
+            # Cards arrived late, back to the short timeout
+            timeout = SCROLL_TIMEOUTS[0]
+
+        growing_scrolls += 1
+
+        # Print count to see progress
+        count = await page.locator(CARD_CELL_SELECTOR).count()
+        log(f"{prefix}Current card count: {count}", pbar)
+    else:
+        log(
+            f"{prefix}Stopped after {MAX_SCROLLS} scrolls loading cards, "
+            f"the list may be incomplete ({count} cards).",
+            pbar,
+        )
 
-            last_height = new_height
-            scroll_attempts += 1
+    elapsed = time.perf_counter() - start_time
+    # The fixed sleeps waited 5s after loading, 3s per scroll, including the
+    # last one finding no new cards, and 5s more at the bottom
+    baseline = (5000 + 3000 * (growing_scrolls + 1) + 5000) / 1000
+    log(
+        f"{prefix}Scrolling took {elapsed:.1f}s, "
+        f"{baseline - elapsed:.1f}s less than the fixed sleeps ({baseline:.1f}s).",
+        pbar,
+    )
 
-            # Print count to see progress
-            current_count = await page.locator("div.card-grid__cell").count()
+    return {"scrolls": scroll_attempts, "elapsed": elapsed, "baseline": baseline}
 
-            log(f"Current card count: {current_count}", pbar)
 
-        update_pbar(20, pbar)
+# Read every card image and its grid cell in one browser round-trip
+EXTRACT_CARDS_SCRIPT = """
+images => images.map(img => {
+    const cell = img.closest("div.card-grid__cell");
+    return {
+        src: img.getAttribute("src"),
+        alt: img.getAttribute("alt"),
+        text: cell ? cell.innerText.trim() : "",
+    };
+})
+"""
 
-        log("Finished scrolling. Extracting images...", pbar)
 
-        # Extract images
-        images = await page.locator(
-            "div.card-grid__cell img.game-card-image__img"
-        ).all()
+def parse_card_sources(cards, pbar=None, prefix=""):
+    """
+    Parse the image names out of the card image URLs.
+    Args:
+        cards (list): Dicts with the src, alt and text of each card image.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+    Returns:
+        pd.DataFrame: Image Name, Card ID, Rarity, Alt Text and Cell Text
+            of every card with a src.
+    """
+    df = pd.DataFrame(cards, columns=["src", "alt", "text"])
+    df = df[df["src"].notna() & (df["src"] != "")].reset_index(drop=True)
+
+    # Example: https://assets.pokemon-zone.com/game-assets/CardPreviews/cPK_10_010830_00_KAILIOS_C.webp?width=350&quality=100
+    # Fetch only the filename, in part five, without query and .webp suffix
+    names = df["src"].str.split("/").str[5].str.split("?").str[0]
+    names = names.str.removesuffix(".webp")
+
+    # Keep the URL as name when it has another format
+    unparsed = names.isna()
+    for src in df.loc[unparsed, "src"]:
+        log(f"{prefix}Warning: Could not parse URL format: {src}", pbar)
+    names = names.where(~unparsed, df["src"])
+
+    # cPK_10_010830_00_KAILIOS_C -> 010830, C
+    parts = names.where(~unparsed).str.split("_")
+    return pd.DataFrame(
+        {
+            "Image Name": names,
+            "Card ID": parts.str[2],
+            "Rarity": parts.str[-1],
+            "Alt Text": df["alt"],
+            "Cell Text": df["text"],
+        }
+    )
 
-        total_images = len(images)
 
-        image_data = []
-        for i, img in enumerate(images):
-            src = await img.get_attribute("src")
-            if src:
-                try:
-                    # Example: https://assets.pokemon-zone.com/game-assets/CardPreviews/cPK_10_010830_00_KAILIOS_C.webp?width=350&quality=100
-                    # Fetch only the filename, in part five
-                    part_five = src.split("/")[5]
-                    clean_name = part_five.split("?")[0]
+async def extract_cards(page, pbar=None, prefix="", progress=60):
+    """
+    Extract the loaded cards in a single evaluation on the page.
+    Args:
+        page (Page): The page.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+        progress (float): Progress bar share of the extraction.
+    Returns:
+        pd.DataFrame: The cards, see parse_card_sources.
+    """
+    cards = await page.eval_on_selector_all(
+        f"{CARD_CELL_SELECTOR} img.game-card-image__img", EXTRACT_CARDS_SCRIPT
+    )
+    df = parse_card_sources(cards, pbar, prefix)
+    update_pbar(progress, pbar)
+    return df
 
-                    # without .webp suffix
-                    if clean_name.endswith(".webp"):
-                        clean_name = clean_name[:-5]
 
-                    image_data.append({"Image Name": clean_name})
-                except IndexError:
-                    log(f"Warning: Could not parse URL format: {src}", pbar)
-                    image_data.append({"Image Name": src})
+def save_crawled_list(df, output_file, pbar=None, prefix="", incremental=False):
+    """
+    Save the cards to lists/ as Excel file and binary sidecar.
+    Args:
+        df (pd.DataFrame): The cards, with an Image Name column.
+        output_file (str): The Excel file name.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+        incremental (bool): Compare with the existing list, write the added
+            and removed image names to its change manifest, and keep the
+            list and the last manifest untouched when nothing changed.
+    Returns:
+        str: Path to the Excel file.
+    """
+    # Create a directory for the output file
+    os.makedirs("lists", exist_ok=True)
+    output_path = os.path.join("lists", output_file)
+
+    if incremental and os.path.exists(output_path):
+        changes = diff_image_names(
+            read_image_names(output_path), df["Image Name"].tolist()
+        )
+        # Keep the manifest of an earlier crawl, it may not be processed yet
+        if not changes["added"] and not changes["removed"]:
+            log(f"{prefix}No changes, the list is left untouched.", pbar)
+            return output_path
+
+        manifest_path = save_change_manifest(output_path, changes)
+        log(
+            f"{prefix}{len(changes['added'])} added, {len(changes['removed'])} "
+            f"removed, saved to {os.path.abspath(manifest_path)}",
+            pbar,
+        )
+
+    df.to_excel(output_path, index=False)
+    # Binary sidecar, read instead of the Excel file by the other scripts
+    save_image_names(df["Image Name"].tolist(), output_path)
+    log(f"{prefix}Successfully saved to {os.path.abspath(output_path)}", pbar)
+    return output_path
+
+
+def watch_card_endpoints(page, pbar=None, prefix=""):
+    """
+    Log the JSON responses of the page that contain card image URLs, to find
+    the endpoint to use as CARD_API_URL.
+    Args:
+        page (Page): The page.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+    """
+    found = set()
+
+    async def handle(response):
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        try:
+            data = await response.json()
+        except Exception:
+            return
+
+        url = response.url.split("?")[0]
+        if url not in found and collect_card_sources(data):
+            found.add(url)
+            log(f"{prefix}Card data endpoint found: {response.url}", pbar)
+
+    page.on("response", handle)
+
+
+async def crawl_target(
+    browser,
+    target,
+    pbar=None,
+    prefix="",
+    share=1.0,
+    lightweight=False,
+    trim_scripts=False,
+):
+    """
+    Crawl one expansion or pack key in a new page of the browser.
+    Args:
+        browser (Browser): The browser.
+        target (dict): exorp, set, and pack_key and pack_name for pack keys.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+        share (float): Share of the progress bar used by this target.
+        lightweight (bool): Abort image, font and media downloads.
+        trim_scripts (bool): In lightweight mode, also abort third-party scripts.
+    Returns:
+        pd.DataFrame: The cards, see parse_card_sources, None if no image
+            was found.
+    """
+    exorp = target["exorp"]
+    context, page = await new_crawl_page(browser, lightweight, trim_scripts)
+    watch_card_endpoints(page, pbar, prefix)
+
+    try:
+        url = get_crawl_url(exorp, target["set"], target.get("pack_key"))
+        log(f"{prefix}Navigating to {url}...", pbar)
+        update_pbar(5 * share, pbar)
+        await page.goto(url, wait_until="domcontentloaded")
+        update_pbar(5 * share, pbar)
 
-            update_pbar(60 / total_images, pbar)
+        await scroll_card_grid(page, pbar, prefix)
+        update_pbar(20 * share, pbar)
 
-        log(f"Total found: {len(image_data)} images.", pbar)
+        log(f"{prefix}Finished scrolling. Extracting images...", pbar)
+        cards = await extract_cards(page, pbar, prefix, 60 * share)
+        log(f"{prefix}Total found: {len(cards)} images.", pbar)
+    finally:
+        await context.close()
 
-        await browser.close()
+    if cards.empty:
+        log(f"{prefix}No images found.", pbar)
+        return None
 
-        if image_data:
-            df = pd.DataFrame(image_data)
+    return cards
 
-            # Create a filename based on the arguments
-            output_file = ""
-            if exorp == "e":
-                output_file = f"{set}.xlsx"
-            elif exorp == "p":
-                output_file = f"{set}_{pack_name}.xlsx"
 
-            # Create a directory for the output file
-            os.makedirs("lists", exist_ok=True)
-            df.to_excel(os.path.join("lists", output_file), index=False)
-            log(
-                f"Successfully saved to {os.path.abspath(os.path.join('lists', output_file))}",
-                pbar,
+async def crawl_api_target(client, api_url, target, pbar=None, prefix="", share=1.0):
+    """
+    Crawl one expansion or pack key through the card data endpoint.
+    Args:
+        client (httpx.AsyncClient): The HTTP client.
+        api_url (str): Endpoint template with {query} and {page}.
+        target (dict): exorp, set, and pack_key and pack_name for pack keys.
+        pbar (tqdm, optional): Progress bar object.
+        prefix (str): Prefix of the log messages.
+        share (float): Share of the progress bar used by this target.
+    Returns:
+        pd.DataFrame: The cards, see parse_card_sources, None if the endpoint
+            failed or returned no card.
+    """
+    try:
+        cards = await fetch_api_cards(client, api_url, target, pbar, prefix)
+    except (httpx.HTTPError, ValueError) as e:
+        log(f"{prefix}Card data endpoint failed: {e}", pbar)
+        return None
+
+    if cards.empty:
+        log(f"{prefix}Card data endpoint returned no cards.", pbar)
+        return None
+
+    log(f"{prefix}Total found: {len(cards)} images.", pbar)
+    update_pbar(90 * share, pbar)
+    return cards
+
+
+async def crawler(
+    exorp,
+    set,
+    pack_key=None,
+    pack_name=None,
+    pbar=None,
+    lightweight=False,
+    trim_scripts=False,
+    api_url=CARD_API_URL,
+    incremental=False,
+):
+    """
+    Crawl Pokemon cards names from Pokemon-Zone.
+    Args:
+        exorp (str): Expansion (e) or pack key (p).
+        set (str): Set code to crawl (A1, A2, etc.).
+        pack_key (str): Pack key to crawl (AN001_0020_00_000, etc.).
+        pack_name (str): Pack name to crawl (Charizard, etc.).
+        pbar (tqdm, optional): Progress bar object.
+        lightweight (bool): Abort image, font and media downloads.
+        trim_scripts (bool): In lightweight mode, also abort third-party scripts.
+        api_url (str, optional): Card data endpoint template, tried before
+            the browser.
+        incremental (bool): Write the changes to the existing list to a
+            change manifest.
+    Returns:
+        str: Path to the saved Excel file, None if no image was found.
+    """
+    target = {"exorp": exorp, "set": set, "pack_key": pack_key, "pack_name": pack_name}
+    results = await crawl_targets(
+        [target],
+        1,
+        pbar,
+        lightweight=lightweight,
+        trim_scripts=trim_scripts,
+        api_url=api_url,
+        incremental=incremental,
+    )
+    return results[0]
+
+
+async def crawl_targets(
+    targets,
+    concurrency=CRAWLER_CONCURRENCY,
+    pbar=None,
+    lightweight=False,
+    trim_scripts=False,
+    api_url=CARD_API_URL,
+    incremental=False,
+):
+    """
+    Crawl several expansions and pack keys, running up to `concurrency` at the
+    same time. With a card data endpoint, the targets are fetched over HTTP
+    first, and the browser is only launched, once and shared, for the
+    targets the endpoint failed.
+    Args:
+        targets (list): Targets as returned by get_set_targets.
+        concurrency (int): Maximum targets crawled at the same time.
+        pbar (tqdm, optional): Progress bar object.
+        lightweight (bool): Abort image, font and media downloads.
+        trim_scripts (bool): In lightweight mode, also abort third-party scripts.
+        api_url (str, optional): Card data endpoint template with {query}
+            and {page}.
+        incremental (bool): Write the changes to the existing lists to change
+            manifests.
+    Returns:
+        list: Path to the saved Excel file of each target, None if it failed
+            or no image was found.
+    """
+    if not targets:
+        return []
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    share = 1.0 / len(targets)
+    cards = [None] * len(targets)
+
+    def get_prefix(target):
+        # Tell the targets apart in the log when crawling several
+        if len(targets) == 1:
+            return ""
+        name = get_output_file(target["exorp"], target["set"], target.get("pack_name"))
+        return f"[{os.path.splitext(name)[0]}] "
+
+    if api_url:
+        limits = httpx.Limits(max_connections=max(concurrency, 1))
+        async with httpx.AsyncClient(timeout=API_TIMEOUT, limits=limits) as client:
+
+            async def run_api(target):
+                async with semaphore:
+                    return await crawl_api_target(
+                        client, api_url, target, pbar, get_prefix(target), share
+                    )
+
+            cards = await asyncio.gather(*(run_api(target) for target in targets))
+
+    pending = [i for i, target_cards in enumerate(cards) if target_cards is None]
+    if pending and api_url:
+        log("Falling back to the browser...", pbar)
+
+    if pending:
+        cards = list(cards)
+        async with async_playwright() as p:
+            browser = await launch_browser(p, pbar)
+            update_pbar(5, pbar)
+
+            async def run(target):
+                prefix = get_prefix(target)
+                async with semaphore:
+                    try:
+                        return await crawl_target(
+                            browser,
+                            target,
+                            pbar,
+                            prefix,
+                            share,
+                            lightweight,
+                            trim_scripts,
+                        )
+                    except Exception as e:
+                        if len(targets) == 1:
+                            raise
+                        log(f"{prefix}Error crawling: {e}", pbar)
+                        return None
+
+            try:
+                crawled = await asyncio.gather(*(run(targets[i]) for i in pending))
+            finally:
+                await browser.close()
+
+        for i, target_cards in zip(pending, crawled):
+            cards[i] = target_cards
+
+    # Save the lists
+    results = []
+    for target, target_cards in zip(targets, cards):
+        if target_cards is None:
+            results.append(None)
+            continue
+
+        output_file = get_output_file(
+            target["exorp"], target["set"], target.get("pack_name")
+        )
+        results.append(
+            save_crawled_list(
+                target_cards, output_file, pbar, get_prefix(target), incremental
             )
-            update_pbar(10, pbar)
+        )
+        update_pbar(10 * share, pbar)
 
-        else:
-            log("No images found.", pbar)
+    return results
 
 
 if __name__ == "__main__":
@@ -157,7 +780,7 @@ if __name__ == "__main__":
         description="Crawl Pokemon cards from Pokemon-Zone."
     )
 
-    parser.add_argument("--exorp", help="Expansion (e) or pack key (p):", required=True)
+    parser.add_argument("--exorp", help="Expansion (e) or pack key (p):")
     parser.add_argument(
         "--set",
         help="Set code to crawl (A1, A2, etc.):",
@@ -173,7 +796,63 @@ if __name__ == "__main__":
         help="Pack name to crawl (Charizard, etc.):",
         required=False,
     )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Crawl the expansion and all its pack keys with one browser",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CRAWLER_CONCURRENCY,
+        help="Pages crawled at the same time with --all",
+    )
+    parser.add_argument(
+        "--lightweight",
+        action="store_true",
+        help="Skip image, font and media downloads",
+    )
+    parser.add_argument(
+        "--trim-scripts",
+        action="store_true",
+        help="With --lightweight, also skip third-party scripts",
+    )
+    parser.add_argument(
+        "--api-url",
+        default=CARD_API_URL,
+        help="Card data endpoint with {query} and {page}, tried before the browser",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Write the changes to the existing list to a change manifest",
+    )
 
     args = parser.parse_args()
 
-    asyncio.run(crawler(args.exorp, args.set, args.pack_key, args.pack_name))
+    if args.all:
+        asyncio.run(
+            crawl_targets(
+                get_set_targets(args.set),
+                args.concurrency,
+                lightweight=args.lightweight,
+                trim_scripts=args.trim_scripts,
+                api_url=args.api_url,
+                incremental=args.incremental,
+            )
+        )
+    elif args.exorp:
+        asyncio.run(
+            crawler(
+                args.exorp,
+                args.set,
+                args.pack_key,
+                args.pack_name,
+                lightweight=args.lightweight,
+                trim_scripts=args.trim_scripts,
+                api_url=args.api_url,
+                incremental=args.incremental,
+            )
+        )
+    else:
+        parser.error("--exorp is required unless --all is given")
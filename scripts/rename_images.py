@@ -1,28 +1,68 @@
 import os
-import pandas as pd
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from src.utils import log, dry_run_log, update_pbar
+from src.services import read_image_names, load_change_manifests
 
 
-def rename_images(folder_path, excel_path, dry_run=True, pbar=None):
+class NameMatcher:
+    """
+    Find the first name containing a file stem, without scanning every name.
+    Names are indexed by their "_"-delimited tokens. A stem with three or more
+    tokens can only be inside a name that has each of its inner tokens as a
+    whole token, so only that bucket is scanned, in the original order.
     """
-    Renames images in the folder based on names in the Excel file.
 
-    Args:
-        folder_path (str): Path to the folder containing images.
-        excel_path (str): Path to the Excel file.
-        dry_run (bool): If True, only prints what would happen.
-        pbar (object, optional): Progress bar object with write, update.
+    def __init__(self, names):
+        self.names = names
+        self.index = {}
+        for i, name in enumerate(names):
+            for token in set(name.split("_")):
+                self.index.setdefault(token, []).append(i)
+        self.matches = {}
+
+    def match(self, stem):
+        """
+        Args:
+            stem (str): The file name without extension.
+        Returns:
+            str: The first name containing the stem, None if there is none.
+        """
+        if stem in self.matches:
+            return self.matches[stem]
+
+        parts = stem.split("_")
+        if len(parts) < 3:
+            # No token is bounded on both sides, scan every name
+            candidates = range(len(self.names))
+        else:
+            buckets = [self.index.get(token, []) for token in parts[1:-1]]
+            candidates = min(buckets, key=len)
+
+        match = None
+        for i in candidates:
+            if stem in self.names[i]:
+                match = self.names[i]
+                break
+
+        self.matches[stem] = match
+        return match
+
+
+def load_name_matcher(excel_path, pbar=None):
     """
+    Read the new names of the Excel file and build their matcher.
 
-    log(f"Processing folder: {folder_path}", pbar)
-    log(f"Using Excel file: {excel_path}", pbar)
-    log(f"Dry run mode: {'ON' if dry_run else 'OFF'}", pbar)
+    Args:
+        excel_path (str): Path to the Excel file, or its name in ./lists/.
+        pbar (object, optional): Progress bar object with write, update.
 
+    Returns:
+        NameMatcher: The matcher, None if the Excel file could not be read.
+    """
     log(f"Reading Excel file...", pbar)
 
-    # Read the Excel file
     try:
         if os.path.exists(excel_path):
             file_to_read = excel_path
@@ -31,93 +71,99 @@ def rename_images(folder_path, excel_path, dry_run=True, pbar=None):
         else:
             msg = f"Error: Excel file '{excel_path}' not found."
             log(msg, pbar)
-            return
+            return None
 
-        df = pd.read_excel(file_to_read)
-        if "Image Name" not in df.columns:
-            msg = "Error: 'Image Name' column not found in Excel file."
-            log(msg, pbar)
-            return
-
-        # Get list of valid new names, drop NaNs and convert to string just in case
-        new_names = df["Image Name"].dropna().astype(str).tolist()
+        # Get list of valid new names, from the binary sidecar when it is fresh
+        new_names = read_image_names(file_to_read)
 
+    except KeyError:
+        msg = "Error: 'Image Name' column not found in Excel file."
+        log(msg, pbar)
+        return None
     except Exception as e:
         msg = f"Error reading Excel file: {e}"
         log(msg, pbar)
-        return
+        return None
 
-    # Process the folder
-    if isinstance(folder_path, str):
-        folder_path = folder_path.strip().strip('"').strip("'")
+    return NameMatcher(new_names)
 
+
+def plan_folder_renames(folder_path, matcher, only_names=None):
+    """
+    Match every image of a folder against the new names, without renaming.
+
+    Args:
+        folder_path (str): Path to the folder containing images.
+        matcher (NameMatcher): The matcher of the new names.
+        only_names (set, optional): Only keep the files matching these names.
+
+    Returns:
+        list: (file path, new file name or None) for every file in the folder,
+            None if the folder does not exist.
+    """
     folder = Path(folder_path)
     if not folder.exists():
-        msg = f"Error: Folder '{folder_path}' does not exist."
-        log(msg, pbar)
-        return
-
-    count_renamed = 0
+        return None
 
-    # First, collect all files to process to determine total count
-    files_to_process = []
-    for file_path in folder.iterdir():
+    plan = []
+    for file_path in sorted(folder.iterdir()):
         if not file_path.is_file():
             continue
         # Skip hidden files or temporary files
         if file_path.name.startswith("~$") or file_path.name.startswith("."):
             continue
-        files_to_process.append(file_path)
 
-    update_pbar(10, pbar)
+        # Find the first match in new_names
+        match = matcher.match(file_path.stem)
+        if only_names is not None and match not in only_names:
+            continue
 
-    total_files = len(files_to_process)
+        new_filename = None
+        if match:
+            new_filename = f"{match}_{folder.name}{file_path.suffix}"
+        plan.append((file_path, new_filename))
 
-    # Process all files in the folder
-    for i, file_path in enumerate(files_to_process):
-        # Update progress
-        update_pbar(90 / total_files, pbar)
+    return plan
+
+
+def apply_folder_renames(plan, dry_run=True, pbar=None, progress=90):
+    """
+    Rename the images of a folder following its plan.
+
+    Args:
+        plan (list): The plan from plan_folder_renames.
+        dry_run (bool): If True, only prints what would happen.
+        pbar (object, optional): Progress bar object with write, update.
+        progress (float): Progress bar share of the folder.
+    """
+    count_renamed = 0
 
-        # Get the old name without extension
-        old_name_stem = file_path.stem
+    for file_path, new_filename in plan:
+        # Update progress
+        update_pbar(progress / len(plan), pbar)
 
         log(f"Processing: {file_path.name}", pbar)
 
-        # Find a match in new_names
-        match = None
-        for new_name in new_names:
-            if old_name_stem in new_name:
-                match = new_name
-                break
+        # Skip if no match is found or the file is already named correctly
+        if not new_filename or file_path.name == new_filename:
+            continue
 
-        # If a match is found, rename the file
-        if match:
-            # Construct new filename
-            new_filename = f"{match}_{folder.name}{file_path.suffix}"
-            new_file_path = folder / new_filename
-
-            # Skip if the file is already named correctly
-            if file_path.name == new_filename:
-                continue
-
-            if dry_run:
-                dry_run_log(
-                    f"Match found: '{file_path.name}' -> '{new_filename}'", pbar
-                )
-            else:
-                log(f"Match found: '{file_path.name}' -> '{new_filename}'", pbar)
-
-            # Rename the file if not in dry run mode
-            if not dry_run:
-                try:
-                    file_path.rename(new_file_path)
-                    log(f"  Renamed successfully.", pbar)
-                    count_renamed += 1
-                except Exception as e:
-                    log(f"  Error renaming: {e}", pbar)
-            else:
-                log("  (Dry run) Would rename.", pbar)
+        if dry_run:
+            dry_run_log(f"Match found: '{file_path.name}' -> '{new_filename}'", pbar)
+        else:
+            log(f"Match found: '{file_path.name}' -> '{new_filename}'", pbar)
+
+        # Rename the file if not in dry run mode
+        if not dry_run:
+            try:
+                file_path.rename(file_path.parent / new_filename)
+                log(f"  Renamed successfully.", pbar)
                 count_renamed += 1
+            except Exception as e:
+                log(f"  Error renaming: {e}", pbar)
+        else:
+            log("  (Dry run) Would rename.", pbar)
+            count_renamed += 1
 
     msg = f"Total files {'would be ' if dry_run else ''}renamed: {count_renamed}"
     if dry_run:
@@ -126,6 +172,94 @@ def rename_images(folder_path, excel_path, dry_run=True, pbar=None):
         log(msg, pbar)
 
 
+def rename_folders(folder_paths, excel_path, dry_run=True, pbar=None, changes=None):
+    """
+    Renames images in several folders based on names in one Excel file.
+    The Excel file is read once and the folders are matched concurrently,
+    then the renames are applied folder by folder.
+
+    Args:
+        folder_paths (list): Paths to the folders containing images.
+        excel_path (str): Path to the Excel file.
+        dry_run (bool): If True, only prints what would happen.
+        pbar (object, optional): Progress bar object with write, update.
+        changes (dict, optional): Change manifest from an incremental crawl,
+            only the images of the added names are renamed.
+
+    Returns:
+        dict: {folder path: [(old file name, new file name), ...]} of the
+            files to rename, None if the Excel file could not be read.
+    """
+    log(f"Using Excel file: {excel_path}", pbar)
+    log(f"Dry run mode: {'ON' if dry_run else 'OFF'}", pbar)
+
+    matcher = load_name_matcher(excel_path, pbar)
+    if matcher is None:
+        return None
+
+    only_names = None
+    if changes is not None:
+        only_names = set(changes["added"])
+        log(f"Only renaming the {len(only_names)} added cards.", pbar)
+
+    folder_paths = [
+        (
+            folder_path.strip().strip('"').strip("'")
+            if isinstance(folder_path, str)
+            else folder_path
+        )
+        for folder_path in folder_paths
+    ]
+
+    # Match all folders at once, the renames only depend on the file names
+    with ThreadPoolExecutor() as executor:
+        plans = list(
+            executor.map(
+                lambda folder_path: plan_folder_renames(
+                    folder_path, matcher, only_names
+                ),
+                folder_paths,
+            )
+        )
+
+    update_pbar(10, pbar)
+
+    renames = {}
+    for folder_path, plan in zip(folder_paths, plans):
+        log(f"Processing folder: {folder_path}", pbar)
+
+        if plan is None:
+            msg = f"Error: Folder '{folder_path}' does not exist."
+            log(msg, pbar)
+            continue
+
+        apply_folder_renames(plan, dry_run, pbar, progress=90 / len(folder_paths))
+
+        renames[str(folder_path)] = [
+            (file_path.name, new_filename)
+            for file_path, new_filename in plan
+            if new_filename and file_path.name != new_filename
+        ]
+
+    return renames
+
+
+def rename_images(folder_path, excel_path, dry_run=True, pbar=None):
+    """
+    Renames images in the folder based on names in the Excel file.
+
+    Args:
+        folder_path (str): Path to the folder containing images.
+        excel_path (str): Path to the Excel file.
+        dry_run (bool): If True, only prints what would happen.
+        pbar (object, optional): Progress bar object with write, update.
+
+    Returns:
+        dict: See rename_folders.
+    """
+    return rename_folders([folder_path], excel_path, dry_run, pbar)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Rename images based on Excel file.")
     parser.add_argument("--folder", nargs="+", help="Folder(s) containing images")
@@ -139,12 +273,17 @@ def main():
         action="store_false",
         help="Disable dry run mode (execute changes)",
     )
+    parser.add_argument(
+        "--changes",
+        nargs="+",
+        help="Change manifest(s) of an incremental crawl, only rename added cards",
+    )
     parser.set_defaults(dry_run=True)
 
     args = parser.parse_args()
 
-    for folder in args.folder:
-        rename_images(folder, args.excel, args.dry_run)
+    changes = load_change_manifests(args.changes) if args.changes else None
+    rename_folders(args.folder, args.excel, args.dry_run, changes=changes)
 
 
 if __name__ == "__main__":
@@ -5,9 +5,22 @@ from .constant import (
     BOOSTER_PACKS,
     PACK_KEYS,
     MATCH_EXP_AND_PACK,
+    CRAWLER_CONCURRENCY,
+    GEMINI_MODEL,
+    NAME_READER_LIMITS,
+    NAME_TEMPLATE_SIZE,
+    NAME_MATCH_THRESHOLD,
+    NAME_MATCH_MARGIN,
+    NAME_HASH_DISTANCE,
     WEAKNESS_MAP,
     CARD_REGIONS,
+    TRAINER_COLORS,
     LANGUAGES,
+    ICON_SCALES,
+    ICON_THRESHOLDS,
+    SCALE_SEARCH,
+    ICON_CLASSIFY,
+    TYPE_HISTOGRAM,
 )
 
 __all__ = [
@@ -17,6 +30,19 @@ __all__ = [
     "BOOSTER_PACKS",
     "PACK_KEYS",
     "MATCH_EXP_AND_PACK",
+    "CRAWLER_CONCURRENCY",
+    "GEMINI_MODEL",
+    "NAME_READER_LIMITS",
+    "NAME_TEMPLATE_SIZE",
+    "NAME_MATCH_THRESHOLD",
+    "NAME_MATCH_MARGIN",
+    "NAME_HASH_DISTANCE",
     "WEAKNESS_MAP",
     "CARD_REGIONS",
+    "TRAINER_COLORS",
+    "ICON_SCALES",
+    "ICON_THRESHOLDS",
+    "SCALE_SEARCH",
+    "ICON_CLASSIFY",
+    "TYPE_HISTOGRAM",
 ]
@@ -78,6 +78,27 @@ MATCH_EXP_AND_PACK = {
     "B1a": ["BN002_0010_00_000"],
 }
 
+# Pages crawled at the same time when crawling several targets
+CRAWLER_CONCURRENCY = 3
+
+# Gemini model of the card name reader
+GEMINI_MODEL = "gemini-3-flash-preview"
+
+# Card name reader limits: requests in flight, requests per second, retries
+# of a request rejected with 429 or 5xx, and name crops tiled into one request
+NAME_READER_LIMITS = {"concurrency": 8, "rate": 4, "retries": 5, "batch_size": 1}
+
+# Local card name reader: name crops are compared at NAME_TEMPLATE_SIZE
+# (width, height), a name is accepted when it scores NAME_MATCH_THRESHOLD and
+# beats the best other name by NAME_MATCH_MARGIN, otherwise Gemini reads it
+NAME_TEMPLATE_SIZE = (112, 24)
+NAME_MATCH_THRESHOLD = 0.93
+NAME_MATCH_MARGIN = 0.05
+
+# Perceptual hash name reuse: a name crop within NAME_HASH_DISTANCE bits of
+# the 256-bit hash of an already named crop reuses its name
+NAME_HASH_DISTANCE = 24
+
 WEAKNESS_MAP = {
     "grass": "fire",
     "fire": "water",
@@ -91,6 +112,13 @@ WEAKNESS_MAP = {
     "dragon": "none",
 }
 
+# Top-left color of non-Pokemon cards
+TRAINER_COLORS = {
+    "orange": "trainer",
+    "purple": "pokemon tool",
+    "blue": "tool",
+}
+
 CARD_REGIONS = {
     "type": {"top": 0.03, "bottom": 0.09, "left": 0.88, "right": 0.95},
     "weakness": {"top": 0.86, "bottom": 0.89, "left": 0.28, "right": 0.33},
@@ -104,3 +132,31 @@ LANGUAGES = {
     "zh_TW": "Chinese",
     "ja_JP": "Japanese",
 }
+
+# Icon scale ranges (start, stop, num) for each card region
+ICON_SCALES = {
+    "type": (0.25, 0.35, 5),
+    "weakness": (0.12, 0.18, 5),
+    "attack": (0.20, 0.35, 5),
+}
+
+# Icon matching thresholds for each card region
+ICON_THRESHOLDS = {
+    "type": 0.5,
+    "weakness": 0.3,
+    "attack": 0.5,
+}
+
+# Opt-in coarse-to-fine icon scale search: icon/scale pairs scoring within
+# margin of the threshold at half resolution are matched at full resolution,
+# and once warmup matches were seen only the most matched scale and spread
+# scales on each side are tried
+SCALE_SEARCH = {"margin": 0.25, "warmup": 16, "spread": 1}
+
+# Opt-in early exit type classification: stop once an icon scores ceiling,
+# and skip colored icons whose hues cover less than min_hue_share of the crop
+ICON_CLASSIFY = {"ceiling": 0.65, "min_hue_share": 0.02}
+
+# Opt-in color histogram type classifier: hue, saturation and value bins, and
+# the correlation and lead over the runner-up a type needs to skip matching
+TYPE_HISTOGRAM = {"bins": (18, 3, 3), "min_score": 0.35, "margin": 0.15}
@@ -8,7 +8,7 @@ from src.services import (
     clear_paths,
 )
 
-from scripts import rename_images
+from scripts import rename_folders
 from src.utils import dry_run_log
 from src.config import SUPPORTED_EXCEL_FORMATS
 from src.utils import extract_folder_prefix, extract_excel_prefix
@@ -56,14 +56,12 @@ class RenamerWorker(QThread):
         pbar = SignalProgressBar(self)
 
         try:
-            for folder in self.folders:
-                pbar.write(f"Starting process for folder: {folder}")
-                rename_images(
-                    folder,
-                    self.excel_path,
-                    self.dry_run,
-                    pbar=pbar,
-                )
+            rename_folders(
+                self.folders,
+                self.excel_path,
+                self.dry_run,
+                pbar=pbar,
+            )
         except Exception as e:
             self.error.emit(str(e))
         finally:
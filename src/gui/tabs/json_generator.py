@@ -4,13 +4,12 @@ import os
 from src.utils import safe_dump_json
 from src.config import SUPPORTED_EXCEL_FORMATS, EXPANSIONS
 from src.services import (
-    check_duplicate_cards,
     select_paths,
     update_display,
     remove_selected_paths,
     clear_paths,
 )
-from scripts import generate_json, generate_special_card_data
+from scripts import generate_all_json
 from src.utils import extract_folder_prefix, extract_excel_prefix
 from src.gui.utils import check_file_exist
 from src.gui.utils import (
@@ -57,8 +56,8 @@ class JsonGeneratorWorker(QThread):
         try:
             folder_path = self.selected_folder[0]
 
-            # Generate json which include card types
-            result, non_pokemon_booster_pack = generate_json(
+            # Generate card types, duplicates and special card data in one pass
+            result, duplicate_list, special_results = generate_all_json(
                 folder_path, self.selected_files, pbar=pbar
             )
 
@@ -66,38 +65,12 @@ class JsonGeneratorWorker(QThread):
             os.makedirs(os.path.dirname(self.OUTPUT_FILE), exist_ok=True)
             safe_dump_json(result, self.OUTPUT_FILE)
 
-            # Check duplicates
-            self.log.emit("Generating duplicate json file...")
-            duplicate_list = check_duplicate_cards(self.OUTPUT_FILE, pbar=pbar)
-
             # Output the duplicate result
             if duplicate_list:
                 safe_dump_json(duplicate_list, self.DUPLICATE_FILE)
 
             self.log.emit("Completed generating duplicate json file.")
 
-            # Generate special card data
-            self.log.emit("Generating special card data...")
-            if duplicate_list:
-                special_results = generate_special_card_data(
-                    folder_path, self.DUPLICATE_FILE, pbar=pbar
-                )
-            else:
-                special_results = generate_special_card_data(folder_path, "", pbar=pbar)
-
-            # Combine the non pokemon booster pack
-            for key, value in non_pokemon_booster_pack.items():
-                if (
-                    key in special_results
-                    and isinstance(special_results[key], dict)
-                    and isinstance(value, dict)
-                ):
-                    special_results[key].update(value)
-                else:
-                    special_results[key] = value
-
-            self.log.emit("Combine non pokemon booster pack...")
-
             self.log.emit(f"Writing to {self.SPECIAL_FILE}...")
             safe_dump_json(special_results, self.SPECIAL_FILE)
 
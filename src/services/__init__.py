@@ -1,27 +1,117 @@
-from .check_duplicate_cards import check_duplicate_cards, check_duplicate_specific_card
-from .check_card_top_left_color import check_top_left_color
-from .load_match_icon import load_icons, match_icon, find_all_icons
+from .check_duplicate_cards import (
+    check_duplicate_cards,
+    check_duplicate_specific_card,
+    find_duplicate_cards,
+)
+from .check_card_top_left_color import check_top_left_color, get_top_left_color
+from .load_match_icon import (
+    load_icons,
+    match_icon,
+    match_icons_batch,
+    score_icons_batch,
+    find_all_icons,
+    IconBank,
+    build_icon_bank,
+    get_scales,
+    ScaleSearch,
+    IconClassifier,
+)
 from .folder_file_selection import (
     select_paths,
     update_display,
     remove_selected_paths,
     clear_paths,
 )
+from .analyze_card import (
+    read_card_image,
+    crop_card_region,
+    analyze_card_image,
+    analyze_card_images,
+    analyze_card,
+    analyze_cards,
+)
+from .type_histogram import TypeHistogram, get_type_histogram
+from .analysis_cache import AnalysisCache, clear_analysis_cache
+from .image_list import read_image_names, save_image_names
+from .pack_index import PackIndex, build_pack_index
+from .change_manifest import (
+    get_manifest_path,
+    diff_image_names,
+    merge_changes,
+    save_change_manifest,
+    load_change_manifests,
+    is_changed_image,
+)
 from .check_promo_card import load_promo_lists
-from .ai_read_card_name import text_reader, analyze_card_name
+from .ai_read_card_name import (
+    text_reader,
+    analyze_card_name,
+    crop_card_name,
+    read_card_names,
+    TokenBucket,
+)
+from .local_name_reader import (
+    NameReaderBackend,
+    TemplateNameReader,
+    build_template_name_reader,
+)
+from .name_hash_index import NameHashIndex, get_name_hash, hash_distance
+from .name_journal import NameJournal, get_journal_path, replay_journal, compact_journal
 
 __all__ = [
     "check_duplicate_cards",
     "check_duplicate_specific_card",
+    "find_duplicate_cards",
     "check_top_left_color",
+    "get_top_left_color",
     "load_icons",
     "match_icon",
+    "match_icons_batch",
+    "score_icons_batch",
     "find_all_icons",
+    "IconBank",
+    "build_icon_bank",
+    "get_scales",
+    "ScaleSearch",
+    "IconClassifier",
+    "TypeHistogram",
+    "get_type_histogram",
     "select_paths",
     "update_display",
     "remove_selected_paths",
     "clear_paths",
+    "PackIndex",
+    "build_pack_index",
+    "read_image_names",
+    "save_image_names",
+    "get_manifest_path",
+    "diff_image_names",
+    "merge_changes",
+    "save_change_manifest",
+    "load_change_manifests",
+    "is_changed_image",
     "load_promo_lists",
+    "read_card_image",
+    "crop_card_region",
+    "analyze_card_image",
+    "analyze_card_images",
+    "analyze_card",
+    "analyze_cards",
+    "AnalysisCache",
+    "clear_analysis_cache",
     "analyze_image",
     "analyze_card_name",
+    "crop_card_name",
+    "read_card_names",
+    "TokenBucket",
+    "NameReaderBackend",
+    "TemplateNameReader",
+    "build_template_name_reader",
+    "NameHashIndex",
+    "get_name_hash",
+    "hash_distance",
+    "NameJournal",
+    "get_journal_path",
+    "replay_journal",
+    "compact_journal",
 ]
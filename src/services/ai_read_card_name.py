@@ -1,9 +1,35 @@
+import re
+import json
+import time
+import random
+import asyncio
 import cv2
 import numpy as np
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 from src.utils import log
-from src.config import CARD_REGIONS
+from src.config import CARD_REGIONS, GEMINI_MODEL, NAME_READER_LIMITS
+
+# Status codes worth retrying, quota exceeded and server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Backoff of the n-th retry is random up to RETRY_BASE_DELAY * 2^n seconds
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+
+def get_name_prompt(lang):
+    """
+    Args:
+        lang: The language of the card name.
+    Returns:
+        The prompt asking for the card name.
+    """
+    return f"""
+    Extract the Pokemon card name from this image.
+    The name is usually at the top of the card.
+    Return the Pokemon card name from the image.
+    Target Language: {lang}
+    """
 
 
 def text_reader(image, client: genai.Client, lang: str, pbar=None):
@@ -19,19 +45,12 @@ def text_reader(image, client: genai.Client, lang: str, pbar=None):
     # Convert image to buffer, need to use for ai
     _, buffer = cv2.imencode(".png", image)
 
-    prompt = f"""
-    Extract the Pokemon card name from this image.
-    The name is usually at the top of the card.
-    Return the Pokemon card name from the image.
-    Target Language: {lang}
-    """
-
     try:
         response = client.models.generate_content(
-            model="gemini-3-flash-preview",
+            model=GEMINI_MODEL,
             # Read prompt and image as bytes
             contents=[
-                prompt,
+                get_name_prompt(lang),
                 types.Part.from_bytes(data=buffer.tobytes(), mime_type="image/png"),
             ],
             # Response type in text
@@ -43,7 +62,274 @@ def text_reader(image, client: genai.Client, lang: str, pbar=None):
         return None
 
 
-def analyze_card_name(image_path, lang, client, pbar=None):
+class TokenBucket:
+    """
+    Token bucket rate limiter for async requests, `rate` tokens are added per
+    second up to `capacity`, and every request takes one.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Wait until a token is available and take it.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def generate_with_retry(
+    client, contents, config, limiter=None, retries=None, pbar=None
+):
+    """
+    Call the async GenAI client, retrying 429 and 5xx errors with jittered
+    exponential backoff.
+    Args:
+        client: The Google GenAI client.
+        contents: The request contents.
+        config: The request config.
+        limiter: TokenBucket taken before every attempt (optional).
+        retries: Maximum retries, NAME_READER_LIMITS["retries"] if None.
+        pbar: The progress bar.
+    Returns:
+        The response.
+    Raises:
+        errors.APIError: If the request failed with another status code or
+            kept failing.
+    """
+    if retries is None:
+        retries = NAME_READER_LIMITS["retries"]
+
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.acquire()
+
+        try:
+            return await client.aio.models.generate_content(
+                model=GEMINI_MODEL, contents=contents, config=config
+            )
+        except errors.APIError as e:
+            if e.code not in RETRY_STATUS_CODES or attempt == retries:
+                raise
+
+            # Full jitter, spread the retries of concurrent requests
+            delay = random.uniform(
+                0, min(RETRY_BASE_DELAY * 2**attempt, RETRY_MAX_DELAY)
+            )
+            log(f"Request failed with {e.code}, retrying in {delay:.1f}s...", pbar)
+            await asyncio.sleep(delay)
+
+
+async def async_text_reader(image, client, lang, limiter=None, retries=None, pbar=None):
+    """
+    Async version of text_reader, with rate limiting and retries.
+    Args:
+        image: The image to extract the name from.
+        client: The Google GenAI client.
+        lang: The language of the card name.
+        limiter: TokenBucket shared by the requests (optional).
+        retries: Maximum retries, NAME_READER_LIMITS["retries"] if None.
+        pbar: The progress bar.
+    Returns:
+        The extracted card name, None if the request failed.
+    """
+    _, buffer = cv2.imencode(".png", image)
+
+    try:
+        response = await generate_with_retry(
+            client,
+            [
+                get_name_prompt(lang),
+                types.Part.from_bytes(data=buffer.tobytes(), mime_type="image/png"),
+            ],
+            types.GenerateContentConfig(response_mime_type="text/plain"),
+            limiter,
+            retries,
+            pbar,
+        )
+        return response.text
+    except Exception as e:
+        log(f"Error in text_reader: {e}", pbar)
+        return None
+
+
+def get_batch_prompt(lang, count):
+    """
+    Args:
+        lang: The language of the card names.
+        count: The number of tiles in the image.
+    Returns:
+        The prompt asking for the card name of every tile.
+    """
+    return f"""
+    This image is a column of {count} tiles, each showing the top of a
+    Pokemon card with its tile number on the left, from 1 to {count}.
+    Extract the Pokemon card name of every tile.
+    Return a JSON array with one object per tile, in tile order:
+    [{{"tile": 1, "name": "..."}}, ...]
+    Target Language: {lang}
+    """
+
+
+def build_name_sprite(crops):
+    """
+    Tiles name crops into one image, top to bottom, each with its tile
+    number on the left.
+    Args:
+        crops: The name crops.
+    Returns:
+        The composite image.
+    """
+    width = max(crop.shape[1] for crop in crops)
+    label_width = 48
+    tiles = []
+
+    for number, crop in enumerate(crops, start=1):
+        height = max(int(crop.shape[0] * width / crop.shape[1]), 1)
+        crop = cv2.resize(crop, (width, height), interpolation=cv2.INTER_LINEAR)
+
+        # White label strip with the tile number
+        label = np.full((height, label_width, 3), 255, dtype=np.uint8)
+        cv2.putText(
+            label,
+            str(number),
+            (4, height // 2 + 8),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 0, 0),
+            2,
+        )
+        tiles.append(np.hstack([label, crop]))
+
+        # Black separator line between tiles
+        tiles.append(np.zeros((4, label_width + width, 3), dtype=np.uint8))
+
+    return np.vstack(tiles[:-1])
+
+
+def parse_batch_names(text, count):
+    """
+    Parses the names of a batch response and checks they line up with the
+    tiles.
+    Args:
+        text: The response text, a JSON array of {"tile", "name"} objects.
+        count: The number of tiles sent.
+    Returns:
+        The names in tile order, None if the response does not match the
+        tiles.
+    """
+    if not text:
+        return None
+
+    # Models sometimes wrap JSON in a code fence
+    text = re.sub(r"^```(?:json)?|```$", "", text.strip()).strip()
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+    if not isinstance(items, list) or len(items) != count:
+        return None
+
+    names = []
+    for number, item in enumerate(items, start=1):
+        if not isinstance(item, dict) or item.get("tile") != number:
+            return None
+        name = item.get("name")
+        if not isinstance(name, str) or not name.strip():
+            return None
+        names.append(name)
+
+    return names
+
+
+async def async_batch_text_reader(
+    crops, client, lang, limiter=None, retries=None, pbar=None
+):
+    """
+    Extracts the card names of several name crops with one request, by
+    tiling them into one image.
+    Args:
+        crops: The name crops.
+        client: The Google GenAI client.
+        lang: The language of the card names.
+        limiter: TokenBucket shared by the requests (optional).
+        retries: Maximum retries, NAME_READER_LIMITS["retries"] if None.
+        pbar: The progress bar.
+    Returns:
+        The card names in crop order, None if the request failed or the
+        response did not line up with the tiles.
+    """
+    _, buffer = cv2.imencode(".png", build_name_sprite(crops))
+
+    try:
+        response = await generate_with_retry(
+            client,
+            [
+                get_batch_prompt(lang, len(crops)),
+                types.Part.from_bytes(data=buffer.tobytes(), mime_type="image/png"),
+            ],
+            types.GenerateContentConfig(response_mime_type="application/json"),
+            limiter,
+            retries,
+            pbar,
+        )
+    except Exception as e:
+        log(f"Error in batch text_reader: {e}", pbar)
+        return None
+
+    return parse_batch_names(response.text, len(crops))
+
+
+def crop_card_name(img):
+    """
+    Crops the name area of a card image.
+    Args:
+        img: The card image.
+    Returns:
+        The crop covering both potential name locations.
+    """
+    height, width = img.shape[:2]
+
+    left = int(width * CARD_REGIONS["name"]["left"])
+    top = int(height * CARD_REGIONS["name"]["top"])
+    right = int(width * CARD_REGIONS["name"]["right"])
+    bottom = int(height * CARD_REGIONS["name"]["bottom"])
+
+    return img[top:bottom, left:right]
+
+
+def read_name_crop(image_path):
+    """
+    Reads an image from path and crops the name area.
+    Args:
+        image_path: The path to the image.
+    Returns:
+        The name crop, None if the image could not be read.
+    """
+    img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    return crop_card_name(img)
+
+
+def analyze_card_name(image_path, lang, client, pbar=None, hash_index=None):
     """
     Reads an image from path, crops the name area, and extracts text.
     Args:
@@ -52,30 +338,136 @@ def analyze_card_name(image_path, lang, client, pbar=None):
         api_key: The API key for Google GenAI (optional, used if client is None).
         client: The Google GenAI client (optional, preferred).
         pbar: The progress bar (will be None in multiprocessing worker).
+        hash_index: NameHashIndex consulted before the request and updated
+            with its answer (optional).
     Returns:
         The extracted card name.
     """
     try:
-        # Read image
-        img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-        if img is None:
+        # Read image, and crop region covering both potential name locations
+        crop = read_name_crop(image_path)
+        if crop is None:
             return "unknown"
 
-        height, width = img.shape[:2]
-
-        # Crop region covering both potential name locations
-        left = int(width * CARD_REGIONS["name"]["left"])
-        top = int(height * CARD_REGIONS["name"]["top"])
-        right = int(width * CARD_REGIONS["name"]["right"])
-        bottom = int(height * CARD_REGIONS["name"]["bottom"])
-
-        crop = img[top:bottom, left:right]
+        # Reuse the name of an already seen name artwork
+        if hash_index is not None:
+            name, _ = hash_index.read(crop, lang)
+            if name is not None:
+                return name
 
         # Read text from image
         response_text = text_reader(crop, client, lang, pbar)
 
+        if hash_index is not None:
+            hash_index.add(crop, lang, response_text)
+
         return response_text
 
     except Exception as e:
         log(f"Error processing {image_path}: {e}", pbar)
         return "unknown"
+
+
+async def read_card_names(
+    image_paths, lang, client, limits=None, pbar=None, on_result=None, backends=None
+):
+    """
+    Reads the card names of many images concurrently with the async GenAI
+    client, within the request limits. With a batch size above 1, the name
+    crops of consecutive images are tiled into one request, and a batch whose
+    answer does not line up with its tiles is read again card by card.
+    Args:
+        image_paths: The paths to the images.
+        lang: The language of the card names.
+        client: The Google GenAI client.
+        limits: concurrency, rate, retries and batch_size, NAME_READER_LIMITS
+            if None.
+        pbar: The progress bar.
+        on_result: Called with (index, name) as each name arrives (optional).
+        backends: NameReaderBackends tried first in order, only the crops
+            none of them recognizes are sent to Gemini (optional).
+    Returns:
+        The card names in the order of image_paths, "unknown" for unreadable
+        images and None for failed requests.
+    """
+    limits = {**NAME_READER_LIMITS, **(limits or {})}
+    semaphore = asyncio.Semaphore(max(limits["concurrency"], 1))
+    limiter = TokenBucket(limits["rate"])
+    batch_size = max(limits["batch_size"], 1)
+    names = [None] * len(image_paths)
+    local_count = 0
+
+    def read_crop(image_path):
+        try:
+            crop = read_name_crop(image_path)
+        except Exception as e:
+            log(f"Error processing {image_path}: {e}", pbar)
+            return None, None
+
+        if crop is None:
+            return None, None
+
+        for backend in backends or []:
+            name, _ = backend.read(crop, lang)
+            if name is not None:
+                return crop, name
+        return crop, None
+
+    def set_name(i, name):
+        names[i] = name
+        if on_result is not None:
+            on_result(i, name)
+
+    async def read_single(i, crop):
+        name = await async_text_reader(
+            crop, client, lang, limiter, limits["retries"], pbar
+        )
+        set_name(i, name)
+
+    async def read_batch(indices):
+        nonlocal local_count
+
+        async with semaphore:
+            # Decoding and local reading are CPU work, keep them off the loop
+            crops = await asyncio.gather(
+                *(asyncio.to_thread(read_crop, image_paths[i]) for i in indices)
+            )
+
+            readable = []
+            for i, (crop, name) in zip(indices, crops):
+                if crop is None:
+                    set_name(i, "unknown")
+                elif name is not None:
+                    set_name(i, name)
+                    local_count += 1
+                else:
+                    readable.append((i, crop))
+
+            if len(readable) > 1:
+                batch_names = await async_batch_text_reader(
+                    [crop for _, crop in readable],
+                    client,
+                    lang,
+                    limiter,
+                    limits["retries"],
+                    pbar,
+                )
+                if batch_names is not None:
+                    for (i, _), name in zip(readable, batch_names):
+                        set_name(i, name)
+                    return
+
+                log("Batch answer does not match its tiles, reading one by one.", pbar)
+
+            await asyncio.gather(*(read_single(i, crop) for i, crop in readable))
+
+    batches = [
+        list(range(start, min(start + batch_size, len(image_paths))))
+        for start in range(0, len(image_paths), batch_size)
+    ]
+    await asyncio.gather(*(read_batch(indices) for indices in batches))
+
+    if backends:
+        log(f"Read {local_count} of {len(image_paths)} names locally.", pbar)
+
+    return names
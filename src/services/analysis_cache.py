@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from src.config import (
+    CARD_REGIONS,
+    ICON_SCALES,
+    ICON_THRESHOLDS,
+    TRAINER_COLORS,
+    SCALE_SEARCH,
+    ICON_CLASSIFY,
+    TYPE_HISTOGRAM,
+)
+from src.utils import log, safe_load_json, safe_dump_json, get_cache_path
+
+# In the cache folder of the application root, see get_cache_path
+CACHE_FILE_NAME = "card_analysis.json"
+
+# Bump when the analysis code changes in a way the settings do not capture
+ANALYSIS_VERSION = 1
+
+# Keep the most recently used results only
+MAX_CACHE_ENTRIES = 20000
+
+
+def get_file_hash(file_path):
+    """
+    Hash the content of a file.
+    Args:
+        file_path (str): Path to the file.
+    Returns:
+        str: The SHA-1 hex digest of the file content.
+    """
+    sha1 = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def get_analysis_fingerprint(
+    icon_bank, scale_search=False, early_exit=False, color_histogram=False
+):
+    """
+    Fingerprint everything the card analysis depends on, so cached results
+    are not reused once the regions, the icons or the thresholds change.
+    Args:
+        icon_bank (IconBank): The pre-scaled icon bank.
+        scale_search (bool): Whether the coarse-to-fine scale search is used.
+        early_exit (bool): Whether the early exit type classification is used.
+        color_histogram (bool): Whether the color histogram type classifier
+            is used.
+    Returns:
+        str: The fingerprint.
+    """
+    settings = {
+        "version": ANALYSIS_VERSION,
+        "regions": CARD_REGIONS,
+        "scales": ICON_SCALES,
+        "thresholds": ICON_THRESHOLDS,
+        "trainer_colors": TRAINER_COLORS,
+        "icons": {
+            name: hashlib.sha1(icon.tobytes()).hexdigest()
+            for name, icon in sorted(icon_bank.icons.items())
+        },
+    }
+    # Keep the fingerprint of exhaustive results unchanged
+    if scale_search:
+        settings["scale_search"] = SCALE_SEARCH
+    if early_exit:
+        settings["early_exit"] = ICON_CLASSIFY
+    if color_histogram:
+        settings["color_histogram"] = TYPE_HISTOGRAM
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Persistent cache of per-image analysis results, keyed by the image
+    content hash and the analysis fingerprint.
+    """
+
+    def __init__(self, fingerprint, cache_file=None, max_entries=None):
+        """
+        Args:
+            fingerprint (str): The analysis fingerprint.
+            cache_file (str): Path to the cache file, default to
+                card_analysis.json in the cache folder.
+            max_entries (int): The maximum number of results to keep.
+        """
+        self.fingerprint = fingerprint
+        self.cache_file = cache_file or get_cache_path(CACHE_FILE_NAME)
+        self.max_entries = max_entries or MAX_CACHE_ENTRIES
+        self.entries = safe_load_json(self.cache_file) or {}
+        self.changed = False
+
+    def _key(self, file_hash):
+        return f"{self.fingerprint}:{file_hash}"
+
+    def get(self, file_hash, full=True):
+        """
+        Get the cached analysis of an image.
+        Args:
+            file_hash (str): The image content hash.
+            full (bool): Whether the weakness and attack cost are needed.
+        Returns:
+            dict: The cached analysis, None if missing.
+        """
+        entry = self.entries.get(self._key(file_hash))
+        if entry is None or (full and not entry["full"]):
+            return None
+
+        entry["used"] = time.time()
+        self.changed = True
+        return entry["result"]
+
+    def put(self, file_hash, result, full=True):
+        """
+        Store the analysis of an image.
+        Args:
+            file_hash (str): The image content hash.
+            result (dict): The analysis from analyze_card.
+            full (bool): Whether the analysis includes weakness and attack cost.
+        """
+        self.entries[self._key(file_hash)] = {
+            "result": result,
+            "full": full,
+            "used": time.time(),
+        }
+        self.changed = True
+
+    def save(self):
+        """
+        Write the cache to disk, evicting the least recently used results.
+        """
+        if not self.changed:
+            return
+
+        if len(self.entries) > self.max_entries:
+            keep = sorted(
+                self.entries.items(), key=lambda item: item[1]["used"], reverse=True
+            )[: self.max_entries]
+            self.entries = dict(keep)
+
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        safe_dump_json(self.entries, self.cache_file)
+        self.changed = False
+
+
+def clear_analysis_cache(cache_file=None, pbar=None):
+    """
+    Invalidate every cached analysis result.
+    Args:
+        cache_file (str): Path to the cache file, default to
+            card_analysis.json in the cache folder.
+        pbar: Progress bar for UI updates.
+    """
+    cache_file = cache_file or get_cache_path(CACHE_FILE_NAME)
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+        log(f"Removed {cache_file}", pbar)
+    else:
+        log(f"No cache found at {cache_file}", pbar)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the card analysis cache.")
+    parser.add_argument(
+        "--cache-file",
+        default=get_cache_path(CACHE_FILE_NAME),
+        help="Cache file path",
+    )
+    parser.add_argument(
+        "--clear", action="store_true", help="Invalidate all cached results"
+    )
+
+    args = parser.parse_args()
+
+    if args.clear:
+        clear_analysis_cache(args.cache_file)
+    else:
+        entries = safe_load_json(args.cache_file) or {}
+        print(f"{len(entries)} cached results in {args.cache_file}")
@@ -0,0 +1,383 @@
+import os
+import cv2
+import numpy as np
+from multiprocessing import Pool
+from src.config import CARD_REGIONS, ICON_THRESHOLDS
+from src.utils import log, update_pbar
+from .analysis_cache import AnalysisCache, get_analysis_fingerprint, get_file_hash
+from .load_match_icon import (
+    get_scales,
+    match_icon,
+    match_icons_batch,
+    find_all_icons,
+    ScaleSearch,
+    IconClassifier,
+)
+from .check_card_top_left_color import get_top_left_color
+from .type_histogram import TypeHistogram
+
+# Worker global variables
+worker_icon_bank = None
+worker_search = None
+worker_classifier = None
+worker_histogram = None
+
+# Cards analyzed together by a worker, their icon crops are matched at once
+ANALYSIS_CHUNK_SIZE = 32
+
+
+def init_worker(icon_bank, scale_search=False, early_exit=False, color_histogram=False):
+    global worker_icon_bank, worker_search, worker_classifier, worker_histogram
+    worker_icon_bank = icon_bank
+    # Each worker learns the scales and types of the cards it analyzes
+    worker_search = ScaleSearch() if scale_search else None
+    worker_classifier = IconClassifier() if early_exit else None
+    worker_histogram = TypeHistogram(icon_bank) if color_histogram else None
+
+
+def read_card_image(image_path):
+    """
+    Decode a card image from disk.
+    Args:
+        image_path (str): Path to the image file.
+    Returns:
+        numpy.ndarray: The image in BGR, None if it could not be read.
+    """
+    # Use imdecode and fromfile to handle unicode paths on Windows
+    return cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def crop_card_region(img, region):
+    """
+    Crop a region of the card defined in CARD_REGIONS.
+    Args:
+        img (numpy.ndarray): The card image.
+        region (str): The region name ("type", "weakness", "attack", ...).
+    Returns:
+        numpy.ndarray: The cropped region (a view of the image).
+    """
+    height, width = img.shape[:2]
+
+    top = int(height * CARD_REGIONS[region]["top"])
+    bottom = int(height * CARD_REGIONS[region]["bottom"])
+    left = int(width * CARD_REGIONS[region]["left"])
+    right = int(width * CARD_REGIONS[region]["right"])
+
+    return img[top:bottom, left:right]
+
+
+def get_weakness_crop(img):
+    """
+    Crop the weakness region and remove its white background.
+    Args:
+        img (numpy.ndarray): The card image in BGR.
+    Returns:
+        numpy.ndarray: The weakness crop.
+    """
+    crop_weak = crop_card_region(img, "weakness").copy()
+
+    # Remove white background
+    lower_white = np.array([200, 200, 200], dtype=np.uint8)
+    upper_white = np.array([255, 255, 255], dtype=np.uint8)
+    mask = cv2.inRange(crop_weak, lower_white, upper_white)
+    crop_weak[mask > 0] = [0, 0, 0]
+
+    return crop_weak
+
+
+def analyze_card_images(
+    imgs, icons, full=True, search=None, classifier=None, histogram=None
+):
+    """
+    Analyze every region of many already decoded card images, matching the
+    type and weakness crops of all cards against the icon bank at once.
+    Args:
+        imgs (list): The card images in BGR.
+        icons (IconBank): The pre-scaled icon bank.
+        full (bool): Also read the weakness and attack cost of Pokemon cards.
+        search (ScaleSearch): Coarse-to-fine scale search (optional).
+        classifier (IconClassifier): Classify the type crops one by one with
+            early exit instead of in one batch (optional).
+        histogram (TypeHistogram): Classify the type crops by color first,
+            only the inconclusive ones are matched (optional).
+    Returns:
+        list: The analysis of every image, see analyze_card_image.
+    """
+    analyses = [
+        {"type": None, "trainer": None, "weakness": None, "attackCost": None}
+        for _ in imgs
+    ]
+
+    # 1. Card Type (Top Right)
+    type_crops = [crop_card_region(img, "type") for img in imgs]
+    card_types = [None] * len(imgs)
+    unmatched = list(range(len(imgs)))
+    if histogram is not None:
+        card_types = [histogram.classify(crop) for crop in type_crops]
+        unmatched = [i for i, card_type in enumerate(card_types) if card_type is None]
+
+    unmatched_crops = [type_crops[i] for i in unmatched]
+    if classifier is None:
+        matched = match_icons_batch(
+            unmatched_crops, icons, threshold=ICON_THRESHOLDS["type"], search=search
+        )
+    else:
+        matched = [
+            match_icon(
+                crop,
+                icons,
+                threshold=ICON_THRESHOLDS["type"],
+                search=search,
+                classifier=classifier,
+            )
+            for crop in unmatched_crops
+        ]
+    for i, card_type in zip(unmatched, matched):
+        card_types[i] = card_type
+
+    pokemon = []
+    for i, (img, card_type) in enumerate(zip(imgs, card_types)):
+        # No type icon, either tool or trainer
+        if card_type is None:
+            analyses[i]["trainer"] = get_top_left_color(img)
+        else:
+            analyses[i]["type"] = card_type
+            pokemon.append(i)
+
+    if not full or not pokemon:
+        return analyses
+
+    # 2. Weakness (Bottom Left), the icon is smaller, around 0.15 scale
+    weaknesses = match_icons_batch(
+        [get_weakness_crop(imgs[i]) for i in pokemon],
+        icons,
+        threshold=ICON_THRESHOLDS["weakness"],
+        scales=get_scales("weakness"),
+        search=search,
+    )
+
+    for i, weakness in zip(pokemon, weaknesses):
+        analyses[i]["weakness"] = weakness
+
+        # 3. Fight Energy / Attack Cost (Middle Left)
+        analyses[i]["attackCost"] = find_all_icons(
+            crop_card_region(imgs[i], "attack"),
+            icons,
+            threshold=ICON_THRESHOLDS["attack"],
+            search=search,
+        )
+
+    return analyses
+
+
+def analyze_card_image(
+    img, icons, full=True, search=None, classifier=None, histogram=None
+):
+    """
+    Analyze every region of an already decoded card image.
+    Args:
+        img (numpy.ndarray): The card image in BGR.
+        icons (IconBank): The pre-scaled icon bank.
+        full (bool): Also read the weakness and attack cost of Pokemon cards.
+        search (ScaleSearch): Coarse-to-fine scale search (optional).
+        classifier (IconClassifier): Early exit type classification (optional).
+        histogram (TypeHistogram): Color histogram type classifier (optional).
+    Returns:
+        dict: {"type", "trainer", "weakness", "attackCost"}, the values are None
+            when the region does not apply to the card.
+    """
+    return analyze_card_images(
+        [img],
+        icons,
+        full=full,
+        search=search,
+        classifier=classifier,
+        histogram=histogram,
+    )[0]
+
+
+def analyze_card(
+    image_path, icons, full=True, search=None, classifier=None, histogram=None
+):
+    """
+    Decode a card image once and analyze every region from the same array.
+    Args:
+        image_path (str): Path to the image file.
+        icons (IconBank): The pre-scaled icon bank.
+        full (bool): Also read the weakness and attack cost of Pokemon cards.
+        search (ScaleSearch): Coarse-to-fine scale search (optional).
+        classifier (IconClassifier): Early exit type classification (optional).
+        histogram (TypeHistogram): Color histogram type classifier (optional).
+    Returns:
+        dict: The analysis from analyze_card_image, None if the image
+            could not be read.
+    """
+    img = read_card_image(image_path)
+    if img is None:
+        return None
+
+    return analyze_card_image(
+        img,
+        icons,
+        full=full,
+        search=search,
+        classifier=classifier,
+        histogram=histogram,
+    )
+
+
+def analyze_single_card(args):
+    image_path, full = args
+    # Use the global worker_icon_bank
+    try:
+        return analyze_card(
+            image_path,
+            worker_icon_bank,
+            full=full,
+            search=worker_search,
+            classifier=worker_classifier,
+            histogram=worker_histogram,
+        )
+    except Exception as e:
+        log(f"Error processing {image_path}: {e}", None)
+        return None
+
+
+def pop_histogram_counts():
+    # (classified, deferred) type crops of the worker since the last call
+    if worker_histogram is None:
+        return None
+    return worker_histogram.pop_counts()
+
+
+def analyze_card_chunk(args):
+    image_paths, full = args
+    # Use the global worker_icon_bank
+    try:
+        imgs = [read_card_image(image_path) for image_path in image_paths]
+        readable = [i for i, img in enumerate(imgs) if img is not None]
+
+        analyses = [None] * len(image_paths)
+        batch = analyze_card_images(
+            [imgs[i] for i in readable],
+            worker_icon_bank,
+            full=full,
+            search=worker_search,
+            classifier=worker_classifier,
+            histogram=worker_histogram,
+        )
+        for i, analysis in zip(readable, batch):
+            analyses[i] = analysis
+    except Exception:
+        # Find the failing card, analyze the chunk card by card
+        analyses = [analyze_single_card((path, full)) for path in image_paths]
+    return analyses, pop_histogram_counts()
+
+
+def analyze_cards(
+    image_paths,
+    icon_bank,
+    full=True,
+    use_cache=True,
+    pbar=None,
+    progress=0,
+    scale_search=False,
+    early_exit=False,
+    color_histogram=False,
+):
+    """
+    Analyze card images with one worker pool, reusing the cached results
+    of the images that did not change since the last run.
+    Args:
+        image_paths (list): List of image paths.
+        icon_bank (IconBank): The pre-scaled icon bank.
+        full (bool): Also read the weakness and attack cost of Pokemon cards.
+        use_cache (bool): Whether to use the analysis cache.
+        pbar (QProgressBar): Progress bar.
+        progress (float): The progress bar share of the analysis.
+        scale_search (bool): Use the coarse-to-fine scale search, faster but
+            not guaranteed to match the exhaustive search on every card.
+        early_exit (bool): Classify the card types one by one, stopping at
+            the first confident icon and skipping icons of other colors.
+        color_histogram (bool): Classify the card types by color histogram,
+            only the inconclusive ones are matched against the icons.
+    Returns:
+        list: The analysis of every image in the same order, None if unreadable.
+    """
+    analyses = [None] * len(image_paths)
+    pending = list(range(len(image_paths)))
+    file_hashes = {}
+    cache = None
+
+    if use_cache:
+        cache = AnalysisCache(
+            get_analysis_fingerprint(
+                icon_bank, scale_search, early_exit, color_histogram
+            )
+        )
+        pending = []
+        for i, image_path in enumerate(image_paths):
+            try:
+                file_hashes[i] = get_file_hash(image_path)
+            except OSError:
+                pending.append(i)
+                continue
+
+            cached = cache.get(file_hashes[i], full=full)
+            if cached is None:
+                pending.append(i)
+            else:
+                analyses[i] = cached
+
+        log(
+            f"Reusing {len(image_paths) - len(pending)} cached results, "
+            f"{len(pending)} cards to analyze.",
+            pbar,
+        )
+
+    if image_paths:
+        update_pbar(
+            progress * (len(image_paths) - len(pending)) / len(image_paths), pbar
+        )
+
+    if pending:
+        # Using half of the cpu processes
+        half_processes = max(os.cpu_count() // 2, 1)
+
+        # Every worker shares the same icon bank, and analyzes its cards in
+        # chunks so their icon crops are matched together
+        chunks = [
+            pending[start : start + ANALYSIS_CHUNK_SIZE]
+            for start in range(0, len(pending), ANALYSIS_CHUNK_SIZE)
+        ]
+        with Pool(
+            processes=half_processes,
+            initializer=init_worker,
+            initargs=(icon_bank, scale_search, early_exit, color_histogram),
+        ) as pool:
+            tasks = [([image_paths[i] for i in chunk], full) for chunk in chunks]
+            classified = deferred = 0
+            for chunk, (chunk_analyses, counts) in zip(
+                chunks, pool.imap(analyze_card_chunk, tasks)
+            ):
+                for i, analysis in zip(chunk, chunk_analyses):
+                    analyses[i] = analysis
+                    if cache is not None and analysis is not None and i in file_hashes:
+                        cache.put(file_hashes[i], analysis, full=full)
+                if counts is not None:
+                    classified += counts[0]
+                    deferred += counts[1]
+                update_pbar(progress * len(chunk) / len(image_paths), pbar)
+
+        if color_histogram and classified + deferred:
+            log(
+                f"Color histogram classified {classified} card types, "
+                f"{deferred} fell back to template matching "
+                f"({deferred / (classified + deferred):.1%}).",
+                pbar,
+            )
+
+    if cache is not None:
+        cache.save()
+
+    return analyses
@@ -0,0 +1,137 @@
+import os
+from datetime import datetime
+from src.utils import safe_load_json, safe_dump_json
+
+# Change manifest written next to a crawled list by incremental crawls
+MANIFEST_SUFFIX = ".changes.json"
+
+
+def get_manifest_path(excel_path):
+    """
+    Get the change manifest path of a crawled list.
+    Args:
+        excel_path (str): Path to the Excel file, e.g. lists/promo-a.xlsx.
+    Returns:
+        str: Path to the manifest, e.g. lists/promo-a.changes.json.
+    """
+    return os.path.splitext(excel_path)[0] + MANIFEST_SUFFIX
+
+
+def diff_image_names(old_names, new_names):
+    """
+    Compare two crawls of a list.
+    Args:
+        old_names (list): The image names of the existing list.
+        new_names (list): The image names just crawled.
+    Returns:
+        dict: {"added": [...], "removed": [...]}, in list order.
+    """
+    old_set = set(old_names)
+    new_set = set(new_names)
+    return {
+        "added": [name for name in new_names if name not in old_set],
+        "removed": [name for name in old_names if name not in new_set],
+    }
+
+
+def merge_changes(earlier, later):
+    """
+    Combine the changes of two successive crawls of a list into the changes
+    between the first list and the last one.
+    Args:
+        earlier (dict): The changes of the first crawl.
+        later (dict): The changes of the next crawl.
+    Returns:
+        dict: {"added": [...], "removed": [...]}, names added then removed
+            or removed then added cancel out.
+    """
+    later_added = set(later["added"])
+    later_removed = set(later["removed"])
+    earlier_added = set(earlier["added"])
+    earlier_removed = set(earlier["removed"])
+
+    added = [name for name in earlier["added"] if name not in later_removed]
+    added += [
+        name
+        for name in later["added"]
+        if name not in earlier_removed and name not in earlier_added
+    ]
+    removed = [name for name in earlier["removed"] if name not in later_added]
+    removed += [
+        name
+        for name in later["removed"]
+        if name not in earlier_added and name not in earlier_removed
+    ]
+    return {"added": added, "removed": removed}
+
+
+def save_change_manifest(excel_path, changes):
+    """
+    Write the changes of a crawled list next to it. The changes are merged
+    into an existing manifest, its cards may not be processed yet.
+    Args:
+        excel_path (str): Path to the Excel file.
+        changes (dict): The changes from diff_image_names.
+    Returns:
+        str: Path to the manifest.
+    """
+    manifest_path = get_manifest_path(excel_path)
+    now = datetime.now().isoformat(timespec="seconds")
+
+    manifest = safe_load_json(manifest_path)
+    if manifest:
+        changes = merge_changes(
+            {
+                "added": manifest.get("added", []),
+                "removed": manifest.get("removed", []),
+            },
+            changes,
+        )
+        created = manifest.get("created", now)
+    else:
+        created = now
+
+    manifest = {
+        "list": os.path.basename(excel_path),
+        "created": created,
+        "updated": now,
+        "added": changes["added"],
+        "removed": changes["removed"],
+    }
+    safe_dump_json(manifest, manifest_path)
+    return manifest_path
+
+
+def load_change_manifests(manifest_paths):
+    """
+    Read and combine change manifests.
+    Args:
+        manifest_paths (list): Paths to the manifests.
+    Returns:
+        dict: {"added": [...], "removed": [...]} of all manifests.
+    Raises:
+        FileNotFoundError: If a manifest does not exist.
+    """
+    changes = {"added": [], "removed": []}
+    for manifest_path in manifest_paths:
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"Change manifest '{manifest_path}' not found.")
+
+        manifest = safe_load_json(manifest_path) or {}
+        changes["added"].extend(manifest.get("added", []))
+        changes["removed"].extend(manifest.get("removed", []))
+    return changes
+
+
+def is_changed_image(image_path, image_names):
+    """
+    Check if a renamed image belongs to one of the image names.
+    Args:
+        image_path (str): Path to the image, e.g. cPK_10_000110_00_NAZONOKUSA_C_A1-ja.png.
+        image_names (set): The image names, e.g. {"cPK_10_000110_00_NAZONOKUSA_C"}.
+    Returns:
+        bool: True if the image name starts with one of the image names.
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    parts = stem.split("_")
+    return any("_".join(parts[:i]) in image_names for i in range(1, len(parts) + 1))
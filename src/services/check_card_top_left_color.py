@@ -18,6 +18,17 @@ def check_top_left_color(image_path):
         print(f"Error: Could not read image {image_path}")
         return
 
+    return get_top_left_color(img)
+
+
+def get_top_left_color(img):
+    """
+    Check the trainer color of an already decoded Pokemon card image
+    Args:
+        img (numpy.ndarray): The card image in BGR
+    Returns:
+        str: "orange", "blue" or "purple", None if the crop is empty
+    """
     height, width = img.shape[:2]
 
     # Top 3-6%, Left 5-15%
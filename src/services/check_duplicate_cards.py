@@ -1,7 +1,7 @@
 import json
 import os
 from src.utils import log, update_pbar
-import pandas as pd
+from .pack_index import build_pack_index
 
 
 def check_duplicate_cards(input_file, pbar=None):
@@ -23,6 +23,18 @@ def check_duplicate_cards(input_file, pbar=None):
 
     update_pbar(5, pbar)
 
+    return find_duplicate_cards(data, pbar)
+
+
+def find_duplicate_cards(data, pbar=None):
+    """
+    Checks for duplicate card IDs across different packs in the card data.
+    Args:
+        data (dict): Pack name to card type to list of card IDs.
+        pbar (QProgressBar): Progress bar.
+    Returns:
+        dict: Card ID to the booster packs, only cards in more than one pack.
+    """
     card_pack_map = {}
 
     total_items = len(data.items())
@@ -51,18 +63,21 @@ def check_duplicate_cards(input_file, pbar=None):
     return sorted_duplicates
 
 
-def check_duplicate_specific_card(image_path, excel_files, pbar=None):
+def check_duplicate_specific_card(image_path, excel_files, pbar=None, pack_index=None):
     """
     Checks which Excel files (packs) contain a specific card identified by image_path.
 
     Args:
         image_path (str): Path to the image file, from which the card name is extracted.
         excel_files (dict): A dictionary where keys are pack names (str) and values are
+            the Excel file paths (str).
         pbar: Progress bar for UI updates.
+        pack_index (PackIndex): The pack membership index, built from excel_files
+            if None. Build it once and pass it when checking many cards.
 
     Returns:
         target_card_name (str): The name of the card being checked.
-        found_in_packs (set): A set of pack names (strings) where the specified card was found.
+        found_in_packs (list): A list of pack names (strings) where the specified card was found.
             Returns an empty set if the card name cannot be extracted or no packs are found.
     """
     filename = os.path.basename(image_path)
@@ -72,22 +87,9 @@ def check_duplicate_specific_card(image_path, excel_files, pbar=None):
         return set()
     target_card_name = parts[4]
 
-    found_in_packs = set()
-
-    for pack_name, path in excel_files.items():
-        df = pd.read_excel(path, usecols=["Image Name"])
-
-        # Extract card names from image names
-        card_names_in_pack = (
-            df["Image Name"]
-            .astype(str)
-            .apply(
-                lambda name: (name.split("_")[4] if len(name.split("_")) > 4 else None)
-            )
-            .dropna()
-        )
-
-        if target_card_name in card_names_in_pack.values:
-            found_in_packs.add(pack_name)
+    if pack_index is None:
+        pack_index = build_pack_index(excel_files, pbar)
+        if pack_index is None:
+            return target_card_name, []
 
-    return target_card_name, list(found_in_packs)
+    return target_card_name, pack_index.get_packs_by_name(target_card_name)
@@ -1,6 +1,7 @@
-import pandas as pd
 import os
 from src.utils import log
+from .pack_index import PackIndex
+from .image_list import read_image_names
 
 
 def load_promo_lists(pbar=None):
@@ -11,31 +12,24 @@ def load_promo_lists(pbar=None):
     Returns:
         Tuple of two sets: (promo_a_names, promo_b_names)
     """
-    promo_a_names = set()
-    promo_b_names = set()
-
-    def _load_single_promo_list(file_path, promo_set, promo_type):
+    promo_files = {
+        "promo-a": "lists/PROMO-A.xlsx",
+        "promo-b": "lists/PROMO-B.xlsx",
+    }
+
+    # Index the promo lists once, a missing list is only a warning
+    promo_index = PackIndex()
+    for promo_type, file_path in promo_files.items():
         if os.path.exists(file_path):
             try:
-                df = pd.read_excel(file_path)
-                if "Image Name" in df.columns:
-                    promo_set.update(
-                        df["Image Name"].astype(str).str.strip().str.split("_").str[4]
-                    )
-                else:
-                    log(f"Warning: 'Image Name' column not found in {file_path}", pbar)
+                promo_index.add_pack(promo_type, read_image_names(file_path))
             except Exception as e:
                 log(f"Error reading {file_path}: {e}", pbar)
         else:
             log(f"Warning: {file_path} not found", pbar)
 
-    try:
-        _load_single_promo_list("lists/PROMO-A.xlsx", promo_a_names, "promo-a")
-        _load_single_promo_list("lists/PROMO-B.xlsx", promo_b_names, "promo-b")
-    except Exception as e:
-        log(f"Error loading promo lists: {e}", pbar)
-        log("Please use the crawler to get the promo list first!", pbar)
-        return set(), set()
+    promo_a_names = promo_index.pack_names.get("promo-a", set())
+    promo_b_names = promo_index.pack_names.get("promo-b", set())
 
     return promo_a_names, promo_b_names
 
@@ -0,0 +1,105 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Binary sidecar written next to each crawled Excel list
+SIDECAR_SUFFIX = ".names.npz"
+
+# Only the lists of these folders (the crawler output) get a sidecar on read
+SIDECAR_FOLDERS = ("lists",)
+
+
+def get_sidecar_path(excel_path):
+    """
+    Get the binary sidecar path of a crawled list.
+    Args:
+        excel_path (str): Path to the Excel file, e.g. lists/A1.xlsx.
+    Returns:
+        str: Path to the sidecar, e.g. lists/A1.names.npz.
+    """
+    return os.path.splitext(excel_path)[0] + SIDECAR_SUFFIX
+
+
+def _get_excel_stamp(excel_path):
+    # Size and modification time of the Excel file, -1 if it is missing
+    if not os.path.exists(excel_path):
+        return np.array([-1, -1], dtype=np.int64)
+    stat = os.stat(excel_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def save_image_names(image_names, excel_path):
+    """
+    Write the image names of a crawled list to its binary sidecar, with the
+    size and modification time of the Excel file they were read from.
+    Args:
+        image_names (list): The image names.
+        excel_path (str): Path to the Excel file the names belong to.
+    """
+    np.savez(
+        get_sidecar_path(excel_path),
+        names=np.array(image_names, dtype=str),
+        stamp=_get_excel_stamp(excel_path),
+    )
+
+
+def _read_sidecar(excel_path):
+    # The names of a sidecar still matching its Excel file, None otherwise
+    sidecar_path = get_sidecar_path(excel_path)
+    if not os.path.exists(sidecar_path):
+        return None
+
+    try:
+        with np.load(sidecar_path, allow_pickle=False) as sidecar:
+            names, stamp = sidecar["names"], sidecar["stamp"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # Stale once the Excel file changed size or was written again,
+    # a sidecar without its Excel file is still usable
+    if os.path.exists(excel_path) and not np.array_equal(
+        stamp, _get_excel_stamp(excel_path)
+    ):
+        return None
+    return names.tolist()
+
+
+def _is_sidecar_folder(excel_path):
+    folder = os.path.basename(os.path.dirname(os.path.abspath(excel_path)))
+    return folder in SIDECAR_FOLDERS
+
+
+def read_image_names(excel_path, write_sidecar=None):
+    """
+    Read the image names of a crawled list. Prefer the binary sidecar and
+    fall back to the Excel file when the sidecar is missing or stale.
+    Args:
+        excel_path (str): Path to the Excel file.
+        write_sidecar (bool): Write a new sidecar after reading the Excel
+            file, default to the crawler lists folder only.
+    Returns:
+        list: The image names, empty cells are dropped.
+    Raises:
+        KeyError: If the Excel file has no "Image Name" column.
+    """
+    image_names = _read_sidecar(excel_path)
+    if image_names is not None:
+        return image_names
+
+    try:
+        df = pd.read_excel(excel_path, usecols=["Image Name"])
+    except ValueError:
+        raise KeyError("'Image Name' column not found in Excel file.")
+    image_names = df["Image Name"].dropna().astype(str).tolist()
+
+    if write_sidecar is None:
+        write_sidecar = _is_sidecar_folder(excel_path)
+
+    if write_sidecar:
+        try:
+            save_image_names(image_names, excel_path)
+        except OSError:
+            # Read-only folder, keep using the Excel file
+            pass
+
+    return image_names
@@ -2,6 +2,11 @@ import cv2
 import glob
 import numpy as np
 import os
+from numpy.lib.stride_tricks import sliding_window_view
+from src.config import ICON_SCALES, SCALE_SEARCH, ICON_CLASSIFY
+
+# Crops scored together by score_icons_batch, bounds the window matrix memory
+BATCH_CHUNK_SIZE = 64
 
 
 def load_icons():
@@ -19,136 +24,627 @@ def load_icons():
     return icons
 
 
-def match_icon(crop, icons, threshold=0.5, scales=None, method=cv2.TM_CCOEFF_NORMED):
+def get_scales(region):
+    """
+    Get the scales used to match icons in a card region.
+    Args:
+        region (str): The card region ("type", "weakness" or "attack").
+    Returns:
+        numpy.ndarray: The scales to use for matching.
+    """
+    start, stop, num = ICON_SCALES[region]
+    return np.linspace(start, stop, num)
+
+
+class IconBank:
+    """
+    Pre-scaled icon templates, built once and shared by every matching pass.
+    Each (icon, scale, interpolation) variant is resized only once, together
+    with its size, instead of on every crop of every card.
+    """
+
+    def __init__(self, icons, scales=None, interpolation=cv2.INTER_AREA):
+        """
+        Args:
+            icons (dict): A dictionary of icons from load_icons().
+            scales (iterable): The scales to prepare, default to all ICON_SCALES.
+            interpolation (int): The interpolation used to resize the icons.
+        """
+        self.icons = icons
+        self.templates = {}
+
+        if scales is None:
+            scales = np.concatenate([get_scales(region) for region in ICON_SCALES])
+
+        for scale in scales:
+            for name in icons:
+                self.get(name, scale, interpolation)
+
+    def __len__(self):
+        return len(self.icons)
+
+    def get(self, name, scale, interpolation=cv2.INTER_AREA):
+        """
+        Get a resized icon, resizing and storing it on first use.
+        Args:
+            name (str): The icon name.
+            scale (float): The scale of the icon.
+            interpolation (int): The interpolation used to resize the icon.
+        Returns:
+            dict: The template with "image", "width" and "height",
+                "image" is None when the scaled size is zero.
+        """
+        key = (name, round(float(scale), 6), interpolation)
+        template = self.templates.get(key)
+        if template is not None:
+            return template
+
+        icon = self.icons[name]
+        new_width = int(icon.shape[1] * scale)
+        new_height = int(icon.shape[0] * scale)
+
+        if new_width == 0 or new_height == 0:
+            resized_icon = None
+        else:
+            resized_icon = cv2.resize(
+                icon, (new_width, new_height), interpolation=interpolation
+            )
+
+        template = {
+            "image": resized_icon,
+            "width": new_width,
+            "height": new_height,
+        }
+        self.templates[key] = template
+        return template
+
+
+def build_icon_bank(icons=None):
+    """
+    Build the icon bank from the type-icons folder.
+    Args:
+        icons (dict): A dictionary of icons, load from type-icons if None.
+    Returns:
+        IconBank: The pre-scaled icon templates.
+    """
+    if icons is None:
+        icons = load_icons()
+    return IconBank(icons)
+
+
+def _as_icon_bank(icons):
+    # Accept a plain icon dictionary as well as a pre-built bank
+    if isinstance(icons, IconBank):
+        return icons
+    return IconBank(icons, scales=[])
+
+
+class ScaleSearch:
+    """
+    Opt-in coarse-to-fine icon scale search, shared by the cards of a run.
+    Icons are first matched on a half resolution pyramid level, and only the
+    icon/scale pairs scoring close to the threshold there are matched at full
+    resolution. The cards of a folder share one resolution, so once enough
+    matches were seen, only the most matched scale and its neighbours are
+    tried.
+    """
+
+    def __init__(self, margin=None, warmup=None, spread=None):
+        """
+        Args:
+            margin (float): How far below the threshold a half resolution
+                score may be and still be matched at full resolution.
+            warmup (int): The matches to see before narrowing the scales.
+            spread (int): The scales kept on each side of the best one.
+        """
+        self.margin = SCALE_SEARCH["margin"] if margin is None else margin
+        self.warmup = SCALE_SEARCH["warmup"] if warmup is None else warmup
+        self.spread = SCALE_SEARCH["spread"] if spread is None else spread
+        # Match count of every scale, per scale range
+        self.hits = {}
+
+    @staticmethod
+    def _key(scales):
+        return tuple(round(float(scale), 6) for scale in scales)
+
+    def narrow(self, scales):
+        """
+        Get the scales worth trying for a scale range.
+        Args:
+            scales (numpy.ndarray): The full scale range.
+        Returns:
+            numpy.ndarray: The learned best scale and its neighbours, the full
+                range until warmup matches were seen.
+        """
+        counts = self.hits.get(self._key(scales))
+        if counts is None or counts.sum() < self.warmup:
+            return scales
+
+        best = int(np.argmax(counts))
+        return scales[max(best - self.spread, 0) : best + self.spread + 1]
+
+    def observe(self, scales, scale):
+        """
+        Record a match.
+        Args:
+            scales (numpy.ndarray): The full scale range.
+            scale (float): The scale of the match.
+        """
+        counts = self.hits.setdefault(self._key(scales), np.zeros(len(scales)))
+        counts[int(np.argmin(np.abs(np.asarray(scales) - scale)))] += 1
+
+    def candidates(self, crop, bank, scales, threshold):
+        """
+        Match every icon and scale on the half resolution level.
+        Args:
+            crop (numpy.ndarray): The image to search for icons.
+            bank (IconBank): The pre-scaled icon bank.
+            scales (numpy.ndarray): The scales to try.
+            threshold (float): The threshold for matching icons.
+        Returns:
+            list: (name, scale) pairs to match at full resolution, in
+                scale-major order.
+        """
+        small = cv2.pyrDown(crop)
+        pairs = []
+
+        for scale in scales:
+            for name in bank.icons:
+                small_icon = bank.get(name, scale / 2)["image"]
+
+                # Too small or too large to judge at half resolution
+                if (
+                    small_icon is None
+                    or min(small_icon.shape[:2]) < 4
+                    or small_icon.shape[0] > small.shape[0]
+                    or small_icon.shape[1] > small.shape[1]
+                ):
+                    pairs.append((name, scale))
+                    continue
+
+                res = cv2.matchTemplate(small, small_icon, cv2.TM_CCOEFF_NORMED)
+                if res.max() >= threshold - self.margin:
+                    pairs.append((name, scale))
+
+        return pairs
+
+
+def get_hue_histogram(img):
+    """
+    Hue histogram of the saturated pixels of an image, in 18 bins of 10.
+    Args:
+        img (numpy.ndarray): The image in BGR.
+    Returns:
+        tuple: (histogram, pixel count), the histogram holds pixel counts.
+    """
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    saturated = (hsv[..., 1] > 80) & (hsv[..., 2] > 60)
+    histogram = np.bincount(hsv[..., 0][saturated] // 10, minlength=18)
+    return histogram, saturated.size
+
+
+class IconClassifier:
+    """
+    Opt-in early exit mode of match_icon for one icon per crop, shared by the
+    cards of a run. Icons are tried most matched first, the search stops once
+    an icon scores the confidence ceiling, and colored icons whose hues barely
+    appear in the crop are skipped.
+    """
+
+    def __init__(self, ceiling=None, min_hue_share=None):
+        """
+        Args:
+            ceiling (float): Score above which no other icon is tried.
+            min_hue_share (float): The share of the crop a colored icon's hues
+                must cover for the icon to be tried.
+        """
+        self.ceiling = ICON_CLASSIFY["ceiling"] if ceiling is None else ceiling
+        self.min_hue_share = (
+            ICON_CLASSIFY["min_hue_share"] if min_hue_share is None else min_hue_share
+        )
+        # Match count of every icon in the run
+        self.counts = {}
+        # Hue bins of every colored icon, None for gray icons
+        self.hue_bins = {}
+
+    def _get_hue_bins(self, bank, name):
+        if name not in self.hue_bins:
+            histogram, size = get_hue_histogram(bank.icons[name])
+
+            # Gray icons (colorless, metal) are never pruned
+            if histogram.sum() < 0.3 * size:
+                self.hue_bins[name] = None
+            else:
+                bins = histogram / histogram.sum() >= 0.05
+                # Allow for the hue shift of the card print
+                self.hue_bins[name] = bins | np.roll(bins, 1) | np.roll(bins, -1)
+        return self.hue_bins[name]
+
+    def arrange(self, crop, bank, pairs):
+        """
+        Order the icon/scale pairs icon by icon, most matched icon first, and
+        drop the icons the crop colors rule out.
+        Args:
+            crop (numpy.ndarray): The image to search for icons.
+            bank (IconBank): The pre-scaled icon bank.
+            pairs (list): (name, scale) pairs to try.
+        Returns:
+            list: The pairs to try, in order.
+        """
+        histogram, size = get_hue_histogram(crop)
+
+        names = []
+        for name in dict.fromkeys(name for name, _ in pairs):
+            bins = self._get_hue_bins(bank, name)
+            if bins is None or histogram[bins].sum() >= self.min_hue_share * size:
+                names.append(name)
+
+        # Stable sort keeps the bank order among equally matched icons
+        names.sort(key=lambda name: -self.counts.get(name, 0))
+        rank = {name: i for i, name in enumerate(names)}
+
+        return sorted(
+            (pair for pair in pairs if pair[0] in rank),
+            key=lambda pair: rank[pair[0]],
+        )
+
+    def observe(self, name):
+        """
+        Record a match.
+        Args:
+            name (str): The matched icon.
+        """
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+
+def match_icon(
+    crop,
+    icons,
+    threshold=0.5,
+    scales=None,
+    method=cv2.TM_CCOEFF_NORMED,
+    search=None,
+    classifier=None,
+):
     """
     Match a crop against all icons. Returns the best match name and score.
     Args:
         crop (numpy.ndarray): The image to search for icons.
-        icons (dict): A dictionary of icons to search for.
+        icons (dict | IconBank): The icons or the pre-scaled icon bank.
         threshold (float): The threshold for matching icons.
         scales (numpy.ndarray): The scales to use for matching.
         method (int): The matching method to use.
+        search (ScaleSearch): Coarse-to-fine scale search (optional).
+        classifier (IconClassifier): Early exit and pruning (optional).
     Returns:
         tuple: The best match name and score.
     """
     best_score = -1 if method != cv2.TM_SQDIFF_NORMED else 1.1
     best_type = None
+    best_scale = None
+    best_rank = None
+    bank = _as_icon_bank(icons)
 
     # Scales around 0.25
     if scales is None:
-        scales = np.linspace(0.25, 0.35, 5)
-
-    for scale in scales:
-        # Try to match each icon and the best one will be returned
-        for name, icon in icons.items():
-            # Resize icon
-            new_width = int(icon.shape[1] * scale)
-            new_height = int(icon.shape[0] * scale)
-            resized_icon = cv2.resize(
-                icon, (new_width, new_height), interpolation=cv2.INTER_AREA
-            )
+        scales = get_scales("type")
+
+    if search is None:
+        pairs = [(name, scale) for scale in scales for name in bank.icons]
+    else:
+        pairs = search.candidates(crop, bank, search.narrow(scales), threshold)
 
-            if (
-                resized_icon.shape[0] > crop.shape[0]
-                or resized_icon.shape[1] > crop.shape[1]
-            ):
-                continue
+    # Position in the exhaustive order, ties go to the first as without
+    # the classifier
+    ranks = {pair: rank for rank, pair in enumerate(pairs)}
+    if classifier is not None:
+        pairs = classifier.arrange(crop, bank, pairs)
 
+    # Try to match each icon and the best one will be returned
+    for i, (name, scale) in enumerate(pairs):
+        # Get the resized icon from the bank
+        resized_icon = bank.get(name, scale)["image"]
+
+        if (
+            resized_icon.shape[0] <= crop.shape[0]
+            and resized_icon.shape[1] <= crop.shape[1]
+        ):
             res = cv2.matchTemplate(crop, resized_icon, cv2.TM_CCOEFF_NORMED)
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
 
-            if max_val > best_score:
+            rank = ranks[(name, scale)]
+            if max_val > best_score or (max_val == best_score and rank < best_rank):
                 best_score = max_val
                 best_type = name
+                best_scale = scale
+                best_rank = rank
+
+        # Every scale of the icon tried, stop if it is confident enough
+        last_of_icon = i + 1 == len(pairs) or pairs[i + 1][0] != name
+        if classifier is not None and last_of_icon:
+            if best_score >= classifier.ceiling:
+                break
 
     if best_score > threshold:
+        if search is not None:
+            search.observe(scales, best_scale)
+        if classifier is not None:
+            classifier.observe(best_type)
         return best_type
     return None
 
 
-def find_all_icons(crop, icons, threshold=0.5):
+def _window_sums(batch, height, width):
+    # Sum of every (height, width) window per channel, from integral images
+    integral = np.zeros(
+        (batch.shape[0], batch.shape[1] + 1, batch.shape[2] + 1, batch.shape[3])
+    )
+    integral[:, 1:, 1:] = batch.cumsum(axis=1).cumsum(axis=2)
+    return (
+        integral[:, height:, width:]
+        - integral[:, :-height, width:]
+        - integral[:, height:, :-width]
+        + integral[:, :-height, :-width]
+    )
+
+
+def _score_scale(batch, templates):
     """
-    Find ALL occurrences of icons in the crop.
+    TM_CCOEFF_NORMED of same-size templates over a batch of same-size crops,
+    as one matrix product of every crop window with every template.
     Args:
-        crop (numpy.ndarray): The image to search for icons.
-        icons (dict): A dictionary of icons to search for.
-        threshold (float): The threshold for matching icons.
-    Returns a list of found types, sorted by x-coordinate.
+        batch (numpy.ndarray): (crops, height, width, channels) float32.
+        templates (numpy.ndarray): (icons, h, w, channels) float32.
+    Returns:
+        numpy.ndarray: (crops, icons) best score of each template per crop.
     """
-    candidates = []
+    count, h, w, channels = templates.shape
+    area = h * w
 
-    # Scales around 0.25
-    scales = np.linspace(0.20, 0.35, 5)
+    # Zero-mean templates, the window mean then cancels out of the numerator
+    templates = templates - templates.mean(axis=(1, 2), keepdims=True)
+    templates = templates.reshape(count, -1)
+    template_norms = np.sqrt((templates.astype(np.float64) ** 2).sum(axis=1))
 
-    for name, icon in icons.items():
-        for scale in scales:
-            new_width = int(icon.shape[1] * scale)
-            new_height = int(icon.shape[0] * scale)
+    windows = sliding_window_view(batch, (h, w), axis=(1, 2))
+    windows = np.ascontiguousarray(windows.transpose(0, 1, 2, 4, 5, 3))
+    numerators = windows.reshape(-1, area * channels) @ templates.T
 
-            if new_width == 0 or new_height == 0:
-                continue
+    # Window variance over all channels, as matchTemplate computes it
+    sums = _window_sums(batch, h, w).reshape(-1, channels)
+    squares = _window_sums(batch**2, h, w).reshape(-1, channels)
+    variances = squares.sum(axis=1) - (sums**2).sum(axis=1) / area
+    denominators = np.sqrt(np.maximum(variances, 0))[:, None] * template_norms
 
-            if new_width > crop.shape[1] or new_height > crop.shape[0]:
-                continue
+    # Same handling of flat windows as matchTemplate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(
+            np.abs(numerators) < denominators,
+            numerators / denominators,
+            np.where(np.abs(numerators) < denominators * 1.125, np.sign(numerators), 0),
+        )
 
-            resized_icon = cv2.resize(
-                icon, (new_width, new_height), interpolation=cv2.INTER_AREA
-            )
+    return scores.reshape(batch.shape[0], -1, count).max(axis=1)
+
+
+def score_icons_batch(crops, icons, scales=None):
+    """
+    Score many crops against the whole icon bank at once. Every window of
+    every crop is matched with every icon of a scale by one matrix product,
+    instead of a matchTemplate call per crop, icon and scale.
+    Args:
+        crops (list): The images to search for icons.
+        icons (dict | IconBank): The icons or the pre-scaled icon bank.
+        scales (numpy.ndarray): The scales to use for matching.
+    Returns:
+        tuple: (scores, names), scores is a (crops, scales, icons) array of the
+            best TM_CCOEFF_NORMED score of each icon at each scale, -inf where
+            the icon does not fit in the crop, names are the icons in column
+            order.
+    """
+    bank = _as_icon_bank(icons)
+    names = list(bank.icons)
+
+    # Scales around 0.25
+    if scales is None:
+        scales = get_scales("type")
+
+    scores = np.full((len(crops), len(scales), len(names)), -np.inf, np.float32)
+
+    # Crops of the same region and card resolution are scored together
+    groups = {}
+    for i, crop in enumerate(crops):
+        groups.setdefault(crop.shape, []).append(i)
+
+    for shape, indices in groups.items():
+        height, width = shape[:2]
+
+        for start in range(0, len(indices), BATCH_CHUNK_SIZE):
+            chunk = indices[start : start + BATCH_CHUNK_SIZE]
+            batch = np.stack([crops[i] for i in chunk]).astype(np.float32)
+
+            for s, scale in enumerate(scales):
+                # Icons of the same scaled size share one matrix product
+                sizes = {}
+                for n, name in enumerate(names):
+                    resized_icon = bank.get(name, scale)["image"]
+                    if (
+                        resized_icon is None
+                        or resized_icon.shape[0] > height
+                        or resized_icon.shape[1] > width
+                    ):
+                        continue
+                    sizes.setdefault(resized_icon.shape, []).append(n)
+
+                for columns in sizes.values():
+                    templates = np.stack(
+                        [bank.get(names[n], scale)["image"] for n in columns]
+                    ).astype(np.float32)
+                    scores[np.ix_(chunk, [s], columns)] = _score_scale(
+                        batch, templates
+                    )[:, None, :]
+
+    return scores, names
+
+
+def match_icons_batch(crops, icons, threshold=0.5, scales=None, search=None):
+    """
+    Batch version of match_icon, returns the best match name of every crop.
+    Args:
+        crops (list): The images to search for icons.
+        icons (dict | IconBank): The icons or the pre-scaled icon bank.
+        threshold (float): The threshold for matching icons.
+        scales (numpy.ndarray): The scales to use for matching.
+        search (ScaleSearch): Only try the learned scales (optional).
+    Returns:
+        list: The best match name of every crop, None below the threshold.
+    """
+    if not crops:
+        return []
 
-            try:
-                res = cv2.matchTemplate(crop, resized_icon, cv2.TM_CCOEFF_NORMED)
-            except:
-                continue
+    # Scales around 0.25
+    if scales is None:
+        scales = get_scales("type")
+
+    tried = scales if search is None else search.narrow(scales)
+    scores, names = score_icons_batch(crops, icons, tried)
+
+    # Scale-major order, the first best wins on ties as in match_icon
+    flat = scores.reshape(len(crops), -1)
+    best = flat.argmax(axis=1)
+    best_scores = flat[np.arange(len(crops)), best]
+
+    matches = []
+    for index, score in zip(best, best_scores):
+        if score > threshold:
+            matches.append(names[index % len(names)])
+            if search is not None:
+                search.observe(scales, tried[index // len(names)])
+        else:
+            matches.append(None)
+    return matches
 
-            # Find all locations above threshold
-            locs = np.where(res >= threshold)
-            # locs is (y_indices, x_indices)
 
-            for pt in zip(*locs[::-1]):  # zip(x, y)
-                x, y = pt
-                score = res[y, x]
-                # Store: score, x, y, w, h, name
-                candidates.append((score, x, y, new_width, new_height, name))
+def _find_peaks(res, threshold):
+    """
+    Local maxima of a response map above threshold.
+    Args:
+        res (numpy.ndarray): The matchTemplate response.
+        threshold (float): The minimum score.
+    Returns:
+        tuple: (ys, xs) of the peaks in row-major order.
+    """
+    # A point is a peak when no 8-neighbour scores higher, plateaus are kept
+    peaks = (res >= threshold) & (res >= cv2.dilate(res, np.ones((3, 3), np.uint8)))
+    return np.nonzero(peaks)
 
-    # Sort candidates by score (descending)
-    candidates.sort(key=lambda x: x[0], reverse=True)
 
-    final_matches = []
+def _suppress_overlaps(boxes, max_iou=0.3):
+    """
+    Greedy non-maximum suppression of boxes sorted by score.
+    Args:
+        boxes (numpy.ndarray): (x, y, w, h) rows, best first.
+        max_iou (float): The IoU above which a box is the same icon as a
+            better box.
+    Returns:
+        list: Indices of the kept boxes, in order.
+    """
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+
+    # IoU of every pair of boxes
+    inter_w = np.maximum(
+        0, np.minimum(x2[:, None], x2[None]) - np.maximum(x1[:, None], x1[None])
+    )
+    inter_h = np.maximum(
+        0, np.minimum(y2[:, None], y2[None]) - np.maximum(y1[:, None], y1[None])
+    )
+    inter = inter_w * inter_h
+    iou = inter / (areas[:, None] + areas[None] - inter)
+
+    # A box is kept unless it overlaps a kept box, better boxes come first
+    keep = []
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if not suppressed[i]:
+            keep.append(i)
+            suppressed |= iou[i] > max_iou
+    return keep
+
+
+def find_all_icons(crop, icons, threshold=0.5, search=None):
+    """
+    Find ALL occurrences of icons in the crop.
+    Args:
+        crop (numpy.ndarray): The image to search for icons.
+        icons (dict | IconBank): The icons or the pre-scaled icon bank.
+        threshold (float): The threshold for matching icons.
+        search (ScaleSearch): Coarse-to-fine scale search (optional).
+    Returns a list of found types, sorted by x-coordinate.
+    """
+    # (scores, xs, ys, width, height, name) of the peaks of each template
+    candidates = []
+    bank = _as_icon_bank(icons)
 
-    # Accepted rects to check overlap
-    accepted_rects = []
+    # Scales around 0.25
+    scales = get_scales("attack")
 
-    def compute_iou(boxA, boxB):
-        # box: (x, y, w, h)
-        xA = max(boxA[0], boxB[0])
-        yA = max(boxA[1], boxB[1])
-        xB = min(boxA[0] + boxA[2], boxB[0] + boxB[2])
-        yB = min(boxA[1] + boxA[3], boxB[1] + boxB[3])
+    if search is None:
+        pairs = [(name, scale) for name in bank.icons for scale in scales]
+    else:
+        pairs = search.candidates(crop, bank, search.narrow(scales), threshold)
+        # Same name-major order as the exhaustive search
+        order = {name: i for i, name in enumerate(bank.icons)}
+        pairs.sort(key=lambda pair: order[pair[0]])
 
-        interArea = max(0, xB - xA) * max(0, yB - yA)
-        if interArea == 0:
-            return 0
+    # Scale of each template size, to learn from the accepted matches
+    template_scales = {}
 
-        boxAArea = boxA[2] * boxA[3]
-        boxBArea = boxB[2] * boxB[3]
+    for name, scale in pairs:
+        template = bank.get(name, scale)
+        new_width = template["width"]
+        new_height = template["height"]
 
-        iou = interArea / float(boxAArea + boxBArea - interArea)
-        return iou
+        if new_width == 0 or new_height == 0:
+            continue
 
-    for cand in candidates:
-        score, x, y, w, h, name = cand
-        box = (x, y, w, h)
+        if new_width > crop.shape[1] or new_height > crop.shape[0]:
+            continue
 
-        is_overlapping = False
-        for accepted_box in accepted_rects:
-            # If IoU is high, it's the same icon (or a slightly worse match of the same one)
-            if compute_iou(box, accepted_box) > 0.3:  # 0.3 threshold for overlap
-                is_overlapping = True
-                break
+        resized_icon = template["image"]
+        template_scales[(name, new_width, new_height)] = scale
+
+        try:
+            res = cv2.matchTemplate(crop, resized_icon, cv2.TM_CCOEFF_NORMED)
+        except:
+            continue
 
-        if not is_overlapping:
-            final_matches.append(cand)
-            accepted_rects.append(box)
+        # Only the peaks above threshold, their lower neighbours are the
+        # same icon shifted by a pixel
+        ys, xs = _find_peaks(res, threshold)
+        if len(ys):
+            candidates.append((res[ys, xs], xs, ys, new_width, new_height, name))
+
+    final_matches = []
+    if candidates:
+        scores = np.concatenate([c[0] for c in candidates])
+        boxes = np.stack(
+            [
+                np.concatenate([c[1] for c in candidates]),
+                np.concatenate([c[2] for c in candidates]),
+                np.concatenate([np.full(len(c[0]), c[3]) for c in candidates]),
+                np.concatenate([np.full(len(c[0]), c[4]) for c in candidates]),
+            ],
+            axis=1,
+        )
+        names = [c[5] for c in candidates for _ in range(len(c[0]))]
+
+        # Sort candidates by score (descending), ties keep the search order
+        order = np.argsort(-scores, kind="stable")
+        for i in _suppress_overlaps(boxes[order]):
+            x, y, w, h = (int(v) for v in boxes[order[i]])
+            final_matches.append((scores[order[i]], x, y, w, h, names[order[i]]))
 
     # Sort final matches by Y then X
     final_matches.sort(key=lambda x: x[2])  # Sort by Y
@@ -165,6 +661,10 @@ def find_all_icons(crop, icons, threshold=0.5):
     if not final_matches:
         return ["all"]
 
+    if search is not None:
+        for score, x, y, w, h, name in final_matches:
+            search.observe(scales, template_scales[(name, w, h)])
+
     final_matches.sort(key=lambda x: x[2])  # Sort by Y
 
     curr_y = final_matches[0][2]
@@ -0,0 +1,232 @@
+import os
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from src.utils import log, get_cache_path
+from src.config import NAME_TEMPLATE_SIZE, NAME_MATCH_THRESHOLD, NAME_MATCH_MARGIN
+from .ai_read_card_name import read_name_crop
+
+# In the cache folder of the application root, see get_cache_path
+TEMPLATE_FILE_NAME = "name_templates.npz"
+
+
+class NameReaderBackend(ABC):
+    """
+    Interface of the offline card name readers consulted before Gemini.
+    """
+
+    @abstractmethod
+    def read(self, crop, lang):
+        """
+        Read the card name of a name crop.
+        Args:
+            crop: The name crop.
+            lang: The language of the card name.
+        Returns:
+            tuple: (name, confidence), name is None if the crop is not
+                confidently recognized.
+        """
+
+
+def get_name_template(crop):
+    """
+    Normalize a name crop for matching, grayscale at NAME_TEMPLATE_SIZE,
+    zero mean and unit norm so a dot product is its normalized correlation.
+    Args:
+        crop: The name crop.
+    Returns:
+        np.ndarray: The flattened template.
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    gray = cv2.resize(gray, NAME_TEMPLATE_SIZE, interpolation=cv2.INTER_AREA)
+
+    template = gray.astype(np.float32).ravel()
+    template -= template.mean()
+    norm = np.linalg.norm(template)
+    return template / norm if norm else template
+
+
+class TemplateNameReader(NameReaderBackend):
+    """
+    Reads card names by matching name crops against the crops of cards
+    already named in card_names.json, in the same language. Reprints and
+    variants sharing the name artwork score near 1.0, new names fall through
+    to Gemini. With a template file, the templates are kept across runs so
+    only the newly named cards are decoded.
+    """
+
+    def __init__(
+        self,
+        threshold=NAME_MATCH_THRESHOLD,
+        margin=NAME_MATCH_MARGIN,
+        template_file=None,
+    ):
+        """
+        Args:
+            threshold (float): The minimum score of a match.
+            margin (float): The lead a match needs over other names.
+            template_file (str): Path to the saved templates (optional).
+        """
+        self.threshold = threshold
+        self.margin = margin
+        self.template_file = template_file
+        # {lang: [template, ...]}, stacked into a matrix on the first read
+        self.templates = {}
+        self.names = {}
+        self.matrices = {}
+        self.name_ids = {}
+        # {lang: {sample id: row}} of the templates added with an id
+        self.sample_rows = {}
+        self.changed = False
+
+        if template_file is not None:
+            self.load()
+
+    def has(self, sample_id, lang, name):
+        """
+        Args:
+            sample_id (str): The sample id, e.g. the image file name.
+            lang (str): The language of the card name.
+            name (str): The card name.
+        Returns:
+            bool: True if the sample is known under the same name.
+        """
+        row = self.sample_rows.get(lang, {}).get(sample_id)
+        return row is not None and self.names[lang][row] == name
+
+    def add(self, crop, lang, name, sample_id=None):
+        """
+        Add the name crop of a named card.
+        Args:
+            crop: The name crop.
+            lang: The language of the card name.
+            name: The card name.
+            sample_id: The sample id, e.g. the image file name, a sample
+                added again replaces its template (optional).
+        """
+        template = get_name_template(crop)
+        rows = self.sample_rows.setdefault(lang, {})
+        row = rows.get(sample_id) if sample_id is not None else None
+
+        if row is None:
+            self.templates.setdefault(lang, []).append(template)
+            self.names.setdefault(lang, []).append(name)
+            if sample_id is not None:
+                rows[sample_id] = len(self.names[lang]) - 1
+        else:
+            self.templates[lang][row] = template
+            self.names[lang][row] = name
+
+        self.matrices.pop(lang, None)
+        self.name_ids.pop(lang, None)
+        self.changed = True
+
+    def load(self):
+        """
+        Load the saved templates, ignored if missing, unreadable or made at
+        another NAME_TEMPLATE_SIZE.
+        """
+        if not os.path.exists(self.template_file):
+            return
+
+        size = NAME_TEMPLATE_SIZE[0] * NAME_TEMPLATE_SIZE[1]
+        try:
+            with np.load(self.template_file, allow_pickle=False) as data:
+                for i, lang in enumerate(data["langs"].tolist()):
+                    templates = data[f"templates_{i}"]
+                    if templates.shape[1] != size:
+                        continue
+                    self.templates[lang] = list(templates)
+                    self.names[lang] = data[f"names_{i}"].tolist()
+                    self.sample_rows[lang] = {
+                        sample_id: row
+                        for row, sample_id in enumerate(data[f"ids_{i}"].tolist())
+                        if sample_id
+                    }
+        except (OSError, ValueError, KeyError):
+            self.templates, self.names, self.sample_rows = {}, {}, {}
+
+    def save(self):
+        """
+        Write the templates to the template file.
+        """
+        if self.template_file is None or not self.changed:
+            return
+
+        arrays = {"langs": np.array(list(self.names), dtype=str)}
+        for i, lang in enumerate(self.names):
+            ids = [""] * len(self.names[lang])
+            for sample_id, row in self.sample_rows.get(lang, {}).items():
+                ids[row] = sample_id
+            arrays[f"templates_{i}"] = np.stack(self.templates[lang])
+            arrays[f"names_{i}"] = np.array(self.names[lang], dtype=str)
+            arrays[f"ids_{i}"] = np.array(ids, dtype=str)
+
+        os.makedirs(os.path.dirname(self.template_file) or ".", exist_ok=True)
+        np.savez(self.template_file, **arrays)
+        self.changed = False
+
+    def __len__(self):
+        return sum(len(names) for names in self.names.values())
+
+    def read(self, crop, lang):
+        if lang not in self.names:
+            return None, 0.0
+
+        # Score against every known crop of the language at once
+        if lang not in self.matrices:
+            self.matrices[lang] = np.stack(self.templates[lang])
+            _, self.name_ids[lang] = np.unique(self.names[lang], return_inverse=True)
+        scores = self.matrices[lang] @ get_name_template(crop)
+
+        best = int(np.argmax(scores))
+        name = self.names[lang][best]
+        confidence = float(scores[best])
+
+        # The runner-up with another name must be clearly behind
+        other = scores[self.name_ids[lang] != self.name_ids[lang][best]]
+        runner_up = float(other.max()) if other.size else -1.0
+
+        if confidence >= self.threshold and confidence - runner_up >= self.margin:
+            return name, confidence
+        return None, confidence
+
+
+def build_template_name_reader(samples, pbar=None, template_file=None):
+    """
+    Build a TemplateNameReader from named card images. With a template file,
+    only the images not saved under the same name yet are decoded.
+    Args:
+        samples: (image_path, lang, name) of the named cards.
+        pbar: The progress bar.
+        template_file: Path to the saved templates, default to no file. Use
+            get_cache_path(TEMPLATE_FILE_NAME) to keep them across runs.
+    Returns:
+        TemplateNameReader: The reader.
+    """
+    reader = TemplateNameReader(template_file=template_file)
+
+    decoded = 0
+    for image_path, lang, name in samples:
+        sample_id = os.path.basename(image_path)
+        if reader.has(sample_id, lang, name):
+            continue
+
+        try:
+            crop = read_name_crop(image_path)
+        except Exception as e:
+            log(f"Error processing {image_path}: {e}", pbar)
+            continue
+
+        if crop is not None:
+            reader.add(crop, lang, name, sample_id)
+            decoded += 1
+
+    reader.save()
+    log(
+        f"Local name reader knows {len(reader)} name crops, "
+        f"{decoded} decoded this run.",
+        pbar,
+    )
+
+    return reader
@@ -0,0 +1,173 @@
+import os
+import threading
+import cv2
+import numpy as np
+from src.config import NAME_HASH_DISTANCE
+from src.utils import safe_load_json, safe_dump_json, get_cache_path
+from .ai_read_card_name import read_name_crop
+from .local_name_reader import NameReaderBackend
+
+# In the cache folder of the application root, see get_cache_path
+HASH_INDEX_FILE_NAME = "name_hashes.json"
+
+# The hash keeps the 8 x 32 lowest DCT frequencies of the crop at 128 x 32,
+# name crops are wide so most of the detail runs along the width
+HASH_IMAGE_SIZE = (128, 32)
+HASH_FREQUENCIES = (8, 32)
+HASH_BITS = HASH_FREQUENCIES[0] * HASH_FREQUENCIES[1]
+
+
+def get_name_hash(crop):
+    """
+    Perceptual hash (pHash) of a name crop.
+    Args:
+        crop: The name crop.
+    Returns:
+        str: The 256-bit hash as hex.
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    gray = cv2.resize(gray, HASH_IMAGE_SIZE, interpolation=cv2.INTER_AREA)
+
+    rows, cols = HASH_FREQUENCIES
+    dct = cv2.dct(gray.astype(np.float32))[:rows, :cols].ravel()
+    bits = dct > np.median(dct[1:])
+
+    return np.packbits(bits).tobytes().hex()
+
+
+def hash_distance(hash_a, hash_b):
+    """
+    Args:
+        hash_a (str): A hash from get_name_hash.
+        hash_b (str): Another hash.
+    Returns:
+        int: The Hamming distance of the hashes in bits.
+    """
+    return (int(hash_a, 16) ^ int(hash_b, 16)).bit_count()
+
+
+class NameHashIndex(NameReaderBackend):
+    """
+    Persistent index of the perceptual hashes of named crops, per language,
+    so reprints and promos sharing the name artwork of an already named card
+    reuse its name instead of another request.
+    """
+
+    def __init__(self, index_file=None, max_distance=NAME_HASH_DISTANCE):
+        """
+        Args:
+            index_file (str): Path to the index file, default to
+                name_hashes.json in the cache folder.
+            max_distance (int): The maximum Hamming distance of a match.
+        """
+        self.index_file = index_file or get_cache_path(HASH_INDEX_FILE_NAME)
+        self.max_distance = max_distance
+        # {lang: {hash: name}}
+        self.entries = safe_load_json(self.index_file) or {}
+        self.matrices = {}
+        self.changed = False
+        # Lookups run in worker threads while names are added
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(hashes) for hashes in self.entries.values())
+
+    def _matrix(self, lang):
+        # Hashes of a language as rows of bits, rebuilt after adds
+        if lang not in self.matrices:
+            hashes = list(self.entries[lang])
+            packed = np.frombuffer(bytes.fromhex("".join(hashes)), dtype=np.uint8)
+            bits = np.unpackbits(packed).reshape(len(hashes), HASH_BITS)
+            names = [self.entries[lang][h] for h in hashes]
+            self.matrices[lang] = (bits, names)
+        return self.matrices[lang]
+
+    def lookup(self, name_hash, lang):
+        """
+        Find the name of the closest hash.
+        Args:
+            name_hash (str): The hash of the crop.
+            lang (str): The language of the card name.
+        Returns:
+            tuple: (name, distance), name is None if no hash is within
+                max_distance or the matches disagree on the name.
+        """
+        with self.lock:
+            if not self.entries.get(lang):
+                return None, HASH_BITS
+
+            known = self.entries[lang].get(name_hash)
+            if known is not None:
+                return known, 0
+
+            bits, names = self._matrix(lang)
+
+        query = np.unpackbits(np.frombuffer(bytes.fromhex(name_hash), dtype=np.uint8))
+        distances = np.count_nonzero(bits != query, axis=1)
+
+        best = int(np.argmin(distances))
+        distance = int(distances[best])
+        if distance > self.max_distance:
+            return None, distance
+
+        matches = {names[i] for i in np.flatnonzero(distances <= self.max_distance)}
+        if len(matches) > 1:
+            return None, distance
+
+        return names[best], distance
+
+    def read(self, crop, lang):
+        name, distance = self.lookup(get_name_hash(crop), lang)
+        return name, 1 - distance / HASH_BITS
+
+    def add(self, crop, lang, name):
+        """
+        Index the name crop of a named card.
+        Args:
+            crop: The name crop.
+            lang (str): The language of the card name.
+            name (str): The card name.
+        """
+        self.add_hash(get_name_hash(crop), lang, name)
+
+    def add_hash(self, name_hash, lang, name):
+        """
+        Index the hash of a named crop.
+        Args:
+            name_hash (str): The hash from get_name_hash.
+            lang (str): The language of the card name.
+            name (str): The card name.
+        """
+        # Failed and unreadable cards are not worth reusing
+        if not isinstance(name, str) or not name.strip() or name == "unknown":
+            return
+
+        with self.lock:
+            if self.entries.setdefault(lang, {}).get(name_hash) != name:
+                self.entries[lang][name_hash] = name
+                self.matrices.pop(lang, None)
+                self.changed = True
+
+    def add_image(self, image_path, lang, name):
+        """
+        Index the name crop of a named card image.
+        Args:
+            image_path (str): The path to the image.
+            lang (str): The language of the card name.
+            name (str): The card name.
+        """
+        crop = read_name_crop(image_path)
+        if crop is not None:
+            self.add(crop, lang, name)
+
+    def save(self):
+        """
+        Write the index to disk.
+        """
+        if not self.changed:
+            return
+
+        os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+        with self.lock:
+            safe_dump_json(self.entries, self.index_file)
+        self.changed = False
@@ -0,0 +1,110 @@
+import os
+import json
+
+# Journal of the names read since the last save, next to card_names.json
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def get_journal_path(output_file):
+    """
+    Get the journal path of a card names file.
+    Args:
+        output_file (str): Path to card_names.json.
+    Returns:
+        str: Path to the journal, e.g. card_names.journal.jsonl.
+    """
+    return os.path.splitext(output_file)[0] + JOURNAL_SUFFIX
+
+
+class NameJournal:
+    """
+    Append-only journal of card names, one JSON line per name, flushed as
+    each name arrives so a crash keeps every name already paid for.
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.journal_file, "a", encoding="utf-8")
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, key, lang, name):
+        """
+        Append a name to the journal.
+        Args:
+            key (str): The card key, e.g. LIZARDONex.
+            lang (str): The language, e.g. ja_JP.
+            name (str): The card name, None if the request failed.
+        """
+        line = json.dumps({"key": key, "lang": lang, "name": name}, ensure_ascii=False)
+        self.file.write(line + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def replay_journal(journal_file, data):
+    """
+    Apply the names of a journal to the card names data.
+    Args:
+        journal_file (str): Path to the journal.
+        data (dict): The card names, {key: {lang: name}}, updated in place.
+    Returns:
+        int: The number of names applied.
+    """
+    if not os.path.exists(journal_file):
+        return 0
+
+    count = 0
+    with open(journal_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                key, lang, name = entry["key"], entry["lang"], entry["name"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Line cut short by a crash
+                continue
+
+            if name is None:
+                # Failed read journaled by an older run, retried instead
+                continue
+
+            data.setdefault(key, {})[lang] = name
+            count += 1
+
+    return count
+
+
+def compact_journal(data, output_file, journal_file):
+    """
+    Save the card names and remove the journal they now contain.
+    Args:
+        data (dict): The card names, {key: {lang: name}}.
+        output_file (str): Path to card_names.json.
+        journal_file (str): Path to the journal.
+    """
+    # Replace the file at once, a crash keeps either the old or the new one.
+    # A failed write raises before the old file or the journal is touched.
+    temp_file = output_file + ".tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    os.replace(temp_file, output_file)
+
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
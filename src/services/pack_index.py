@@ -0,0 +1,84 @@
+from src.utils import log
+from .image_list import read_image_names
+
+
+class PackIndex:
+    """
+    Card membership of every pack, built once per run from the crawled
+    lists, so looking up the packs of a card is a dictionary lookup.
+    """
+
+    def __init__(self):
+        self.pack_ids = {}
+        self.pack_names = {}
+        self.ids = {}
+        self.names = {}
+
+    def add_pack(self, pack_name, image_names):
+        """
+        Add the cards of a pack to the index.
+        Args:
+            pack_name (str): The pack name.
+            image_names (list): The image names, e.g. cPK_10_000110_00_NAZONOKUSA_C.
+        """
+        ids = set()
+        names = set()
+        for name in image_names:
+            parts = name.strip().split("_")
+
+            # Extract IDs: cPK_10_008570_00 -> 008570, skip the gold cards
+            if len(parts) > 3 and parts[3] != "02":
+                ids.add(parts[2])
+
+            # Extract card names: cPK_10_000110_00_NAZONOKUSA_C -> NAZONOKUSA
+            if len(parts) > 4:
+                names.add(parts[4])
+
+        self.pack_ids[pack_name] = ids
+        self.pack_names[pack_name] = names
+
+        for card_id in ids:
+            self.ids.setdefault(card_id, []).append(pack_name)
+        for card_name in names:
+            self.names.setdefault(card_name, []).append(pack_name)
+
+    def get_packs_by_id(self, card_id):
+        """
+        Args:
+            card_id (str): The card ID, e.g. 000110.
+        Returns:
+            list: The packs containing the card, in the order they were added.
+        """
+        return list(self.ids.get(card_id, []))
+
+    def get_packs_by_name(self, card_name):
+        """
+        Args:
+            card_name (str): The card name, e.g. NAZONOKUSA.
+        Returns:
+            list: The packs containing the card, in the order they were added.
+        """
+        return list(self.names.get(card_name, []))
+
+
+def build_pack_index(excel_files, pbar=None):
+    """
+    Build the pack membership index, reading every Excel file once.
+    Args:
+        excel_files (dict): Pack name to Excel file path.
+        pbar: Progress bar for UI updates.
+    Returns:
+        PackIndex: The pack membership index, None if a file could not be read.
+    """
+    pack_index = PackIndex()
+    for pack_name, path in excel_files.items():
+        try:
+            pack_index.add_pack(pack_name, read_image_names(path))
+            log(
+                f"Loaded {len(pack_index.pack_ids[pack_name])} items for {pack_name}",
+                pbar,
+            )
+        except Exception as e:
+            log(f"Error loading {path}: {e}", pbar)
+            return None
+    return pack_index
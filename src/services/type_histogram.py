@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+from src.config import TYPE_HISTOGRAM
+from .load_match_icon import get_scales
+
+
+def get_type_histogram(img, bins=None):
+    """
+    Normalized HSV histogram of the round icon area of a type crop.
+    Args:
+        img (numpy.ndarray): The type crop or icon in BGR.
+        bins (tuple): Hue, saturation and value bins.
+    Returns:
+        numpy.ndarray: The flattened histogram, summing to 1.
+    """
+    if bins is None:
+        bins = TYPE_HISTOGRAM["bins"]
+
+    height, width = img.shape[:2]
+    mask = np.zeros((height, width), np.uint8)
+    cv2.circle(mask, (width // 2, height // 2), min(height, width) // 2 - 1, 255, -1)
+
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    histogram = cv2.calcHist(
+        [hsv], [0, 1, 2], mask, list(bins), [0, 180, 0, 256, 0, 256]
+    ).ravel()
+    total = histogram.sum()
+    return histogram / total if total else histogram
+
+
+class TypeHistogram:
+    """
+    Classifies type crops by comparing their color histogram with the
+    histograms of the type icons. Crops without a clear winner, trainer
+    cards among them, are left to template matching.
+    """
+
+    def __init__(self, icon_bank, min_score=None, margin=None, bins=None):
+        """
+        Args:
+            icon_bank (IconBank): The pre-scaled icon bank.
+            min_score (float): The histogram correlation a type needs.
+            margin (float): The lead a type needs over the runner-up.
+            bins (tuple): Hue, saturation and value bins.
+        """
+        self.min_score = TYPE_HISTOGRAM["min_score"] if min_score is None else min_score
+        self.margin = TYPE_HISTOGRAM["margin"] if margin is None else margin
+        self.bins = TYPE_HISTOGRAM["bins"] if bins is None else bins
+
+        # Icons at the middle of the type scales, the size they have on cards
+        scales = get_scales("type")
+        scale = scales[len(scales) // 2]
+        self.names = list(icon_bank.icons)
+        self.prototypes = [
+            get_type_histogram(
+                cv2.resize(
+                    icon_bank.icons[name],
+                    None,
+                    fx=scale,
+                    fy=scale,
+                    interpolation=cv2.INTER_AREA,
+                ),
+                self.bins,
+            )
+            for name in self.names
+        ]
+
+        # Crops classified by the histogram, and left to template matching
+        self.classified = 0
+        self.deferred = 0
+
+    def classify(self, crop):
+        """
+        Args:
+            crop (numpy.ndarray): The type crop in BGR.
+        Returns:
+            str: The type, None if the histogram is not conclusive.
+        """
+        histogram = get_type_histogram(crop, self.bins)
+        scores = np.array(
+            [
+                cv2.compareHist(histogram, prototype, cv2.HISTCMP_CORREL)
+                for prototype in self.prototypes
+            ]
+        )
+        best, runner_up = np.argsort(-scores)[:2]
+
+        if (
+            scores[best] >= self.min_score
+            and scores[best] - scores[runner_up] >= self.margin
+        ):
+            self.classified += 1
+            return self.names[best]
+
+        self.deferred += 1
+        return None
+
+    def pop_counts(self):
+        """
+        Returns:
+            tuple: (classified, deferred) since the last call.
+        """
+        counts = (self.classified, self.deferred)
+        self.classified = 0
+        self.deferred = 0
+        return counts
@@ -1,6 +1,7 @@
 from .messages import log, dry_run_log, update_pbar
 from .json_io import safe_load_json, safe_dump_json
 from .validation import extract_folder_prefix, extract_excel_prefix, extract_folder
+from .paths import CACHE_DIR_ENV, get_application_path, get_cache_path
 
 __all__ = [
     "log",
@@ -11,4 +12,7 @@ __all__ = [
     "extract_folder_prefix",
     "extract_excel_prefix",
     "extract_folder",
+    "CACHE_DIR_ENV",
+    "get_application_path",
+    "get_cache_path",
 ]
@@ -0,0 +1,32 @@
+import os
+import sys
+
+# Points the caches at another folder, e.g. a temporary one in tests
+CACHE_DIR_ENV = "TCGP_CACHE_DIR"
+
+
+def get_application_path():
+    """
+    Get the application root, the folder of the executable in the
+    PyInstaller build and the repository root otherwise.
+    Returns:
+        str: The application root.
+    """
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_cache_path(file_name):
+    """
+    Get the path of a cache file, in the cache folder of the application
+    root unless TCGP_CACHE_DIR is set.
+    Args:
+        file_name (str): The cache file name, e.g. card_analysis.json.
+    Returns:
+        str: The cache file path.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        get_application_path(), "cache"
+    )
+    return os.path.join(cache_dir, file_name)
@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import AnalysisCache, clear_analysis_cache, build_icon_bank
+from src.services.analysis_cache import get_analysis_fingerprint
+from src.utils import CACHE_DIR_ENV, get_application_path
+
+analysis = {
+    "type": "fire",
+    "trainer": None,
+    "weakness": "water",
+    "attackCost": ["colorless", "fire"],
+}
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.temp_dir.name, "card_analysis.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_and_reload(self):
+        cache = AnalysisCache("fingerprint", cache_file=self.cache_file)
+        cache.put("hash", analysis)
+        cache.save()
+
+        # Reload from disk
+        cache = AnalysisCache("fingerprint", cache_file=self.cache_file)
+        self.assertEqual(cache.get("hash"), analysis)
+
+        # Another fingerprint does not reuse the result
+        cache = AnalysisCache("other", cache_file=self.cache_file)
+        self.assertIsNone(cache.get("hash"))
+
+    def test_type_only_result(self):
+        cache = AnalysisCache("fingerprint", cache_file=self.cache_file)
+        cache.put("hash", {**analysis, "weakness": None}, full=False)
+
+        self.assertIsNone(cache.get("hash", full=True))
+        self.assertEqual(cache.get("hash", full=False)["type"], "fire")
+
+    def test_eviction(self):
+        cache = AnalysisCache("fingerprint", cache_file=self.cache_file, max_entries=2)
+        for file_hash in ["a", "b", "c"]:
+            cache.put(file_hash, analysis)
+        cache.entries[cache._key("a")]["used"] = 0
+        cache.save()
+
+        cache = AnalysisCache("fingerprint", cache_file=self.cache_file)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertIsNone(cache.get("a"))
+
+    def test_clear(self):
+        cache = AnalysisCache("fingerprint", cache_file=self.cache_file)
+        cache.put("hash", analysis)
+        cache.save()
+
+        clear_analysis_cache(self.cache_file)
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_default_cache_file(self):
+        # Resolved against the application root, not the working directory
+        with mock.patch.dict(os.environ, {CACHE_DIR_ENV: ""}):
+            self.assertEqual(
+                AnalysisCache("fingerprint").cache_file,
+                os.path.join(get_application_path(), "cache", "card_analysis.json"),
+            )
+
+        with mock.patch.dict(os.environ, {CACHE_DIR_ENV: self.temp_dir.name}):
+            cache = AnalysisCache("fingerprint")
+            cache.put("hash", analysis)
+            cache.save()
+        self.assertTrue(os.path.exists(self.cache_file))
+
+    def test_scale_search_fingerprint(self):
+        # Scale search results are cached apart from exhaustive ones
+        icon_bank = build_icon_bank()
+        self.assertEqual(
+            get_analysis_fingerprint(icon_bank),
+            get_analysis_fingerprint(icon_bank, scale_search=False),
+        )
+        self.assertNotEqual(
+            get_analysis_fingerprint(icon_bank),
+            get_analysis_fingerprint(icon_bank, scale_search=True),
+        )
+        self.assertNotEqual(
+            get_analysis_fingerprint(icon_bank),
+            get_analysis_fingerprint(icon_bank, early_exit=True),
+        )
+        self.assertNotEqual(
+            get_analysis_fingerprint(icon_bank),
+            get_analysis_fingerprint(icon_bank, color_histogram=True),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
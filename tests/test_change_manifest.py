@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import generate_json
+from src.services import (
+    diff_image_names,
+    merge_changes,
+    save_change_manifest,
+    load_change_manifests,
+    is_changed_image,
+)
+from src.utils import CACHE_DIR_ENV
+
+excel_paths = [
+    "./tests/A1_Charizard.xlsx",
+    "./tests/A1_Mewtwo.xlsx",
+    "./tests/A1_Pikachu.xlsx",
+]
+
+# Keep the analysis cache of the tests out of the repository
+cache_patch = None
+
+
+def setUpModule():
+    global cache_patch
+    cache_patch = mock.patch.dict(os.environ, {CACHE_DIR_ENV: tempfile.mkdtemp()})
+    cache_patch.start()
+
+
+def tearDownModule():
+    shutil.rmtree(os.environ[CACHE_DIR_ENV])
+    cache_patch.stop()
+
+
+class TestChangeManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_diff_and_load(self):
+        changes = diff_image_names(["a", "b", "c"], ["b", "c", "d", "e"])
+        self.assertEqual(changes, {"added": ["d", "e"], "removed": ["a"]})
+
+        excel_path = os.path.join(self.temp_dir, "promo-a.xlsx")
+        manifest_path = save_change_manifest(excel_path, changes)
+        self.assertEqual(
+            manifest_path, os.path.join(self.temp_dir, "promo-a.changes.json")
+        )
+        self.assertEqual(load_change_manifests([manifest_path]), changes)
+
+        with self.assertRaises(FileNotFoundError):
+            load_change_manifests([os.path.join(self.temp_dir, "missing.json")])
+
+    def test_merge_changes(self):
+        # [a, b] -> [b, c, d] -> [a, b, d, e]
+        earlier = diff_image_names(["a", "b"], ["b", "c", "d"])
+        later = diff_image_names(["b", "c", "d"], ["a", "b", "d", "e"])
+
+        # a removed then added and c added then removed cancel out
+        self.assertEqual(
+            merge_changes(earlier, later),
+            diff_image_names(["a", "b"], ["a", "b", "d", "e"]),
+        )
+
+    def test_merge_into_existing_manifest(self):
+        excel_path = os.path.join(self.temp_dir, "promo-a.xlsx")
+        save_change_manifest(excel_path, {"added": ["b"], "removed": []})
+        manifest_path = save_change_manifest(
+            excel_path, {"added": ["c"], "removed": ["a"]}
+        )
+        self.assertEqual(
+            load_change_manifests([manifest_path]),
+            {"added": ["b", "c"], "removed": ["a"]},
+        )
+
+    def test_is_changed_image(self):
+        names = {"cPK_10_000360_00_LIZARDONex_RR"}
+        self.assertTrue(
+            is_changed_image("cPK_10_000360_00_LIZARDONex_RR_M_M_ja_JP.png", names)
+        )
+        self.assertFalse(
+            is_changed_image("cPK_20_000360_00_LIZARDONex_SR_M_M_ja_JP.png", names)
+        )
+
+
+class TestIncrementalJson(unittest.TestCase):
+    def test_added_card(self):
+        with open(r"./tests/A1_expected_result.json", "r") as f:
+            expected_data = json.load(f)
+
+        # Previous run, before the card was added to the list
+        previous_result = json.loads(json.dumps(expected_data))
+        previous_result["charizard"]["fire"].remove("000360")
+        changes = {"added": ["cPK_10_000360_00_LIZARDONex_RR"], "removed": []}
+
+        result, _ = generate_json(
+            "./tests/A1-test-jp",
+            excel_paths,
+            changes=changes,
+            previous=(previous_result, {}),
+        )
+
+        self.assertEqual(result, expected_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,387 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import asyncio
+import threading
+import httpx
+import pandas as pd
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pokemon_crawler import (
+    get_set_targets,
+    get_output_file,
+    get_crawl_url,
+    parse_card_sources,
+    is_blocked_request,
+    fetch_api_cards,
+    get_api_url,
+    save_crawled_list,
+    scroll_card_grid,
+    is_card_data_response,
+    SCROLL_TIMEOUTS,
+)
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+CARD_PREVIEWS = "https://assets.pokemon-zone.com/game-assets/CardPreviews/"
+
+# Recorded card data endpoint, two pages of cards per query
+API_FIXTURE = {
+    "expansions=A1": [
+        {
+            "results": [
+                {"image": f"{CARD_PREVIEWS}cPK_10_000010_00_FUSHIGIDANE_C.webp"},
+                {"image": f"{CARD_PREVIEWS}cPK_10_000020_00_FUSHIGISOU_U.webp"},
+            ]
+        },
+        {"results": [{"image": f"{CARD_PREVIEWS}cPK_10_000030_00_FUSHIGIBANA_R.webp"}]},
+    ],
+    # Answers 404 past its last page
+    "expansions=A3": [
+        {"results": [{"image": f"{CARD_PREVIEWS}cPK_10_000010_00_FUSHIGIDANE_C.webp"}]},
+    ],
+}
+
+# Queries whose endpoint fails past the last page
+NOT_FOUND_PAST_END = {"expansions=A3"}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        page = int(params.pop("page")[0])
+        query = "&".join(f"{key}={value[0]}" for key, value in params.items())
+
+        if query not in API_FIXTURE:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        pages = API_FIXTURE[query]
+        if page > len(pages) and query in NOT_FOUND_PAST_END:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = pages[page - 1] if page <= len(pages) else {"results": []}
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCrawlerTargets(unittest.TestCase):
+    def test_set_targets(self):
+        targets = get_set_targets("A1")
+        self.assertEqual(targets[0], {"exorp": "e", "set": "A1"})
+        self.assertEqual(
+            [target["pack_name"] for target in targets[1:]],
+            ["Mewtwo", "Charizard", "Pikachu"],
+        )
+
+        # Single pack key stored as a string
+        targets = get_set_targets("A1a", expansion=False)
+        self.assertEqual(
+            targets,
+            [
+                {
+                    "exorp": "p",
+                    "set": "A1a",
+                    "pack_key": "AN002_0010_00_000",
+                    "pack_name": "Mew",
+                }
+            ],
+        )
+
+    def test_output_file_and_url(self):
+        self.assertEqual(get_output_file("e", "A1"), "A1.xlsx")
+        self.assertEqual(get_output_file("p", "A1", "Charizard"), "A1_Charizard.xlsx")
+        self.assertEqual(
+            get_crawl_url("p", "A1", "AN001_0020_00_000"),
+            "https://www.pokemon-zone.com/cards/?pack_keys=AN001_0020_00_000",
+        )
+
+
+class TestParseCardSources(unittest.TestCase):
+    def test_parse(self):
+        base = "https://assets.pokemon-zone.com/game-assets/CardPreviews/"
+        cards = [
+            {
+                "src": f"{base}cPK_10_010830_00_KAILIOS_C.webp?width=350&quality=100",
+                "alt": "Kailios",
+                "text": "",
+            },
+            {"src": f"{base}cPK_10_000360_00_LIZARDONex_RR.webp", "alt": None},
+            {"src": "broken/url", "alt": None, "text": ""},
+            {"src": None, "alt": None, "text": ""},
+            {"src": "", "alt": None, "text": ""},
+        ]
+        df = parse_card_sources(cards)
+
+        self.assertEqual(
+            df["Image Name"].tolist(),
+            [
+                "cPK_10_010830_00_KAILIOS_C",
+                "cPK_10_000360_00_LIZARDONex_RR",
+                "broken/url",
+            ],
+        )
+        self.assertEqual(df["Card ID"].tolist()[:2], ["010830", "000360"])
+        self.assertEqual(df["Rarity"].tolist()[:2], ["C", "RR"])
+
+    def test_empty(self):
+        self.assertTrue(parse_card_sources([]).empty)
+
+
+class TestBlockedRequests(unittest.TestCase):
+    def request(self, resource_type, url):
+        return SimpleNamespace(resource_type=resource_type, url=url)
+
+    def test_blocked_types(self):
+        card = "https://assets.pokemon-zone.com/game-assets/CardPreviews/a.webp"
+        self.assertTrue(is_blocked_request(self.request("image", card)))
+        self.assertTrue(is_blocked_request(self.request("font", card)))
+        self.assertFalse(
+            is_blocked_request(
+                self.request("document", "https://www.pokemon-zone.com/cards/")
+            )
+        )
+
+    def test_trim_scripts(self):
+        first_party = self.request("script", "https://www.pokemon-zone.com/app.js")
+        third_party = self.request("script", "https://ads.example.com/tag.js")
+
+        self.assertFalse(is_blocked_request(third_party))
+        self.assertTrue(is_blocked_request(third_party, trim_scripts=True))
+        self.assertFalse(is_blocked_request(first_party, trim_scripts=True))
+
+
+def fake_response(url, content_type="application/json", resource_type="xhr"):
+    return SimpleNamespace(
+        url=url,
+        headers={"content-type": content_type},
+        request=SimpleNamespace(resource_type=resource_type),
+    )
+
+
+CARD_DATA = fake_response("https://www.pokemon-zone.com/api/cards/?page=2")
+ANALYTICS = fake_response("https://analytics.example.com/collect")
+
+
+class FakeGridPage:
+    """
+    Card grid on a virtual clock in milliseconds. Each scroll requests the
+    next batch of cards, which arrives with its data response after its delay.
+    Unrelated XHR responses arrive every `noise_interval` if set.
+    """
+
+    def __init__(self, count, batches, noise_interval=None):
+        self.count = count
+        self.batches = list(batches)
+        self.noise_interval = noise_interval
+        self.clock = 0
+        self.pending = None
+        self.timeouts = []
+
+    def advance(self, to):
+        if self.pending and self.pending[0] <= to:
+            self.count += self.pending[1]
+            self.pending = None
+        self.clock = to
+
+    async def wait_for_selector(self, selector, timeout):
+        pass
+
+    def locator(self, selector):
+        async def count():
+            return self.count
+
+        return SimpleNamespace(count=count)
+
+    async def evaluate(self, script):
+        # Scrolling requests the next batch unless one is loading
+        if self.pending is None and self.batches:
+            size, delay = self.batches.pop(0)
+            self.pending = (self.clock + delay, size)
+
+    async def wait_for_function(self, expression, arg, timeout):
+        self.timeouts.append(timeout)
+        if self.pending and self.pending[0] <= self.clock + timeout:
+            self.advance(max(self.clock, self.pending[0]))
+            return
+        self.advance(self.clock + timeout)
+        raise PlaywrightTimeoutError("Timeout")
+
+    async def wait_for_response(self, predicate, timeout):
+        end = self.clock + timeout
+        events = []
+        if self.pending:
+            events.append((self.pending[0], CARD_DATA))
+        if self.noise_interval:
+            noise_time = self.clock + self.noise_interval
+            while noise_time <= end:
+                events.append((noise_time, ANALYTICS))
+                noise_time += self.noise_interval
+
+        for event_time, response in sorted(events, key=lambda event: event[0]):
+            if event_time <= end and predicate(response):
+                self.advance(max(self.clock, event_time))
+                return response
+        self.advance(end)
+        raise PlaywrightTimeoutError("Timeout")
+
+
+class TestScrollCardGrid(unittest.TestCase):
+    def scroll(self, page):
+        with mock.patch("builtins.print"):
+            return asyncio.run(scroll_card_grid(page))
+
+    def test_card_data_response(self):
+        self.assertTrue(is_card_data_response(CARD_DATA))
+        self.assertFalse(is_card_data_response(ANALYTICS))
+        self.assertFalse(
+            is_card_data_response(
+                fake_response("https://www.pokemon-zone.com/", "text/html", "document")
+            )
+        )
+
+    def test_late_cards_after_backoff(self):
+        # The first batch misses the short timeout and the data response wait
+        page = FakeGridPage(20, [(20, SCROLL_TIMEOUTS[0] * 2.5), (20, 100)])
+
+        # Only the scrolls loading cards count against the limit
+        with mock.patch("scripts.pokemon_crawler.MAX_SCROLLS", 2):
+            result = self.scroll(page)
+
+        self.assertEqual(page.count, 60)
+        self.assertIn(SCROLL_TIMEOUTS[0] * 2, page.timeouts)
+        self.assertGreater(result["scrolls"], 2)
+
+    def test_stop_at_bottom(self):
+        page = FakeGridPage(20, [])
+        result = self.scroll(page)
+
+        # Backs off up to the longest timeout, then stops
+        self.assertEqual(page.timeouts[-1], SCROLL_TIMEOUTS[-1])
+        self.assertEqual(page.timeouts.count(SCROLL_TIMEOUTS[-1]), 1)
+        self.assertEqual(result["scrolls"], len(page.timeouts))
+
+    def test_unrelated_traffic(self):
+        quiet = FakeGridPage(20, [(20, 100)])
+        busy = FakeGridPage(20, [(20, 100)], noise_interval=300)
+        quiet_result = self.scroll(quiet)
+        busy_result = self.scroll(busy)
+
+        # Analytics responses do not extend the waits at the bottom
+        self.assertEqual(busy.count, 40)
+        self.assertEqual(busy_result["scrolls"], quiet_result["scrolls"])
+        self.assertEqual(busy.clock, quiet.clock)
+
+
+class TestApiFastPath(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        port = cls.server.server_address[1]
+        cls.api_url = f"http://127.0.0.1:{port}/api/cards/?{{query}}&page={{page}}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def fetch(self, target):
+        async def run():
+            async with httpx.AsyncClient() as client:
+                return await fetch_api_cards(client, self.api_url, target)
+
+        return asyncio.run(run())
+
+    def test_api_url(self):
+        target = {"exorp": "p", "set": "A1", "pack_key": "AN001_0020_00_000"}
+        self.assertTrue(
+            get_api_url(self.api_url, target, 2).endswith(
+                "?pack_keys=AN001_0020_00_000&page=2"
+            )
+        )
+
+    def test_fetch_pages(self):
+        cards = self.fetch({"exorp": "e", "set": "A1"})
+        self.assertEqual(
+            cards["Image Name"].tolist(),
+            [
+                "cPK_10_000010_00_FUSHIGIDANE_C",
+                "cPK_10_000020_00_FUSHIGISOU_U",
+                "cPK_10_000030_00_FUSHIGIBANA_R",
+            ],
+        )
+
+    def test_fetch_failure(self):
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.fetch({"exorp": "e", "set": "A2"})
+
+    def test_not_found_past_last_page(self):
+        cards = self.fetch({"exorp": "e", "set": "A3"})
+        self.assertEqual(
+            cards["Image Name"].tolist(), ["cPK_10_000010_00_FUSHIGIDANE_C"]
+        )
+
+    def test_page_limit(self):
+        # Every page has new cards, the list would be cut short
+        with mock.patch("scripts.pokemon_crawler.MAX_API_PAGES", 1):
+            with self.assertRaises(ValueError):
+                self.fetch({"exorp": "e", "set": "A1"})
+
+
+class TestIncrementalSave(unittest.TestCase):
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir)
+
+    def test_unchanged_crawl_keeps_manifest(self):
+        save_crawled_list(pd.DataFrame({"Image Name": ["a"]}), "A1.xlsx")
+        save_crawled_list(
+            pd.DataFrame({"Image Name": ["a", "b"]}), "A1.xlsx", incremental=True
+        )
+
+        # A second crawl before the first manifest is used
+        save_crawled_list(
+            pd.DataFrame({"Image Name": ["a", "b"]}), "A1.xlsx", incremental=True
+        )
+        with open(os.path.join("lists", "A1.changes.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["added"], ["b"])
+
+    def test_changed_crawls_merge_manifest(self):
+        save_crawled_list(pd.DataFrame({"Image Name": ["a"]}), "A1.xlsx")
+        save_crawled_list(
+            pd.DataFrame({"Image Name": ["a", "b"]}), "A1.xlsx", incremental=True
+        )
+
+        # Another change before the first manifest is used keeps b
+        save_crawled_list(
+            pd.DataFrame({"Image Name": ["b", "c"]}), "A1.xlsx", incremental=True
+        )
+        with open(os.path.join("lists", "A1.changes.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["added"], ["b", "c"])
+        self.assertEqual(manifest["removed"], ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.gen_card_name_list import get_card_key, plan_name_requests
+from scripts.gen_card_name_list import gen_card_name_list
+
+image_folder = "./tests/A1-test-jp"
+
+
+class TestGenCardNameList(unittest.TestCase):
+    def setUp(self):
+        self.image_paths = [
+            os.path.join(image_folder, name) for name in os.listdir(image_folder)
+        ]
+
+    def test_card_key(self):
+        self.assertEqual(
+            get_card_key("cPK_10_000360_00_LIZARDONex_RR_M_M_ja_JP.png"),
+            "LIZARDONex",
+        )
+        self.assertEqual(get_card_key("card.png"), "card.png")
+
+    def test_one_request_per_key(self):
+        groups = plan_name_requests(self.image_paths, {}, "ja_JP")
+        keys = {get_card_key(path) for path in self.image_paths}
+
+        # Every image is planned once, grouped under its own key
+        self.assertEqual(set(groups), keys)
+        self.assertEqual(
+            sorted(path for paths in groups.values() for path in paths),
+            sorted(self.image_paths),
+        )
+        for key, paths in groups.items():
+            self.assertTrue(all(get_card_key(path) == key for path in paths))
+            self.assertEqual(paths, sorted(paths))
+
+        # Variants sharing a card name need fewer requests than images
+        self.assertLess(len(groups), len(self.image_paths))
+
+    def test_skip_named_keys(self):
+        existing_data = {
+            "BUTTERFREE": {"ja_JP": "バタフリー"},
+            "CATERPIE": {"en_US": "Caterpie"},
+        }
+        groups = plan_name_requests(self.image_paths, existing_data, "ja_JP")
+
+        # Named in this language are skipped, named in others still read
+        self.assertNotIn("BUTTERFREE", groups)
+        self.assertIn("CATERPIE", groups)
+
+    def test_retry_failed_keys(self):
+        existing_data = {"BUTTERFREE": {"ja_JP": None}}
+        groups = plan_name_requests(self.image_paths, existing_data, "ja_JP")
+
+        # A name that failed to be read is planned again
+        self.assertIn("BUTTERFREE", groups)
+
+
+class TestGenCardNameListRun(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_gen(self, read_card_names):
+        with mock.patch.dict(os.environ, {"GOOGLE_API_KEY": "test"}), mock.patch(
+            "scripts.gen_card_name_list.get_application_path",
+            return_value=self.temp_dir,
+        ), mock.patch("scripts.gen_card_name_list.genai.Client"), mock.patch(
+            "scripts.gen_card_name_list.read_card_names", read_card_names
+        ):
+            names = gen_card_name_list(image_folder, "ja_JP", local=False)
+
+        with open(
+            os.path.join(self.temp_dir, "json", "card_names.json"), encoding="utf-8"
+        ) as f:
+            return names, json.load(f)
+
+    def test_returns_read_names(self):
+        async def read_card_names(image_paths, lang, client, on_result, **kwargs):
+            for i, path in enumerate(image_paths):
+                on_result(i, get_card_key(path).lower())
+
+        names, saved = self.run_gen(read_card_names)
+
+        # One name per card key, returned and saved
+        self.assertEqual(len(names), len(saved))
+        self.assertEqual(sorted(names), sorted(key.lower() for key in saved))
+
+    def test_retry_failed_reads(self):
+        requested = []
+
+        async def read_card_names(image_paths, lang, client, on_result, **kwargs):
+            # The first read of each card fails, e.g. a quota error
+            for i, path in enumerate(image_paths):
+                key = get_card_key(path)
+                on_result(i, key.lower() if key in requested else None)
+                requested.append(key)
+
+        names, saved = self.run_gen(read_card_names)
+        self.assertTrue(names)
+        self.assertTrue(all(name is None for name in names))
+        self.assertEqual(saved, {})
+
+        # The rerun reads the failed cards again
+        names, saved = self.run_gen(read_card_names)
+        self.assertEqual(len(names), len(requested) // 2)
+        self.assertEqual(saved, {key: {"ja_JP": key.lower()} for key in set(requested)})
+
+
+if __name__ == "__main__":
+    unittest.main()
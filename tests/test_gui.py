@@ -12,17 +12,30 @@ sys.path.append(scripts_dir)
 # TCGPToolGUI uses relative path "src\gui\gui.ui", so we might need to change cwd
 # However, for now assuming running from scripts dir as per plan
 
+import importlib
 from unittest.mock import MagicMock
 
+
+def mock_missing_module(*names):
+    """
+    Mock a dependency only when it is not installed, so the test modules
+    collected after this one still import the real package.
+    Args:
+        names (str): The module and its submodules to mock.
+    """
+    try:
+        importlib.import_module(names[-1])
+    except ImportError:
+        mock_module = MagicMock()
+        for name in names:
+            sys.modules[name] = mock_module
+
+
 # Mock playwright to avoid dependency issues during GUI testing
-mock_playwright = MagicMock()
-sys.modules["playwright"] = mock_playwright
-sys.modules["playwright.async_api"] = mock_playwright
+mock_missing_module("playwright", "playwright.async_api")
 
 # Mock google.genai to avoid dependency issues
-mock_google = MagicMock()
-sys.modules["google"] = mock_google
-sys.modules["google.genai"] = mock_google
+mock_missing_module("google", "google.genai")
 
 from tcgp_tool_gui import TCGPToolGUI
 from PyQt6.QtWidgets import QMessageBox
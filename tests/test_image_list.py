@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import pandas as pd
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import read_image_names, save_image_names
+from src.services.image_list import get_sidecar_path
+
+
+class TestImageList(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.excel_path = os.path.join(self.temp_dir, "A1_Charizard.xlsx")
+        shutil.copy("./tests/A1_Charizard.xlsx", self.excel_path)
+        self.sidecar_path = get_sidecar_path(self.excel_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sidecar_matches_excel(self):
+        df = pd.read_excel(self.excel_path)
+        expected = df["Image Name"].dropna().astype(str).tolist()
+
+        # First read parses the Excel file and writes the sidecar
+        self.assertEqual(
+            read_image_names(self.excel_path, write_sidecar=True), expected
+        )
+        self.assertTrue(os.path.exists(self.sidecar_path))
+
+        # Second read comes from the sidecar
+        with mock.patch("pandas.read_excel") as read_excel:
+            self.assertEqual(read_image_names(self.excel_path), expected)
+        read_excel.assert_not_called()
+
+    def test_no_sidecar_outside_lists(self):
+        read_image_names(self.excel_path)
+        self.assertFalse(os.path.exists(self.sidecar_path))
+
+        # The crawler output folder gets one
+        lists_dir = os.path.join(self.temp_dir, "lists")
+        os.makedirs(lists_dir)
+        excel_path = os.path.join(lists_dir, "A1_Charizard.xlsx")
+        shutil.copy(self.excel_path, excel_path)
+        read_image_names(excel_path)
+        self.assertTrue(os.path.exists(get_sidecar_path(excel_path)))
+
+    def test_stale_sidecar(self):
+        save_image_names(["stale"], self.excel_path)
+        self.assertEqual(read_image_names(self.excel_path), ["stale"])
+
+        # The Excel file was written again, read it again
+        mtime = os.stat(self.excel_path).st_mtime_ns
+        os.utime(self.excel_path, ns=(mtime + 10**9, mtime + 10**9))
+        self.assertNotEqual(read_image_names(self.excel_path), ["stale"])
+
+    def test_resized_excel(self):
+        save_image_names(["stale"], self.excel_path)
+        mtime = os.stat(self.excel_path).st_mtime_ns
+
+        # Same modification time, but another size
+        pd.DataFrame({"Image Name": ["a", "b"]}).to_excel(self.excel_path, index=False)
+        os.utime(self.excel_path, ns=(mtime, mtime))
+        self.assertEqual(read_image_names(self.excel_path), ["a", "b"])
+
+    def test_missing_column(self):
+        pd.DataFrame({"Name": ["a"]}).to_excel(self.excel_path, index=False)
+        with self.assertRaises(KeyError):
+            read_image_names(self.excel_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,246 @@
+import unittest
+import unittest.mock
+import os
+import sys
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import load_icons, build_icon_bank, match_icon, find_all_icons
+from src.services import get_scales, read_card_image, crop_card_region, analyze_card
+from src.services import match_icons_batch, score_icons_batch, analyze_card_images
+from src.services import analyze_card_image, ScaleSearch, IconClassifier
+from src.services.analyze_card import get_weakness_crop
+from src.services.load_match_icon import _find_peaks, _suppress_overlaps
+
+image_folder = r"./tests/A1-test-jp"
+image_path = r"./tests/A1-test-jp/cPK_10_000360_00_LIZARDONex_RR_M_M_ja_JP.png"
+trainer_path = r"./tests/A1-test-jp/cTR_10_000080_00_KAINOKASEKI_C_M_M_ja_JP.png"
+
+
+class TestIconBank(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.icons = load_icons()
+        cls.icon_bank = build_icon_bank(cls.icons)
+        cls.img = read_card_image(image_path)
+
+    def test_templates_are_prescaled(self):
+        for scale in get_scales("type"):
+            for name, icon in self.icons.items():
+                template = self.icon_bank.get(name, scale)
+                expected = cv2.resize(
+                    icon,
+                    (int(icon.shape[1] * scale), int(icon.shape[0] * scale)),
+                    interpolation=cv2.INTER_AREA,
+                )
+                np.testing.assert_array_equal(template["image"], expected)
+
+    def test_match_icon_same_as_icons(self):
+        crop = crop_card_region(self.img, "type")
+        self.assertEqual(match_icon(crop, self.icon_bank), match_icon(crop, self.icons))
+        self.assertEqual(match_icon(crop, self.icon_bank), "fire")
+
+    def test_find_all_icons_same_as_icons(self):
+        crop = crop_card_region(self.img, "attack")
+        self.assertEqual(
+            find_all_icons(crop, self.icon_bank), find_all_icons(crop, self.icons)
+        )
+
+    def test_analyze_card(self):
+        self.assertEqual(
+            analyze_card(image_path, self.icon_bank),
+            {
+                "type": "fire",
+                "trainer": None,
+                "weakness": "water",
+                "attackCost": ["colorless", "fire"],
+            },
+        )
+        self.assertEqual(
+            analyze_card(trainer_path, self.icon_bank, full=False),
+            {"type": None, "trainer": "blue", "weakness": None, "attackCost": None},
+        )
+
+
+class TestBatchMatching(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.icon_bank = build_icon_bank()
+        cls.imgs = [
+            read_card_image(os.path.join(image_folder, name))
+            for name in sorted(os.listdir(image_folder))
+        ]
+
+    def test_type_same_as_match_icon(self):
+        crops = [crop_card_region(img, "type") for img in self.imgs]
+        self.assertEqual(
+            match_icons_batch(crops, self.icon_bank),
+            [match_icon(crop, self.icon_bank) for crop in crops],
+        )
+
+    def test_weakness_same_as_match_icon(self):
+        crops = [get_weakness_crop(img) for img in self.imgs]
+        scales = get_scales("weakness")
+        self.assertEqual(
+            match_icons_batch(crops, self.icon_bank, threshold=0.3, scales=scales),
+            [
+                match_icon(crop, self.icon_bank, threshold=0.3, scales=scales)
+                for crop in crops
+            ],
+        )
+
+    def test_scores_same_as_match_template(self):
+        crops = [crop_card_region(img, "type") for img in self.imgs[:5]]
+        scales = get_scales("type")
+        scores, names = score_icons_batch(crops, self.icon_bank, scales)
+
+        self.assertEqual(scores.shape, (len(crops), len(scales), len(names)))
+        for k, crop in enumerate(crops):
+            for s, scale in enumerate(scales):
+                for n, name in enumerate(names):
+                    icon = self.icon_bank.get(name, scale)["image"]
+                    if icon.shape[0] > crop.shape[0] or icon.shape[1] > crop.shape[1]:
+                        self.assertEqual(scores[k, s, n], -np.inf)
+                        continue
+                    res = cv2.matchTemplate(crop, icon, cv2.TM_CCOEFF_NORMED)
+                    self.assertAlmostEqual(scores[k, s, n], res.max(), places=5)
+
+    def test_analyze_card_images_same_as_single(self):
+        imgs = self.imgs[::10]
+        self.assertEqual(
+            analyze_card_images(imgs, self.icon_bank),
+            [analyze_card_image(img, self.icon_bank) for img in imgs],
+        )
+
+
+class TestScaleSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.icon_bank = build_icon_bank()
+        cls.imgs = [
+            read_card_image(os.path.join(image_folder, name))
+            for name in sorted(os.listdir(image_folder))
+        ]
+
+    def test_narrow_after_warmup(self):
+        search = ScaleSearch(warmup=3, spread=1)
+        scales = get_scales("attack")
+
+        # Every scale until enough matches were seen
+        search.observe(scales, scales[0])
+        search.observe(scales, scales[0])
+        np.testing.assert_array_equal(search.narrow(scales), scales)
+
+        search.observe(scales, scales[1])
+        np.testing.assert_array_equal(search.narrow(scales), scales[:2])
+
+        # Other scale ranges are learned apart
+        weakness_scales = get_scales("weakness")
+        np.testing.assert_array_equal(search.narrow(weakness_scales), weakness_scales)
+
+    def test_same_as_exhaustive(self):
+        search = ScaleSearch()
+        for img in self.imgs[::6]:
+            self.assertEqual(
+                analyze_card_image(img, self.icon_bank, search=search),
+                analyze_card_image(img, self.icon_bank),
+            )
+
+
+class TestIconClassifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.icon_bank = build_icon_bank()
+        cls.crops = [
+            crop_card_region(read_card_image(os.path.join(image_folder, name)), "type")
+            for name in sorted(os.listdir(image_folder))
+        ]
+
+    def test_same_as_exhaustive(self):
+        classifier = IconClassifier()
+        for crop in self.crops:
+            self.assertEqual(
+                match_icon(crop, self.icon_bank, classifier=classifier),
+                match_icon(crop, self.icon_bank),
+            )
+
+    def test_fewer_templates(self):
+        calls = []
+        match_template = cv2.matchTemplate
+
+        def counting(*args):
+            calls.append(1)
+            return match_template(*args)
+
+        with unittest.mock.patch("cv2.matchTemplate", counting):
+            for crop in self.crops:
+                match_icon(crop, self.icon_bank)
+            exhaustive = len(calls)
+
+            calls.clear()
+            classifier = IconClassifier()
+            for crop in self.crops:
+                match_icon(crop, self.icon_bank, classifier=classifier)
+
+        self.assertLess(len(calls), exhaustive / 2)
+
+    def test_gray_icons_never_pruned(self):
+        classifier = IconClassifier()
+        pairs = [(name, 0.25) for name in self.icon_bank.icons]
+        arranged = classifier.arrange(
+            np.zeros((40, 40, 3), np.uint8), self.icon_bank, pairs
+        )
+
+        # A crop without color only keeps the gray icons
+        for name, _ in arranged:
+            self.assertIsNone(classifier._get_hue_bins(self.icon_bank, name))
+
+
+class TestSuppression(unittest.TestCase):
+    def test_find_peaks(self):
+        res = np.zeros((5, 6), np.float32)
+        res[1, 1] = 0.9
+        res[1, 2] = 0.8
+        res[3, 4] = 0.6
+        res[3, 5] = 0.6
+        ys, xs = _find_peaks(res, 0.5)
+
+        # Shoulders are dropped, plateaus kept, in row-major order
+        self.assertEqual(list(zip(ys, xs)), [(1, 1), (3, 4), (3, 5)])
+
+    def test_suppress_overlaps(self):
+        boxes = np.array(
+            [
+                [0, 0, 10, 10],
+                [2, 0, 10, 10],
+                [20, 0, 10, 10],
+                [7, 0, 10, 10],
+                [21, 1, 10, 10],
+            ]
+        )
+        # Box 3 overlaps the suppressed box 1 only, so it is kept
+        self.assertEqual(_suppress_overlaps(boxes), [0, 2, 3])
+
+    def test_suppress_overlaps_same_as_pairwise(self):
+        rng = np.random.default_rng(0)
+        boxes = np.column_stack(
+            [rng.integers(0, 60, 200), rng.integers(0, 20, 200)]
+            + [rng.integers(15, 25, 200)] * 2
+        )
+
+        def iou(a, b):
+            w = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+            h = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+            return w * h / (a[2] * a[3] + b[2] * b[3] - w * h)
+
+        keep = []
+        for i, box in enumerate(boxes):
+            if all(iou(box, boxes[j]) <= 0.3 for j in keep):
+                keep.append(i)
+        self.assertEqual(_suppress_overlaps(boxes), keep)
+
+
+if __name__ == "__main__":
+    unittest.main()
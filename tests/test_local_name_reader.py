@@ -0,0 +1,114 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import TemplateNameReader, build_template_name_reader
+from src.services import NameReaderBackend
+from src.services.ai_read_card_name import read_name_crop
+
+image_folder = "./tests/A1-test-jp"
+
+
+class TestLocalNameReader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        names = sorted(os.listdir(image_folder))
+        cls.image_paths = {name: os.path.join(image_folder, name) for name in names}
+        cls.crops = {
+            name: read_name_crop(path) for name, path in cls.image_paths.items()
+        }
+
+        # Name the base trainers, their SR reprints share the name artwork
+        cls.reader = build_template_name_reader(
+            [
+                (path, "ja_JP", name.split("_")[4])
+                for name, path in cls.image_paths.items()
+                if name.startswith("cTR_10_")
+            ]
+        )
+
+    def crop(self, name):
+        return self.crops[name]
+
+    def test_reprint_matched(self):
+        name, confidence = self.reader.read(
+            self.crop("cTR_20_000120_00_KASUMI_SR_M_M_ja_JP.png"), "ja_JP"
+        )
+
+        self.assertEqual(name, "KASUMI")
+        self.assertGreaterEqual(confidence, self.reader.threshold)
+
+    def test_unknown_name_deferred(self):
+        # Pokemon names were never added, leave them to Gemini
+        for file_name in self.image_paths:
+            if file_name.startswith("cPK_10_"):
+                name, _ = self.reader.read(self.crop(file_name), "ja_JP")
+                self.assertIsNone(name, file_name)
+
+    def test_other_language(self):
+        name, confidence = self.reader.read(
+            self.crop("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png"), "en_US"
+        )
+
+        self.assertIsNone(name)
+        self.assertEqual(confidence, 0.0)
+
+    def test_ambiguous_crop_deferred(self):
+        # The same crop under two names is never a confident match
+        reader = TemplateNameReader()
+        crop = self.crop("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png")
+        reader.add(crop, "ja_JP", "KASUMI")
+        reader.add(crop, "ja_JP", "KATSURA")
+
+        name, _ = reader.read(crop, "ja_JP")
+        self.assertIsNone(name)
+
+    def test_backend_is_abstract(self):
+        with self.assertRaises(TypeError):
+            NameReaderBackend()
+
+    def test_saved_templates(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        template_file = os.path.join(temp_dir, "name_templates.npz")
+        samples = [
+            (path, "ja_JP", name.split("_")[4])
+            for name, path in self.image_paths.items()
+            if name.startswith("cTR_10_")
+        ]
+
+        build_template_name_reader(samples[:-1], template_file=template_file)
+
+        # The next run only decodes the sample not saved yet
+        with mock.patch(
+            "src.services.local_name_reader.read_name_crop", wraps=read_name_crop
+        ) as read_crop:
+            reader = build_template_name_reader(samples, template_file=template_file)
+        read_crop.assert_called_once_with(samples[-1][0])
+
+        self.assertEqual(len(reader), len(samples))
+        name, _ = reader.read(
+            self.crop("cTR_20_000120_00_KASUMI_SR_M_M_ja_JP.png"), "ja_JP"
+        )
+        self.assertEqual(name, "KASUMI")
+
+    def test_throughput(self):
+        crops = list(self.crops.values())
+
+        start = time.perf_counter()
+        for crop in crops:
+            self.reader.read(crop, "ja_JP")
+        elapsed = time.perf_counter() - start
+
+        # Hundreds of cards per second once decoded
+        self.assertGreater(len(crops) / elapsed, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import (
+    NameHashIndex,
+    get_name_hash,
+    hash_distance,
+    analyze_card_name,
+)
+from src.services.ai_read_card_name import read_name_crop
+
+image_folder = "./tests/A1-test-jp"
+
+
+class TestNameHashIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_file = os.path.join(self.temp_dir, "name_hashes.json")
+        self.index = NameHashIndex(self.index_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def path(self, name):
+        return os.path.join(image_folder, name)
+
+    def test_hash(self):
+        crop = read_name_crop(self.path("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png"))
+        name_hash = get_name_hash(crop)
+
+        self.assertEqual(len(name_hash), 64)
+        self.assertEqual(name_hash, get_name_hash(crop.copy()))
+        self.assertEqual(hash_distance(name_hash, name_hash), 0)
+
+    def test_reprint_reuses_name(self):
+        self.index.add_image(
+            self.path("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png"), "ja_JP", "カスミ"
+        )
+        crop = read_name_crop(self.path("cTR_20_000120_00_KASUMI_SR_M_M_ja_JP.png"))
+
+        name, _ = self.index.read(crop, "ja_JP")
+        self.assertEqual(name, "カスミ")
+
+        # Only within the same language
+        name, _ = self.index.read(crop, "en_US")
+        self.assertIsNone(name)
+
+    def test_other_name_not_reused(self):
+        self.index.add_image(
+            self.path("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png"), "ja_JP", "カスミ"
+        )
+        crop = read_name_crop(self.path("cTR_10_000130_00_KATSURA_U_M_M_ja_JP.png"))
+
+        name, _ = self.index.read(crop, "ja_JP")
+        self.assertIsNone(name)
+
+    def test_failed_names_not_indexed(self):
+        path = self.path("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png")
+        self.index.add_image(path, "ja_JP", None)
+        self.index.add_image(path, "ja_JP", "unknown")
+
+        self.assertEqual(len(self.index), 0)
+
+    def test_save_and_load(self):
+        self.index.add_image(
+            self.path("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png"), "ja_JP", "カスミ"
+        )
+        self.index.save()
+
+        index = NameHashIndex(self.index_file)
+        crop = read_name_crop(self.path("cTR_20_000120_00_KASUMI_SR_M_M_ja_JP.png"))
+        self.assertEqual(index.read(crop, "ja_JP")[0], "カスミ")
+
+    def test_analyze_card_name_skips_request(self):
+        path = self.path("cTR_10_000120_00_KASUMI_U_M_M_ja_JP.png")
+        self.index.add_image(path, "ja_JP", "カスミ")
+
+        # No client, the name can only come from the index
+        self.assertEqual(
+            analyze_card_name(path, "ja_JP", None, hash_index=self.index), "カスミ"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.services import (
+    NameJournal,
+    get_journal_path,
+    replay_journal,
+    compact_journal,
+)
+
+
+class TestNameJournal(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_file = os.path.join(self.temp_dir, "card_names.json")
+        self.journal_file = get_journal_path(self.output_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_journal_path(self):
+        self.assertEqual(
+            self.journal_file,
+            os.path.join(self.temp_dir, "card_names.journal.jsonl"),
+        )
+
+    def test_replay_written_names(self):
+        with NameJournal(self.journal_file) as journal:
+            journal.write("LIZARDONex", "ja_JP", "リザードンex")
+            journal.write("LIZARDONex", "en_US", "Charizard ex")
+
+        data = {"PIKACHU": {"en_US": "Pikachu"}}
+        count = replay_journal(self.journal_file, data)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            data,
+            {
+                "PIKACHU": {"en_US": "Pikachu"},
+                "LIZARDONex": {"ja_JP": "リザードンex", "en_US": "Charizard ex"},
+            },
+        )
+
+    def test_replay_skips_truncated_line(self):
+        with NameJournal(self.journal_file) as journal:
+            journal.write("PIKACHU", "en_US", "Pikachu")
+
+        # Simulate a crash in the middle of a write
+        with open(self.journal_file, "a", encoding="utf-8") as f:
+            f.write('{"key": "RAICHU", "lang": "en_')
+
+        data = {}
+        self.assertEqual(replay_journal(self.journal_file, data), 1)
+        self.assertEqual(data, {"PIKACHU": {"en_US": "Pikachu"}})
+
+    def test_replay_skips_failed_reads(self):
+        with NameJournal(self.journal_file) as journal:
+            journal.write("PIKACHU", "en_US", None)
+            journal.write("RAICHU", "en_US", "Raichu")
+
+        # Failed reads stay missing so they are read again
+        data = {}
+        self.assertEqual(replay_journal(self.journal_file, data), 1)
+        self.assertEqual(data, {"RAICHU": {"en_US": "Raichu"}})
+
+    def test_replay_missing_journal(self):
+        data = {}
+        self.assertEqual(replay_journal(self.journal_file, data), 0)
+        self.assertEqual(data, {})
+
+    def test_compact_saves_and_removes_journal(self):
+        with NameJournal(self.journal_file) as journal:
+            journal.write("PIKACHU", "en_US", "Pikachu")
+
+        data = {}
+        replay_journal(self.journal_file, data)
+        compact_journal(data, self.output_file, self.journal_file)
+
+        self.assertFalse(os.path.exists(self.journal_file))
+        self.assertFalse(os.path.exists(self.output_file + ".tmp"))
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"PIKACHU": {"en_US": "Pikachu"}})
+
+    def test_failed_compact_keeps_file_and_journal(self):
+        with open(self.output_file, "w", encoding="utf-8") as f:
+            json.dump({"PIKACHU": {"en_US": "Pikachu"}}, f)
+        with NameJournal(self.journal_file) as journal:
+            journal.write("MEW", "en_US", "Mew")
+
+        data = {"PIKACHU": {"en_US": "Pikachu"}}
+        replay_journal(self.journal_file, data)
+
+        # e.g. the disk is full halfway through the write
+        with mock.patch(
+            "src.services.name_journal.json.dump", side_effect=OSError("No space")
+        ):
+            with self.assertRaises(OSError):
+                compact_journal(data, self.output_file, self.journal_file)
+
+        self.assertTrue(os.path.exists(self.journal_file))
+        self.assertFalse(os.path.exists(self.output_file + ".tmp"))
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"PIKACHU": {"en_US": "Pikachu"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
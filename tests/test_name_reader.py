@@ -0,0 +1,176 @@
+import unittest
+import os
+import sys
+import re
+import json
+import time
+import asyncio
+import threading
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from google import genai
+from google.genai import types
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import read_card_names, TokenBucket, TemplateNameReader
+from src.services.ai_read_card_name import (
+    build_name_sprite,
+    parse_batch_names,
+    read_name_crop,
+)
+import src.services.ai_read_card_name as ai_read_card_name
+
+image_folder = "./tests/A1-test-jp"
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the generateContent endpoint, returning the queued
+    status codes first, then a card name.
+    """
+
+    statuses = []
+    requests = 0
+    # Drop the last tile of batch answers
+    misaligned = False
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = request["contents"][0]["parts"][0]["text"]
+        StubGeminiHandler.requests += 1
+
+        text = "LIZARDONex"
+        tiles = re.search(r"column of (\d+) tiles", prompt)
+        if tiles:
+            count = int(tiles.group(1)) - (1 if self.misaligned else 0)
+            text = json.dumps(
+                [{"tile": n, "name": f"CARD{n}"} for n in range(1, count + 1)]
+            )
+
+        status = StubGeminiHandler.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            body = {
+                "candidates": [
+                    {"content": {"role": "model", "parts": [{"text": text}]}}
+                ]
+            }
+        else:
+            body = {"error": {"code": status, "message": "stub", "status": "ERROR"}}
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestNameReader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeminiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.client = genai.Client(
+            api_key="test",
+            http_options=types.HttpOptions(
+                base_url=f"http://127.0.0.1:{cls.server.server_address[1]}"
+            ),
+        )
+        cls.image_paths = [
+            os.path.join(image_folder, name)
+            for name in sorted(os.listdir(image_folder))
+        ][:4]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubGeminiHandler.statuses = []
+        StubGeminiHandler.requests = 0
+        StubGeminiHandler.misaligned = False
+
+    def read(self, image_paths, limits=None, backends=None):
+        with mock.patch.object(ai_read_card_name, "RETRY_BASE_DELAY", 0.01):
+            return asyncio.run(
+                read_card_names(
+                    image_paths, "ja_JP", self.client, limits=limits, backends=backends
+                )
+            )
+
+    def test_retry(self):
+        # Quota and server errors are retried
+        StubGeminiHandler.statuses = [429, 503]
+        names = self.read(self.image_paths, {"concurrency": 1, "rate": 100})
+
+        self.assertEqual(names, ["LIZARDONex"] * len(self.image_paths))
+        self.assertEqual(StubGeminiHandler.requests, len(self.image_paths) + 2)
+
+    def test_no_retry(self):
+        # Bad requests fail right away
+        StubGeminiHandler.statuses = [400]
+        names = self.read(self.image_paths[:1])
+
+        self.assertEqual(names, [None])
+        self.assertEqual(StubGeminiHandler.requests, 1)
+
+    def test_local_backend(self):
+        # Crops the backend recognizes never reach Gemini
+        backend = TemplateNameReader()
+        backend.add(read_name_crop(self.image_paths[0]), "ja_JP", "フシギダネ")
+        names = self.read(self.image_paths[:2], backends=[backend])
+
+        self.assertEqual(names, ["フシギダネ", "LIZARDONex"])
+        self.assertEqual(StubGeminiHandler.requests, 1)
+
+    def test_unreadable_image(self):
+        self.assertEqual(self.read(["./tests/A1_duplicates.json"]), ["unknown"])
+        self.assertEqual(StubGeminiHandler.requests, 0)
+
+    def test_batch(self):
+        names = self.read(self.image_paths, {"batch_size": 3})
+
+        # Two requests, names mapped back in tile order
+        self.assertEqual(names, ["CARD1", "CARD2", "CARD3", "LIZARDONex"])
+        self.assertEqual(StubGeminiHandler.requests, 2)
+
+    def test_batch_fallback(self):
+        StubGeminiHandler.misaligned = True
+        names = self.read(self.image_paths, {"batch_size": 4})
+
+        # One batch request, then every card on its own
+        self.assertEqual(names, ["LIZARDONex"] * 4)
+        self.assertEqual(StubGeminiHandler.requests, 5)
+
+    def test_parse_batch_names(self):
+        answer = json.dumps([{"tile": 1, "name": "A"}, {"tile": 2, "name": "B"}])
+        self.assertEqual(parse_batch_names(answer, 2), ["A", "B"])
+        self.assertEqual(parse_batch_names(f"```json\n{answer}\n```", 2), ["A", "B"])
+        self.assertIsNone(parse_batch_names(answer, 3))
+        self.assertIsNone(parse_batch_names(json.dumps([{"tile": 2, "name": "B"}]), 1))
+        self.assertIsNone(parse_batch_names("not json", 1))
+
+    def test_name_sprite(self):
+        crops = [read_name_crop(path) for path in self.image_paths[:3]]
+        sprite = build_name_sprite(crops)
+
+        height, width = crops[0].shape[:2]
+        self.assertEqual(sprite.shape, (3 * height + 2 * 4, 48 + width, 3))
+
+    def test_token_bucket(self):
+        async def acquire_all():
+            limiter = TokenBucket(rate=50, capacity=1)
+            for _ in range(6):
+                await limiter.acquire()
+
+        start = time.monotonic()
+        asyncio.run(acquire_all())
+        # One token at start, then one every 20ms
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+
+if __name__ == "__main__":
+    unittest.main()
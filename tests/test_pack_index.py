@@ -0,0 +1,48 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import build_pack_index, check_duplicate_specific_card
+
+excel_files = {
+    "charizard": "./tests/A1_Charizard.xlsx",
+    "mewtwo": "./tests/A1_Mewtwo.xlsx",
+    "pikachu": "./tests/A1_Pikachu.xlsx",
+}
+
+
+class TestPackIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pack_index = build_pack_index(excel_files)
+
+    def test_packs_by_id(self):
+        self.assertEqual(self.pack_index.get_packs_by_id("000360"), ["charizard"])
+        self.assertEqual(self.pack_index.get_packs_by_id("999999"), [])
+
+    def test_packs_by_name(self):
+        self.assertEqual(
+            self.pack_index.get_packs_by_name("LIZARDONex"),
+            ["charizard", "mewtwo", "pikachu"],
+        )
+
+    def test_check_duplicate_specific_card(self):
+        image_path = "./tests/A1-test-jp/cPK_10_000360_00_LIZARDONex_RR_M_M_ja_JP.png"
+        expected = ("LIZARDONex", ["charizard", "mewtwo", "pikachu"])
+
+        self.assertEqual(
+            check_duplicate_specific_card(
+                image_path, excel_files, pack_index=self.pack_index
+            ),
+            expected,
+        )
+        # Without index, build it from the Excel files
+        self.assertEqual(
+            check_duplicate_specific_card(image_path, excel_files), expected
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
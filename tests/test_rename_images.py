@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.rename_images import NameMatcher, rename_folders
+from src.services import read_image_names
+
+
+class TestNameMatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.names = read_image_names("./tests/A1_Charizard.xlsx")
+        cls.matcher = NameMatcher(cls.names)
+
+    def linear_match(self, stem):
+        return next((name for name in self.names if stem in name), None)
+
+    def test_first_match(self):
+        for name in self.names:
+            parts = name.split("_")
+            # Every run of whole tokens, and a stem cut inside the tokens
+            stems = ["_".join(parts[: i + 1]) for i in range(len(parts))]
+            stems.append(name[2:-2])
+            for stem in stems:
+                self.assertEqual(self.matcher.match(stem), self.linear_match(stem))
+
+    def test_no_match(self):
+        self.assertIsNone(self.matcher.match("cPK_10_999999_00_NOTACARD"))
+        self.assertIsNone(self.matcher.match("NOTACARD"))
+
+
+class TestRenameFolders(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.folders = []
+        for language in ["A1-en", "A1-ja"]:
+            folder = os.path.join(self.temp_dir, language)
+            os.makedirs(folder)
+            for stem in ["cPK_10_000110_00_NAZONOKUSA", "000120_00_KUSAIHANA", "zzz"]:
+                open(os.path.join(folder, f"{stem}.png"), "w").close()
+            self.folders.append(folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_dry_run_matches_execution(self):
+        excel_path = "./tests/A1_Charizard.xlsx"
+
+        dry_run_plan = rename_folders(self.folders, excel_path, dry_run=True)
+        self.assertEqual(
+            dry_run_plan[self.folders[0]],
+            [
+                ("000120_00_KUSAIHANA.png", "cPK_10_000120_00_KUSAIHANA_U_A1-en.png"),
+                (
+                    "cPK_10_000110_00_NAZONOKUSA.png",
+                    "cPK_10_000110_00_NAZONOKUSA_C_A1-en.png",
+                ),
+            ],
+        )
+
+        executed_plan = rename_folders(self.folders, excel_path, dry_run=False)
+        self.assertEqual(executed_plan, dry_run_plan)
+
+        for folder in self.folders:
+            for _, new_filename in executed_plan[folder]:
+                self.assertTrue(os.path.exists(os.path.join(folder, new_filename)))
+
+        # Renaming again has nothing left to do
+        for plan in rename_folders(self.folders, excel_path).values():
+            self.assertEqual(plan, [])
+
+    def test_only_added_cards(self):
+        changes = {"added": ["cPK_10_000120_00_KUSAIHANA_U"], "removed": []}
+        plan = rename_folders(
+            self.folders, "./tests/A1_Charizard.xlsx", changes=changes
+        )
+        self.assertEqual(
+            plan[self.folders[1]],
+            [("000120_00_KUSAIHANA.png", "cPK_10_000120_00_KUSAIHANA_U_A1-ja.png")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
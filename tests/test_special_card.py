@@ -2,11 +2,30 @@ import unittest
 import os
 import sys
 import json
+import shutil
+import tempfile
+from unittest import mock
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scripts import generate_json, generate_special_card_data
+from scripts import generate_json, generate_special_card_data, generate_all_json
 from src.services import check_duplicate_cards
+from src.utils import CACHE_DIR_ENV
+
+# Keep the analysis cache of the tests out of the repository
+cache_patch = None
+
+
+def setUpModule():
+    global cache_patch
+    cache_patch = mock.patch.dict(os.environ, {CACHE_DIR_ENV: tempfile.mkdtemp()})
+    cache_patch.start()
+
+
+def tearDownModule():
+    shutil.rmtree(os.environ[CACHE_DIR_ENV])
+    cache_patch.stop()
+
 
 image_folder = r"./tests/A1-test-jp"
 duplicates_list = r"./tests/A1_duplicates.json"
@@ -76,5 +95,32 @@ class TestSpecialCard(unittest.TestCase):
         self.assertEqual(result, expected_data)
 
 
+class TestAllJson(unittest.TestCase):
+    def test_all_json(self):
+        # Expected output
+        with open(r"./tests/A1_expected_result.json", "r") as f:
+            expected_data = json.load(f)
+        with open(duplicates_list, "r") as f:
+            expected_duplicates = json.load(f)
+
+        # Run the generation in one pass
+        result, duplicate_list, special_results = generate_all_json(
+            image_folder,
+            [
+                "./tests/A1_Charizard.xlsx",
+                "./tests/A1_Mewtwo.xlsx",
+                "./tests/A1_Pikachu.xlsx",
+            ],
+        )
+
+        # Assertions
+        self.assertEqual(result, expected_data)
+        self.assertEqual(duplicate_list, expected_duplicates)
+        self.assertEqual(
+            special_results["000360"],
+            {"boosterPack": ["charizard", "mewtwo", "pikachu"]},
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
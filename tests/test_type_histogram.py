@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import build_icon_bank, match_icon, read_card_image
+from src.services import crop_card_region, analyze_card_image, TypeHistogram
+from src.services import get_type_histogram
+
+image_folder = r"./tests/A1-test-jp"
+image_path = r"./tests/A1-test-jp/cPK_10_000360_00_LIZARDONex_RR_M_M_ja_JP.png"
+trainer_path = r"./tests/A1-test-jp/cTR_10_000080_00_KAINOKASEKI_C_M_M_ja_JP.png"
+
+
+class TestTypeHistogram(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.icon_bank = build_icon_bank()
+        cls.imgs = [
+            read_card_image(os.path.join(image_folder, name))
+            for name in sorted(os.listdir(image_folder))
+        ]
+
+    def test_histogram_normalized(self):
+        crop = crop_card_region(read_card_image(image_path), "type")
+        self.assertAlmostEqual(float(get_type_histogram(crop).sum()), 1.0, places=5)
+
+    def test_classify(self):
+        histogram = TypeHistogram(self.icon_bank)
+        crop = crop_card_region(read_card_image(image_path), "type")
+        self.assertEqual(histogram.classify(crop), "fire")
+
+        # Trainer cards have no type icon, left to template matching
+        crop = crop_card_region(read_card_image(trainer_path), "type")
+        self.assertIsNone(histogram.classify(crop))
+        self.assertEqual(histogram.pop_counts(), (1, 1))
+        self.assertEqual(histogram.pop_counts(), (0, 0))
+
+    def test_same_as_template_matching(self):
+        histogram = TypeHistogram(self.icon_bank)
+        for img in self.imgs:
+            crop = crop_card_region(img, "type")
+            card_type = histogram.classify(crop)
+            if card_type is not None:
+                self.assertEqual(card_type, match_icon(crop, self.icon_bank))
+
+        # Most cards do not need template matching
+        classified, deferred = histogram.pop_counts()
+        self.assertGreater(classified, deferred * 4)
+
+    def test_analysis_unchanged(self):
+        histogram = TypeHistogram(self.icon_bank)
+        for img in self.imgs[::6]:
+            self.assertEqual(
+                analyze_card_image(img, self.icon_bank, histogram=histogram),
+                analyze_card_image(img, self.icon_bank),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()